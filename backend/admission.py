@@ -0,0 +1,115 @@
+import os
+
+from fastapi import Depends, HTTPException
+
+from database import shards
+from kitchen import scheduler_for
+from outlets import current_outlet
+from shared_state import shared_state
+
+# A signal at or above its limit means the restaurant is overloaded
+MAX_PENDING_ORDERS = int(os.getenv("ADMISSION_MAX_PENDING", "40"))
+MAX_KITCHEN_ETA_MINUTES = float(os.getenv("ADMISSION_MAX_ETA_MINUTES", "45"))
+MAX_POOL_SATURATION = float(os.getenv("ADMISSION_MAX_POOL_SATURATION", "0.9"))
+# Pressure (fraction of the nearest limit) at which load mode kicks in
+ELEVATED_PRESSURE = float(os.getenv("ADMISSION_ELEVATED_PRESSURE", "0.75"))
+# Seconds a throttled client is told to wait before retrying
+RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "10"))
+# Lower number = more important. Unknown channels rank with Takeaway.
+CHANNEL_PRIORITY = {"Dine In": 0, "Takeaway": 1, "Online Delivery": 2}
+DEFAULT_PRIORITY = 1
+
+OVERRIDE_KEY = "company_load"  # per outlet: company_load:<outlet id>
+
+NORMAL = "normal"
+ELEVATED = "elevated"
+OVERLOADED = "overloaded"
+# Highest channel priority admitted at each level
+ADMITTED_PRIORITY = {NORMAL: 2, ELEVATED: 1, OVERLOADED: 0}
+
+
+def override_key(outlet_id):
+    return f"{OVERRIDE_KEY}:{outlet_id}"
+
+
+class AdmissionController:
+    """
+    Decides whether to admit an outlet's work based on its live load signals:
+    pending orders and kitchen ETA (from the outlet's in-memory kitchen
+    schedule) and this worker's pool saturation on the outlet's shard.
+    Reading the signals never touches the database: the schedule is the
+    cached one (KitchenScheduler.peek()), refreshed in the background. The
+    shared `company_load` flag is a per-outlet manual override that forces
+    load mode on every worker. One outlet's load never sheds another's requests.
+    """
+
+    def manual_override(self, outlet_id):
+        try:
+            return bool(shared_state.get(override_key(outlet_id), False))
+        except Exception as e:
+            print("Error reading company_load override:", e)
+            return False
+
+    def toggle_override(self, outlet_id):
+        return bool(shared_state.toggle(override_key(outlet_id)))
+
+    def signals(self, outlet_id):
+        signals = {"pool_saturation": shards.pool_for(outlet_id).stats()["saturation"]}
+        schedule = scheduler_for(outlet_id).peek()
+        # Until the first schedule is built, decide on pool saturation alone
+        if schedule is not None:
+            signals["pending_orders"] = len(schedule.orders)
+            signals["kitchen_eta_minutes"] = max((eta.eta_minutes for eta in schedule.orders), default=0.0)
+        return signals
+
+    def pressure(self, signals):
+        return max(
+            signals.get("pending_orders", 0) / MAX_PENDING_ORDERS,
+            signals.get("kitchen_eta_minutes", 0) / MAX_KITCHEN_ETA_MINUTES,
+            signals["pool_saturation"] / MAX_POOL_SATURATION,
+        )
+
+    def status(self, outlet_id):
+        signals = self.signals(outlet_id)
+        pressure = self.pressure(signals)
+        override = self.manual_override(outlet_id)
+        if pressure >= 1:
+            level = OVERLOADED
+        elif pressure >= ELEVATED_PRESSURE or override:
+            level = ELEVATED
+        else:
+            level = NORMAL
+        return {
+            "level": level,
+            "pressure": round(pressure, 2),
+            "manual_override": override,
+            "signals": signals,
+        }
+
+    def admit_order(self, outlet_id, channel_type):
+        """
+        Admit a new order, or reject it with 503 and Retry-After while its
+        channel is throttled. Rejected orders are not held: waiting here would
+        tie up a threadpool worker the admitted channels need.
+        """
+        priority = CHANNEL_PRIORITY.get(channel_type, DEFAULT_PRIORITY)
+        level = self.status(outlet_id)["level"]
+        if priority > ADMITTED_PRIORITY[level]:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Kitchen is {level}; {channel_type} orders are paused, please retry shortly",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+
+
+controller = AdmissionController()
+
+
+def shed_under_load(outlet_id: str = Depends(current_outlet)):
+    """Route dependency for cheap-to-retry dashboard reads: the first thing dropped under load."""
+    if controller.status(outlet_id)["level"] != NORMAL:
+        raise HTTPException(
+            status_code=503,
+            detail="Dashboard temporarily unavailable under load, please retry",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
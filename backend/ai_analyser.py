@@ -1,15 +1,36 @@
 from typing import List, Dict
 import json
-from groq import Groq
 import os
+import threading
 from dotenv import load_dotenv
 from pydantic import BaseModel
 
+from profiling import traced
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize Groq client
-groq = Groq(api_key=os.getenv("GROQ_API_KEY"))
+_groq = None
+_groq_lock = threading.Lock()
+
+
+def get_groq_client():
+    """Create the Groq client on first use instead of at import time."""
+    global _groq
+    if _groq is None:
+        with _groq_lock:
+            if _groq is None:
+                from groq import Groq
+                _groq = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    return _groq
+
+
+def groq_status():
+    """Dependency state for the readiness probe (no network call)."""
+    return {
+        "configured": bool(os.getenv("GROQ_API_KEY")),
+        "initialized": _groq is not None,
+    }
 
 class OrderGroup(BaseModel):
     """Pydantic model for grouped orders."""
@@ -18,6 +39,7 @@ class OrderGroup(BaseModel):
     skus: List[str]  # List of SKUs in the group
     sku_names: List[str]  # List of SKU names in the group
 
+@traced("groq")
 def club_orders(order_data: List[Dict]) -> List[Dict]:
     """
     Club orders based on SKU descriptions using an LLM.
@@ -56,7 +78,7 @@ def club_orders(order_data: List[Dict]) -> List[Dict]:
     )
     
     # Call the LLM
-    chat_completion = groq.chat.completions.create(
+    chat_completion = get_groq_client().chat.completions.create(
         messages=[
             {
                 "role": "system",
@@ -0,0 +1,155 @@
+"""
+Stream `orders` into date-partitioned Parquet so reporting runs off the OLTP
+database.
+
+Every shard (database.shards) is exported to its own <out>/<shard>/, since
+order ids are only unique within a shard. Rows are read with a server-side
+cursor in id order, past a high-water mark kept in <out>/<shard>/_state.json.
+Each batch is written as
+<out>/<shard>/{orders,order_items}/date=YYYY-MM-DD/part-<first id>.parquet,
+and the mark only advances once the batch is on disk. Re-running after a
+crash overwrites the same part files instead of duplicating rows. Orders are
+captured as they were at export time.
+
+Usage (from backend/):
+    python -m analytics.export exports/
+    python -m analytics.export exports/ --loop --interval 300
+"""
+import argparse
+import json
+import os
+import time
+from datetime import timezone
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    raise SystemExit("Parquet export needs pyarrow: pip install -r requirements-analytics.txt")
+
+from database import shards
+
+BATCH_SIZE = 5000
+# Skip orders younger than this so transactions still in flight (which may
+# hold a lower id) commit before the high-water mark moves past them
+SETTLE_SECONDS = 60
+STATE_FILE = "_state.json"
+
+ORDER_SCHEMA = pa.schema([
+    ("order_id", pa.int64()),
+    ("created_at", pa.timestamp("us", tz="UTC")),
+    ("channel_type", pa.string()),
+    ("settlement_mode", pa.string()),
+    ("status", pa.string()),
+    ("waiter_id", pa.string()),
+    ("price", pa.float64()),
+    ("outlet_id", pa.string()),
+])
+
+ITEM_SCHEMA = pa.schema([
+    ("order_id", pa.int64()),
+    ("created_at", pa.timestamp("us", tz="UTC")),
+    ("channel_type", pa.string()),
+    ("settlement_mode", pa.string()),
+    ("sku", pa.string()),
+    ("quantity", pa.int64()),
+    ("price", pa.float64()),
+    ("outlet_id", pa.string()),
+])
+
+
+def load_high_water_mark(out_dir: Path) -> int:
+    path = out_dir / STATE_FILE
+    if not path.exists():
+        return 0
+    return json.loads(path.read_text())["last_order_id"]
+
+
+def save_high_water_mark(out_dir: Path, last_order_id: int):
+    tmp = out_dir / (STATE_FILE + ".tmp")
+    tmp.write_text(json.dumps({"last_order_id": last_order_id}))
+    os.replace(tmp, out_dir / STATE_FILE)
+
+
+def _split_batch(rows):
+    """Split a batch of order rows into per-date order and order-item columns."""
+    by_date = {}
+    for order_id, created_at, channel_type, settlement_mode, status, waiter_id, price, items, outlet_id in rows:
+        created_at = created_at.astimezone(timezone.utc)
+        orders, order_items = by_date.setdefault(created_at.date().isoformat(), ([], []))
+        orders.append((order_id, created_at, channel_type, settlement_mode, status,
+                       str(waiter_id) if waiter_id is not None else None,
+                       float(price) if price is not None else None, outlet_id))
+        for item in items or []:
+            order_items.append((order_id, created_at, channel_type, settlement_mode, item.get("sku"),
+                                int(item.get("quantity") or 0), float(item.get("price") or 0), outlet_id))
+    return by_date
+
+
+def _write(out_dir: Path, dataset: str, day: str, first_id: int, rows, schema):
+    if not rows:
+        return
+    columns = list(zip(*rows))
+    table = pa.Table.from_arrays([pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema)
+    partition = out_dir / dataset / f"date={day}"
+    partition.mkdir(parents=True, exist_ok=True)
+    pq.write_table(table, partition / f"part-{first_id:012d}.parquet", compression="zstd")
+
+
+def export_orders(pool, out_dir: Path, batch_size: int = BATCH_SIZE) -> int:
+    """Export every order of one shard past the high-water mark. Returns the number of orders written."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    last_id = load_high_water_mark(out_dir)
+    exported = 0
+
+    conn = pool.acquire()
+    try:
+        # Named cursor = server-side: Postgres streams `itersize` rows at a time
+        with conn.cursor(name="orders_export") as cursor:
+            cursor.itersize = batch_size
+            cursor.execute("""
+            SELECT id, created_at, channel_type, settlement_mode, status, waiter_id, price, items, outlet_id
+            FROM orders
+            WHERE id > %s
+              AND created_at < NOW() - make_interval(secs => %s)
+            ORDER BY id;
+            """, (last_id, SETTLE_SECONDS))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                first_id = rows[0][0]
+                for day, (orders, order_items) in _split_batch(rows).items():
+                    _write(out_dir, "orders", day, first_id, orders, ORDER_SCHEMA)
+                    _write(out_dir, "order_items", day, first_id, order_items, ITEM_SCHEMA)
+                last_id = rows[-1][0]
+                save_high_water_mark(out_dir, last_id)
+                exported += len(rows)
+        conn.rollback()
+    finally:
+        pool.release(conn)
+    return exported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export orders to date-partitioned Parquet.")
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--loop", action="store_true", help="keep exporting every --interval seconds")
+    parser.add_argument("--interval", type=float, default=300)
+    args = parser.parse_args()
+
+    while True:
+        for shard, pool in shards.pools.items():
+            started = time.monotonic()
+            exported = export_orders(pool, args.out_dir / shard, args.batch_size)
+            print(f"Shard {shard}: exported {exported} orders in {time.monotonic() - started:.2f}s "
+                  f"(high-water mark {load_high_water_mark(args.out_dir / shard)})")
+        if not args.loop:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Vectorized settlement and per-SKU sales reports over the Parquet files
+written by analytics.export. Only the needed columns and date partitions
+are read, and all arithmetic runs in pandas/NumPy.
+
+Usage (from backend/):
+    python -m analytics.reports exports/ --since 2025-01-01
+"""
+import argparse
+import json
+from pathlib import Path
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    raise SystemExit("Reports need pandas and numpy: pip install -r requirements-analytics.txt")
+
+# Commission rates applied by /settlement_master
+ONLINE_COMMISSION = 0.10
+CREDIT_CARD_COMMISSION = 0.05
+
+
+def load_items(out_dir: Path, since=None, until=None, columns=None, outlets=None) -> "pd.DataFrame":
+    """
+    Read order items from every shard's export, pruning date partitions
+    outside [since, until] and keeping only `outlets` when given.
+    """
+    filters = []
+    if since:
+        filters.append(("date", ">=", str(since)))
+    if until:
+        filters.append(("date", "<=", str(until)))
+    if outlets:
+        filters.append(("outlet_id", "in", list(outlets)))
+    frames = [
+        pd.read_parquet(path, columns=columns, filters=filters or None)
+        for path in sorted(out_dir.glob("*/order_items"))
+    ]
+    if not frames:
+        return pd.DataFrame(columns=columns or [])
+    return pd.concat(frames, ignore_index=True)
+
+
+def settlement_report(items: "pd.DataFrame") -> dict:
+    """
+    Same figures as /settlement_master. Like that endpoint, total_orders
+    counts order lines (one per item), so the two reconcile.
+    """
+    line_sales = items["price"].to_numpy() * items["quantity"].to_numpy()
+    report = {}
+    for label, mask, rate in (
+        ("Online Delivery", (items["channel_type"] == "Online Delivery").to_numpy(), ONLINE_COMMISSION),
+        ("Credit Card", (items["settlement_mode"] == "Credit Card").to_numpy(), CREDIT_CARD_COMMISSION),
+    ):
+        total_sales = float(line_sales[mask].sum())
+        report[label] = {
+            "total_orders": int(np.count_nonzero(mask)),
+            "total_sales": total_sales,
+            "commission_amount": total_sales * rate,
+        }
+    return report
+
+
+def sku_sales_report(items: "pd.DataFrame") -> "pd.DataFrame":
+    """Quantity, revenue and distinct orders per SKU, best sellers first."""
+    # Order ids repeat across shards; an outlet lives on one shard, so (outlet, id) is unique
+    frame = items.assign(
+        revenue=items["price"] * items["quantity"],
+        order_key=items["outlet_id"].astype(str) + ":" + items["order_id"].astype(str),
+    )
+    report = frame.groupby("sku", sort=False).agg(
+        quantity=("quantity", "sum"),
+        revenue=("revenue", "sum"),
+        orders=("order_key", "nunique"),
+    )
+    return report.sort_values("revenue", ascending=False).reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Settlement and per-SKU sales from exported Parquet.")
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--since", help="first date to include (YYYY-MM-DD)")
+    parser.add_argument("--until", help="last date to include (YYYY-MM-DD)")
+    parser.add_argument("--outlets", help="comma-separated outlet ids (default: all)")
+    args = parser.parse_args()
+
+    items = load_items(
+        args.out_dir, args.since, args.until,
+        columns=["order_id", "outlet_id", "channel_type", "settlement_mode", "sku", "quantity", "price"],
+        outlets=args.outlets.split(",") if args.outlets else None,
+    )
+    print(json.dumps({
+        "settlement": settlement_report(items),
+        "sku_sales": sku_sales_report(items).to_dict(orient="records"),
+    }, indent=2, default=float))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,54 @@
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from backends import BACKEND
+from database import REPLICA_WRITE_EVENT, replica, shards
 from routes.users import router as user_router
 from routes.menu import router as menu_router
 from routes.orders import router as order_router
 from routes.settlement import router as settlement_router
 from routes.company import router as company_router
+from routes.health import router as health_router
+from routes.kitchen import router as kitchen_router
+from routes.dashboard import router as dashboard_router
+from routes.reports import router as reports_router
+from routes.profiling import router as profiling_router
 from fastapi.middleware.cors import CORSMiddleware
+import outbox
+from profiling import ProfilingMiddleware
+from serialization import FastJSONResponse
+from snapshot import snapshots
+from shared_state import shared_state
+
+# Other workers' writes hold this worker's reads on the primary too (read-your-writes)
+shared_state.subscribe(REPLICA_WRITE_EVENT, lambda _value: replica.note_write())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the shard pools in the background so a slow or unavailable Postgres
+    # delays readiness (/readyz) instead of blocking the worker from booting.
+    stop = threading.Event()
+    if BACKEND == "postgres":
+        for name, shard_pool in shards.pools.items():
+            threading.Thread(target=shard_pool.warm_until_ready, args=(stop,), name=f"pool-warmup-{name}", daemon=True).start()
+    shared_state.start()
+    snapshots.start()
+    if BACKEND == "postgres" and outbox.ENABLED:
+        outbox.worker.start()
+    yield
+    stop.set()
+    outbox.worker.stop()
+    snapshots.stop()
+    shared_state.stop()
+    for shard_pool in shards.pools.values():
+        shard_pool.close()
+    if replica.pool is not None:
+        replica.pool.close()
 
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,11 +56,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],  # the dashboard retries a cold snapshot after it
 )
+# Outermost, so a profiled request's total covers every other middleware
+app.add_middleware(ProfilingMiddleware, shared_state=shared_state)
 
 app.include_router(user_router, prefix="/api", tags=["Users"])
 # Include menu routes
 app.include_router(menu_router, prefix="/api", tags=["Menu"])
 app.include_router(order_router,prefix="/api",tags=["Orders"])
 app.include_router(settlement_router,prefix="/api",tags=["Settlement"])
-app.include_router(company_router,prefix="/api",tags=["Company"])
\ No newline at end of file
+app.include_router(company_router,prefix="/api",tags=["Company"])
+app.include_router(kitchen_router,prefix="/api",tags=["Kitchen"])
+app.include_router(dashboard_router,prefix="/api",tags=["Dashboard"])
+app.include_router(reports_router,prefix="/api",tags=["Reports"])
+app.include_router(profiling_router,prefix="/api",tags=["Profiling"])
+app.include_router(health_router,tags=["Health"])
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""
+Picks the implementation of the repository interfaces (repository.py) that
+the routes and background services use. Set DB_BACKEND to one of:
+- "postgres" (default): database.py
+- "memory": memory_store.py, for hermetic benchmarks and demo/kiosk deployments
+"""
+import os
+
+BACKEND = os.getenv("DB_BACKEND", "postgres")
+
+if BACKEND == "memory":
+    from database import DEFAULT_SHARD
+    from memory_store import (
+        CompanyDatabase, MenuDatabase, MenuDatabase2, OrderDatabase, OutletDatabase, SnapshotDatabase, UserDatabase,
+    )
+
+    SHARD_NAMES = [DEFAULT_SHARD]  # every outlet's store lives in this process
+else:
+    from database import (
+        CompanyDatabase, MenuDatabase, MenuDatabase2, OrderDatabase, OutletDatabase, SnapshotDatabase, UserDatabase,
+        shards,
+    )
+
+    SHARD_NAMES = list(shards.pools)
+
+__all__ = [
+    "BACKEND", "SHARD_NAMES",
+    "CompanyDatabase", "MenuDatabase", "MenuDatabase2", "OrderDatabase", "OutletDatabase", "SnapshotDatabase",
+    "UserDatabase",
+]
@@ -0,0 +1,106 @@
+"""
+Order placement latency: place_order() (one round trip, side effects queued
+in the outbox) against the original client-side path (waiter query, one
+pricing query per item, order insert, allocation insert, sales read + insert).
+
+Then places orders from several threads at once, drains the outbox and
+checks that the sales ledger grew by exactly the sum of the placed totals
+(no lost or doubled updates).
+
+Writes real orders: run it against a scratch database, from backend/:
+    python -m benchmarks.bench_create_order
+"""
+import statistics
+import threading
+import time
+
+from database import OrderDatabase
+from outbox import OutboxWorker
+
+ORDERS = 200
+THREADS = 8
+ORDER = {
+    "channel_type": "Dine In",
+    "table_numbers": ["T1"],
+    "settlement_mode": "Cash",
+}
+
+
+def sample_items(db):
+    db.cursor.execute("SELECT sku, variations FROM menu WHERE outlet_id = %s LIMIT 3;", (db.outlet_id,))
+    return [
+        {"sku": row["sku"], "quantity": 2, "price": float(min(row["variations"].values()))}
+        for row in db.cursor.fetchall()
+    ]
+
+
+def latest_sales(db):
+    db.cursor.execute(
+        "SELECT sales FROM company WHERE outlet_id = %s ORDER BY created_at DESC LIMIT 1;", (db.outlet_id,))
+    row = db.cursor.fetchone()
+    db.conn.rollback()
+    return float(row["sales"]) if row else 0.0
+
+
+def measure(place, items):
+    timings = []
+    for _ in range(ORDERS):
+        started = time.perf_counter()
+        place(items=items, **ORDER)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.mean(timings), timings[len(timings) // 2], timings[int(len(timings) * 0.95)]
+
+
+def drain_outbox(shard):
+    OutboxWorker().drain(shard)
+
+
+def check_concurrency(items):
+    db = OrderDatabase()
+    drain_outbox(db.shard)
+    before = latest_sales(db)
+    totals = []
+    lock = threading.Lock()
+
+    def worker():
+        worker_db = OrderDatabase()
+        try:
+            for _ in range(ORDERS // THREADS):
+                result = worker_db.create_order(items=items, **ORDER)
+                with lock:
+                    totals.append(result["total_price"])
+        finally:
+            worker_db.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    drain_outbox(db.shard)
+    grown = latest_sales(db) - before
+    db.close()
+    print(f"{THREADS} threads: {len(totals) / elapsed:.0f} orders/s, "
+          f"ledger grew {grown:.2f} for {sum(totals):.2f} placed "
+          f"({'consistent' if abs(grown - sum(totals)) < 0.01 else 'LOST UPDATES'})")
+
+
+def main():
+    db = OrderDatabase()
+    try:
+        items = sample_items(db)
+        print(f"{'path':<14} {'mean (ms)':>10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+        for name, place in (("legacy", db.create_order_legacy), ("place_order", db.create_order)):
+            mean, p50, p95 = measure(place, items)
+            print(f"{name:<14} {mean:>10.2f} {p50:>10.2f} {p95:>10.2f}")
+    finally:
+        db.close()
+    check_concurrency(items)
+
+
+if __name__ == "__main__":
+    main()
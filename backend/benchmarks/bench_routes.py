@@ -0,0 +1,71 @@
+"""
+Route-level throughput on the in-memory backend (DB_BACKEND=memory), so it
+needs no database. It measures the cost of FastAPI, validation, serialization
+and the route logic on its own. Run the same routes against Postgres to see
+how much of a request's time the database takes.
+
+Run from backend/:  python -m benchmarks.bench_routes
+"""
+import os
+
+os.environ["DB_BACKEND"] = "memory"
+# The backlog grows with every order placed here; keep admission control out of the numbers
+os.environ.setdefault("ADMISSION_MAX_PENDING", "1000000")
+os.environ.setdefault("ADMISSION_MAX_ETA_MINUTES", "1000000")
+
+import time
+
+from fastapi.testclient import TestClient
+
+from app import app
+from memory_store import default_store
+
+REQUESTS = 500
+ORDER = {
+    "channel_type": "Dine In",
+    "table_numbers": ["T1"],
+    "items": [{"sku": "STA001", "quantity": 2, "price": 180}, {"sku": "CUR001", "quantity": 1, "price": 240}],
+    "settlement_mode": "Cash",
+}
+ROUTES = [
+    ("GET", "/api/menu"),
+    ("GET", "/api/menu-for-admin"),
+    ("GET", "/api/get_offer_item"),
+    ("GET", "/api/get_order_management"),
+    ("GET", "/api/get_allocations"),
+    ("GET", "/api/settlement_master"),
+    ("GET", "/api/kitchen/queue"),
+    ("POST", "/api/create_order"),
+]
+
+
+def seed(store, menu_items=60, waiters=6):
+    for i in range(menu_items):
+        sub_category = ("Starters", "Curries", "Breads")[i % 3]
+        store.insert_menu_item(
+            name=f"Item {i}", category=sub_category, sub_category=sub_category, tax_percentage=5,
+            packaging_charge=10, description="", variations={"Regular": 100 + i}, image_url="",
+            preparation_time=5 + i % 20,
+        )
+    for i in range(waiters):
+        store.insert_user(f"Waiter {i}", f"waiter{i}@example.com", "password", role="waiter")
+
+
+def main():
+    seed(default_store)
+    with TestClient(app) as client:
+        for _ in range(50):
+            client.post("/api/create_order", json=ORDER)
+
+        print(f"{'route':<34} {'req/s':>8} {'mean (ms)':>10}")
+        for method, path in ROUTES:
+            started = time.perf_counter()
+            for _ in range(REQUESTS):
+                response = client.request(method, path, json=ORDER if method == "POST" else None)
+                assert response.status_code == 200, (path, response.status_code, response.text)
+            elapsed = time.perf_counter() - started
+            print(f"{method + ' ' + path:<34} {REQUESTS / elapsed:>8.0f} {elapsed * 1000 / REQUESTS:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Encode time per payload size: FastAPI's default path (jsonable_encoder over
+dict rows + JSONResponse) against compact row types + FastJSONResponse.
+
+Run from backend/:  python -m benchmarks.bench_serialization
+"""
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from models.rows import OrderManagementRow
+from serialization import FastJSONResponse
+
+SIZES = [100, 1_000, 10_000, 50_000]
+REPEATS = 5
+
+
+def make_tuples(n):
+    """Synthetic rows shaped like get_order_management output."""
+    start = datetime(2025, 1, 1, 12, 0)
+    return [
+        (
+            i,
+            start + timedelta(minutes=i),
+            "Dine In" if i % 3 else "Online Delivery",
+            [
+                {"name": "Paneer Tikka", "preparation_time": 15, "sku": "STA001", "price": 249.0, "quantity": 2},
+                {"name": "Butter Naan", "preparation_time": 5, "sku": "BRE002", "price": 49.0, "quantity": 3},
+            ],
+            Decimal("645.50"),
+            "Credit Card",
+            "a3c1e6f2-6f4a-4bb0-9a66-2f6f1b1b0d21",
+            ["T4", "T5"],
+        )
+        for i in range(n)
+    ]
+
+
+def best_of(fn):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    fields = OrderManagementRow.__slots__
+    print(f"{'rows':>8} {'default (ms)':>14} {'fast (ms)':>12} {'speedup':>9}")
+    for n in SIZES:
+        tuples = make_tuples(n)
+        dict_rows = [dict(zip(fields, row)) for row in tuples]
+
+        default_time = best_of(lambda: JSONResponse(jsonable_encoder(dict_rows)))
+        fast_time = best_of(lambda: FastJSONResponse([OrderManagementRow(*row) for row in tuples]))
+
+        print(f"{n:>8} {default_time * 1000:>14.2f} {fast_time * 1000:>12.2f} {default_time / fast_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
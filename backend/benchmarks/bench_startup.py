@@ -0,0 +1,46 @@
+"""
+Worker startup cost: cold `import app` in a fresh interpreter, then the time
+from lifespan start until /readyz reports ready (pool warmed, DB reachable).
+
+Run from backend/:  python -m benchmarks.bench_startup
+"""
+import subprocess
+import sys
+import time
+
+REPEATS = 5
+READY_TIMEOUT = 30
+
+
+def time_import():
+    code = "import time; t = time.perf_counter(); import app; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def time_until_ready():
+    from fastapi.testclient import TestClient
+    import app
+
+    started = time.perf_counter()
+    with TestClient(app.app) as client:
+        while time.perf_counter() - started < READY_TIMEOUT:
+            if client.get("/readyz").status_code == 200:
+                return time.perf_counter() - started
+            time.sleep(0.01)
+    return None
+
+
+def main():
+    imports = [time_import() for _ in range(REPEATS)]
+    print(f"cold import:     min {min(imports) * 1000:8.1f} ms   max {max(imports) * 1000:8.1f} ms")
+
+    ready = time_until_ready()
+    if ready is None:
+        print(f"ready:           not ready after {READY_TIMEOUT}s (is Postgres reachable?)")
+    else:
+        print(f"ready:           {ready * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Parse/plan savings from the prepared-statement cache on the heavy queries.
+
+For each query: planning time reported by EXPLAIN ANALYZE for the plain
+text against EXECUTE of the prepared statement (once Postgres has switched
+to a cached generic plan), both with the parameters the method itself
+passes (captured from one call), then mean latency of the *Database method with
+the cache disabled and enabled.
+
+Run from backend/:  python -m benchmarks.bench_statements
+"""
+import json
+import time
+
+from database import MenuDatabase2, OrderDatabase
+from statements import registry
+
+RUNS = 200
+# (statement name, database class, method)
+HEAVY = [
+    ("allocations", OrderDatabase, "get_allocations"),
+    ("order_management", OrderDatabase, "get_order_management"),
+    ("kitchen_backlog", OrderDatabase, "get_kitchen_backlog"),
+    ("offer_item", MenuDatabase2, "get_offer_item"),
+]
+
+
+def planning_ms(cursor, statement, params):
+    cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {statement}", params)
+    plan = cursor.fetchone()
+    plan = plan[0] if isinstance(plan, tuple) else plan["QUERY PLAN"]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Planning Time"]
+
+
+def sample_params(name, call):
+    """Run call() once and return the parameters it executed statement `name` with."""
+    seen = {}
+    execute = registry.execute
+
+    def recording(cursor, statement, query, params=()):
+        seen[statement] = params
+        return execute(cursor, statement, query, params)
+
+    registry.execute = recording
+    try:
+        call()
+    finally:
+        del registry.execute
+    return tuple(seen[name])
+
+
+def mean_ms(call):
+    started = time.perf_counter()
+    for _ in range(RUNS):
+        call()
+    return (time.perf_counter() - started) * 1000 / RUNS
+
+
+def main():
+    print(f"{'query':<18} {'plan text':>10} {'plan prep':>10} {'run text':>10} {'run prep':>10}   (ms)")
+    for name, db_class, method in HEAVY:
+        db = db_class()
+        try:
+            call = getattr(db, method)
+
+            registry.enabled = False
+            unprepared = mean_ms(call)
+            registry.enabled = True
+            prepared = mean_ms(call)  # the first few runs also settle the generic plan
+
+            params = sample_params(name, call)
+            db.conn.rollback()
+            text_plan = planning_ms(db.cursor, registry.sql(name), params)
+            placeholders = ", ".join(["%s"] * len(params))
+            prepared_plan = planning_ms(db.cursor, f"EXECUTE {name} ({placeholders})" if params else f"EXECUTE {name}", params)
+            db.conn.rollback()
+        finally:
+            db.close()
+        print(f"{name:<18} {text_plan:>10.3f} {prepared_plan:>10.3f} {unprepared:>10.3f} {prepared:>10.3f}")
+
+    print(json.dumps(registry.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
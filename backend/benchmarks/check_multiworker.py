@@ -0,0 +1,100 @@
+"""
+Consistency check for shared state across worker processes.
+
+Starts the gunicorn profile with several workers, flips the company_load
+override through one worker, and polls /api/is_company_load until every
+worker reports the new value. Prints the propagation time per round and
+exits non-zero if any worker is still stale after the deadline.
+
+Run from backend/ against a migrated database:
+    python -m benchmarks.check_multiworker
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+WORKERS = int(os.getenv("CHECK_WORKERS", "4"))
+ROUNDS = 5
+DEADLINE_SECONDS = 5.0
+BOOT_TIMEOUT = 30.0
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get(base, path):
+    # A fresh connection per call lets the kernel spread requests over workers
+    with urllib.request.urlopen(base + path, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def wait_until_listening(base):
+    """Wait until every worker's shared-state listener is connected."""
+    listening = set()
+    deadline = time.monotonic() + BOOT_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            state = get(base, "/readyz")["shared_state"]
+            if state.get("listening"):
+                listening.add(state["worker"])
+            if len(listening) >= WORKERS:
+                return
+        except Exception:
+            pass
+        time.sleep(0.05)
+    raise SystemExit(f"Only {len(listening)} of {WORKERS} workers became ready")
+
+
+def run_round(base):
+    expected = "enabled" in get(base, "/api/toggle_company_load")["message"]
+    started = time.monotonic()
+    agreed = set()
+    while time.monotonic() - started < DEADLINE_SECONDS:
+        status = get(base, "/api/is_company_load")
+        if status["manual_override"] == expected:
+            agreed.add(status["worker"])
+        else:
+            agreed.discard(status["worker"])
+        if len(agreed) >= WORKERS:
+            return time.monotonic() - started
+    return None
+
+
+def main():
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "WEB_CONCURRENCY": str(WORKERS), "BIND": f"127.0.0.1:{port}"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app", "-c", "gunicorn.conf.py"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    failures = 0
+    try:
+        wait_until_listening(base)
+        initial = get(base, "/api/is_company_load")["manual_override"]
+        for round_no in range(1, ROUNDS + 1):
+            elapsed = run_round(base)
+            if elapsed is None:
+                failures += 1
+                print(f"round {round_no}: workers still disagree after {DEADLINE_SECONDS}s")
+            else:
+                print(f"round {round_no}: all {WORKERS} workers consistent after {elapsed * 1000:.1f} ms")
+        if get(base, "/api/is_company_load")["manual_override"] != initial:
+            get(base, "/api/toggle_company_load")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Isolation and fan-out check for outlet sharding.
+
+Needs at least two shards, e.g. two local databases migrated with
+`python migrate.py`:
+    export DB_SHARDS='{"north": {"dsn": "dbname=hx_north host=/tmp", "outlets": ["north"]}}'
+
+1. Times the quiet outlet's kitchen backlog query alone, then again while
+   RUSH_PROCESSES processes place orders and read order management for the
+   busy outlet as fast as they can. Exits non-zero when the quiet outlet's
+   p95 grows by more than CHECK_MAX_SLOWDOWN. Shards sharing one Postgres
+   server (or one CPU) still compete for it, so give each its own server
+   for a meaningful number, or raise the limit.
+2. Checks that the cross-outlet order count report equals the sum of the
+   per-outlet counts read one by one.
+
+Writes real orders to the busy outlet (which needs a waiter and menu items):
+run it against scratch databases, from backend/:
+    CHECK_BUSY_OUTLET=main CHECK_QUIET_OUTLET=north python -m benchmarks.check_shards
+"""
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+from database import OrderDatabase, shards
+from outlets import order_counts_report
+
+BUSY_OUTLET = os.getenv("CHECK_BUSY_OUTLET", "main")
+QUIET_OUTLET = os.getenv("CHECK_QUIET_OUTLET", "north")
+RUSH_PROCESSES = int(os.getenv("CHECK_RUSH_PROCESSES", "4"))
+SAMPLES = 200
+MAX_SLOWDOWN = float(os.getenv("CHECK_MAX_SLOWDOWN", "2.0"))
+
+
+def sample_items(db):
+    db.cursor.execute("SELECT sku, variations FROM menu WHERE outlet_id = %s LIMIT 3;", (db.outlet_id,))
+    return [
+        {"sku": row["sku"], "quantity": 1, "price": float(min(row["variations"].values()))}
+        for row in db.cursor.fetchall()
+    ]
+
+
+def time_backlog(samples):
+    db = OrderDatabase(QUIET_OUTLET)
+    try:
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            db.get_kitchen_backlog()
+            db.conn.rollback()
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+    finally:
+        db.close()
+
+
+def rush(stop, items):
+    # Runs in its own process, so the rush and the timed reads don't share a GIL
+    while not stop.is_set():
+        db = OrderDatabase(BUSY_OUTLET)
+        try:
+            db.create_order("Dine In", ["T1"], items, "Cash")
+            db.get_order_management()
+        finally:
+            db.close()
+
+
+def p95(timings):
+    return statistics.quantiles(timings, n=20)[18]
+
+
+def main():
+    if shards.shard_for(BUSY_OUTLET) == shards.shard_for(QUIET_OUTLET):
+        raise SystemExit(f"{BUSY_OUTLET} and {QUIET_OUTLET} are on the same shard; set DB_SHARDS to split them")
+
+    db = OrderDatabase(BUSY_OUTLET)
+    try:
+        items = sample_items(db)
+    finally:
+        db.close()
+    if not items:
+        raise SystemExit(f"{BUSY_OUTLET} has no menu items")
+
+    alone = time_backlog(SAMPLES)
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    rushers = [context.Process(target=rush, args=(stop, items)) for _ in range(RUSH_PROCESSES)]
+    for rusher in rushers:
+        rusher.start()
+    try:
+        time.sleep(2.0)
+        under_rush = time_backlog(SAMPLES)
+    finally:
+        stop.set()
+        for rusher in rushers:
+            rusher.join()
+
+    slowdown = p95(under_rush) / p95(alone)
+    print(f"{QUIET_OUTLET} kitchen backlog p95: {p95(alone):.2f} ms alone, "
+          f"{p95(under_rush):.2f} ms during a rush at {BUSY_OUTLET} (x{slowdown:.2f})")
+    failures = slowdown > MAX_SLOWDOWN
+
+    report = order_counts_report(f"{BUSY_OUTLET},{QUIET_OUTLET}")
+    one_by_one = 0
+    for outlet_id in (BUSY_OUTLET, QUIET_OUTLET):
+        db = OrderDatabase(outlet_id)
+        try:
+            one_by_one += db.get_order_counts()["total"]
+        finally:
+            db.close()
+    print(f"fan-out report total {report['total']['total']}, per-outlet sum {one_by_one}, errors {report['errors']}")
+    failures = failures or report["errors"] or report["total"]["total"] != one_by_one
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,397 @@ from pydantic import BaseModel, EmailStr
 import uuid
 import os
 import psycopg2
+import functools
 import json
+import threading
+import time
 from dotenv import load_dotenv
 from datetime import datetime
 from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+from psycopg2.pool import PoolError
 import bcrypt
+from lifecycle import KITCHEN_STATUSES, PENDING, RELEASES_WAITER, TRANSITIONS, sources
+from profiling import Span, trace_methods
+from models.rows import AllocationRow, CompanyRow, KitchenBacklogRow, MenuAdminRow, OrderManagementRow
+from repository import (
+    CompanyRepository, MenuRepository, OfferRepository, OrderRepository, OutletRepository, SnapshotRepository,
+    UserRepository,
+)
+from serialization import dumps, fetch_as
+from statements import registry
 
 # Load environment variables
 load_dotenv()
 
+# Explicit projection of the `menu` table. The order is part of the /menu
+# contract: the admin menu page reads those rows positionally.
+MENU_COLUMNS = (
+    "id, name, category, sub_category, tax_percentage, packaging_charge, sku, "
+    "variations, created_at, description, image_url, preparation_time"
+)
+
+POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+
+# `orders` and `allocations` are partitioned by month on created_at
+# (migrations/003_partition_orders.sql). Operational queries read orders
+# this recent, plus the live ones of any age. Every scan of either table is
+# bounded by created_at, so Postgres prunes it to the partitions involved.
+ACTIVE_ORDER_DAYS = int(os.getenv("ACTIVE_ORDER_DAYS", "1"))
+
+# The orders of the last ACTIVE_ORDER_DAYS, plus older ones that are still
+# live. The older ones are found through live_orders (migrations/011_live_orders.sql),
+# and the scan of `orders` for them starts at the oldest live order.
+# Params: recent_orders_params().
+RECENT_ORDERS = """
+    SELECT o.* FROM orders o
+    WHERE o.outlet_id = %s AND o.created_at >= NOW() - make_interval(days => %s)
+    UNION ALL
+    SELECT o.* FROM live_orders l
+    JOIN orders o ON o.id = l.order_id AND o.created_at = l.created_at
+    WHERE l.outlet_id = %s
+      AND l.created_at < NOW() - make_interval(days => %s)
+      AND o.created_at < NOW() - make_interval(days => %s)
+      AND o.created_at >= (SELECT MIN(lo.created_at) FROM live_orders lo WHERE lo.outlet_id = %s)
+"""
+
+# The outlet's live orders in the given statuses, however old; the scan of
+# `orders` starts at the oldest live order. Params: live_orders_params().
+LIVE_ORDERS = """
+    SELECT o.* FROM live_orders l
+    JOIN orders o ON o.id = l.order_id AND o.created_at = l.created_at
+    WHERE l.outlet_id = %s
+      AND l.status = ANY(%s)
+      AND o.created_at >= (SELECT MIN(lo.created_at) FROM live_orders lo WHERE lo.outlet_id = %s)
+"""
+
+
+def recent_orders_params(outlet_id):
+    return (outlet_id, ACTIVE_ORDER_DAYS, outlet_id, ACTIVE_ORDER_DAYS, ACTIVE_ORDER_DAYS, outlet_id)
+
+
+def live_orders_params(outlet_id, statuses):
+    return (outlet_id, list(statuses), outlet_id)
+
+# Every row belongs to an outlet (migrations/005_outlets.sql). Requests that
+# don't name one (no X-Outlet-Id header) act on this outlet.
+DEFAULT_OUTLET = os.getenv("DEFAULT_OUTLET_ID", "main")
+
+
+class ConnectionPool:
+    """
+    Lazily filled, blocking connection pool.
+
+    Nothing connects until the first `acquire()` (or `warm()` from the app
+    lifespan), so importing the routes never touches the network. Released
+    connections stay open in an idle list, up to `maxconn` in total.
+    """
+
+    def __init__(self, minconn, maxconn, **connect_kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.connect_kwargs = connect_kwargs
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._in_use = 0
+        self.warmed = False
+        self.last_error = None
+
+    def _take_idle(self):
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop()
+                if not conn.closed:  # the server may have dropped it while idle
+                    return conn
+        return None
+
+    def acquire(self, timeout=POOL_TIMEOUT):
+        """Borrow a live connection, waiting up to `timeout` seconds for a free slot."""
+        if not self._slots.acquire(timeout=timeout):
+            raise PoolError("Timed out waiting for a database connection")
+        try:
+            conn = self._take_idle() or psycopg2.connect(**self.connect_kwargs)
+        except Exception as e:
+            self._slots.release()
+            self.last_error = str(e)
+            raise
+        with self._lock:
+            self._in_use += 1
+        return conn
+
+    def release(self, conn):
+        """Return a connection; an open transaction is rolled back, a broken connection closed."""
+        try:
+            if not conn.closed:
+                status = conn.info.transaction_status
+                if status == TRANSACTION_STATUS_UNKNOWN:
+                    conn.close()
+                elif status != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+        except psycopg2.Error:
+            conn.close()
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                if not conn.closed:
+                    self._idle.append(conn)
+            self._slots.release()
+
+    def warm(self):
+        """Open `minconn` connections up front and check each one answers."""
+        conns = []
+        try:
+            for _ in range(self.minconn):
+                conn = self.acquire()
+                conns.append(conn)
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1;")
+                conn.rollback()
+            self.warmed = True
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            print("Error warming connection pool:", e)
+        finally:
+            for conn in conns:
+                self.release(conn)
+        return self.warmed
+
+    def warm_until_ready(self, stop, retry_interval=2.0):
+        """Retry `warm()` until it succeeds or `stop` (a threading.Event) is set."""
+        while not stop.is_set() and not self.warm():
+            stop.wait(retry_interval)
+
+    def ping(self):
+        """Round-trip check used by the readiness probe."""
+        conn = self.acquire(timeout=1)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1;")
+            return True
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        return {
+            "warmed": self.warmed,
+            "min": self.minconn,
+            "max": self.maxconn,
+            "in_use": self._in_use,
+            "saturation": round(self._in_use / self.maxconn, 2),
+            "last_error": self.last_error,
+        }
+
+    def close(self):
+        """Close the idle connections (the pool reconnects on the next acquire)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self.warmed = False
+        for conn in idle:
+            conn.close()
+
+
+pool = ConnectionPool(
+    POOL_MIN,
+    POOL_MAX,
+    dbname=os.getenv("DB_NAME"),
+    user=os.getenv("DB_USER"),
+    password=os.getenv("DB_PASSWORD"),
+    host=os.getenv("DB_HOST"),
+    port=os.getenv("DB_PORT"),
+    connect_timeout=CONNECT_TIMEOUT,
+)
+
+
+DEFAULT_SHARD = "default"
+
+
+class ShardRouter:
+    """
+    Maps each outlet to the database shard that holds its data.
+
+    The "default" shard is `pool` (the DB_* settings) and holds every outlet
+    not assigned elsewhere. DB_SHARDS adds more shards as JSON, e.g.
+        {"north": {"dsn": "postgresql://.../north", "outlets": ["indiranagar", "hebbal"]},
+         "default": {"outlets": ["main"]}}
+    Each shard has its own pool, so a rush at one outlet only competes for
+    connections and locks with the outlets on its own shard.
+    """
+
+    def __init__(self, default_pool, config):
+        self.pools = {DEFAULT_SHARD: default_pool}
+        self._shard_by_outlet = {}
+        for name, shard in config.items():
+            if name != DEFAULT_SHARD:
+                self.pools[name] = ConnectionPool(POOL_MIN, POOL_MAX, dsn=shard["dsn"], connect_timeout=CONNECT_TIMEOUT)
+            for outlet_id in shard.get("outlets", ()):
+                self._shard_by_outlet[outlet_id] = name
+
+    def shard_for(self, outlet_id):
+        return self._shard_by_outlet.get(outlet_id, DEFAULT_SHARD)
+
+    def pool_for(self, outlet_id):
+        return self.pools[self.shard_for(outlet_id)]
+
+    def stats(self):
+        outlets = {}
+        for outlet_id, name in self._shard_by_outlet.items():
+            outlets.setdefault(name, []).append(outlet_id)
+        return {name: {"outlets": outlets.get(name, []), **shard_pool.stats()} for name, shard_pool in self.pools.items()}
+
+
+shards = ShardRouter(pool, json.loads(os.getenv("DB_SHARDS") or "{}"))
+
+
+REPLICA_DSN = os.getenv("DB_REPLICA_DSN")
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "0"))
+REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+
+
+class ReplicaRouter:
+    """
+    Decides whether a read-only method may run on the replica.
+
+    Reads stay on the primary when no replica is configured, while the
+    replica is marked down after a failed connect or query (retried after
+    DB_REPLICA_RETRY_SECONDS), and for DB_READ_YOUR_WRITES_SECONDS after any
+    worker commits a write, so a client sees its own order right away
+    whichever worker serves its next request. Each write on the default shard
+    is announced as REPLICA_WRITE_EVENT in its own transaction, and every
+    worker's shared state listener calls note_write() when it hears one.
+    """
+
+    def __init__(self, replica_pool, read_your_writes_seconds, retry_seconds):
+        self.pool = replica_pool
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self.retry_seconds = retry_seconds
+        self._last_write = 0.0
+        self._down_until = 0.0
+
+    def tracks_writes(self):
+        return self.pool is not None and self.read_your_writes_seconds > 0
+
+    def note_write(self):
+        self._last_write = time.monotonic()
+
+    def mark_down(self, error):
+        print("Replica unavailable, reading from primary:", error)
+        self._down_until = time.monotonic() + self.retry_seconds
+
+    def should_route(self):
+        if self.pool is None:
+            return False
+        now = time.monotonic()
+        if now < self._down_until:
+            return False
+        return now - self._last_write >= self.read_your_writes_seconds
+
+    def stats(self):
+        if self.pool is None:
+            return {"configured": False}
+        return {
+            "configured": True,
+            "down": time.monotonic() < self._down_until,
+            **self.pool.stats(),
+        }
+
+
+STATE_CHANNEL = "app_state"
+REPLICA_WRITE_EVENT = "replica:write"
+
+replica = ReplicaRouter(
+    ConnectionPool(0, POOL_MAX, dsn=REPLICA_DSN, connect_timeout=CONNECT_TIMEOUT) if REPLICA_DSN else None,
+    READ_YOUR_WRITES_SECONDS,
+    REPLICA_RETRY_SECONDS,
+)
+
+
+def read_only(method):
+    """Run a *Database method against the replica when the router allows it (default shard only)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._role == "replica" or self.shard != DEFAULT_SHARD or not replica.should_route():
+            return method(self, *args, **kwargs)
+        try:
+            self._handle("replica")
+        except Exception as e:
+            replica.mark_down(e)
+            return method(self, *args, **kwargs)
+        self._role = "replica"
+        try:
+            return method(self, *args, **kwargs)
+        except psycopg2.OperationalError as e:
+            # The replica went away mid-query: give up its connection and retry once on the primary
+            replica.mark_down(e)
+            self._release("replica")
+            self._role = "primary"
+            return method(self, *args, **kwargs)
+        finally:
+            self._role = "primary"
+    return wrapper
+
+
+class PooledDatabase:
+    """
+    Base for the *Database classes. Each instance acts for one outlet, on the
+    shard that holds it. Connections are borrowed lazily, one per role
+    ("primary" or "replica"), and all handed back on close(). `conn` and
+    `cursor` resolve to the role the current method runs under.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        trace_methods(cls)
+
+    def __init__(self, outlet_id=DEFAULT_OUTLET, cursor_factory=RealDictCursor, shard=None):
+        self.outlet_id = outlet_id
+        self.shard = shard or shards.shard_for(outlet_id)
+        self.cursor_factory = cursor_factory
+        self._role = "primary"
+        self._handles = {}
+
+    def _handle(self, role):
+        if role not in self._handles:
+            source = shards.pools[self.shard] if role == "primary" else replica.pool
+            conn = source.acquire()
+            self._handles[role] = (source, conn, conn.cursor(cursor_factory=self.cursor_factory))
+        return self._handles[role]
+
+    @property
+    def conn(self):
+        return self._handle(self._role)[1]
+
+    @property
+    def cursor(self):
+        return self._handle(self._role)[2]
+
+    def execute(self, name, query, params=()):
+        """Run a fixed query as a named prepared statement (see statements.py)."""
+        with Span("sql", name):
+            registry.execute(self.cursor, name, query, params)
+
+    def commit(self):
+        """Commit on the primary and open every worker's read-your-writes window."""
+        _, conn, cursor = self._handle("primary")
+        if self.shard == DEFAULT_SHARD and replica.tracks_writes():
+            cursor.execute("SELECT pg_notify(%s, %s);", (STATE_CHANNEL, json.dumps({"key": REPLICA_WRITE_EVENT})))
+        conn.commit()
+        replica.note_write()
+
+    def _release(self, role):
+        source, conn, cursor = self._handles.pop(role)
+        cursor.close()
+        source.release(conn)
+
+    def close(self):
+        for role in list(self._handles):
+            self._release(role)
+
+
 class UserSignup(BaseModel):
     name: str
     email: EmailStr
@@ -31,54 +413,155 @@ class UserSchema(BaseModel):
             created_at=datetime.utcnow().isoformat(),
             **data
         )
-class CompanyDatabase:
-    def __init__(self):
-        self.conn = psycopg2.connect(
-            dbname=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            host=os.getenv("DB_HOST"),
-            port=os.getenv("DB_PORT")
-        )
-        self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+class CompanyDatabase(PooledDatabase, CompanyRepository):
+    @read_only
+    def get_company_data(self, since=None):
+        query = """
+        SELECT created_at, sales FROM company
+        WHERE outlet_id = %s AND (%s::timestamptz IS NULL OR created_at >= %s)
+        ORDER BY created_at;
+        """
+        self.execute("company_data", query, (self.outlet_id, since, since))  # Execute query
+        return fetch_as(self.cursor, CompanyRow)  # Empty list if no data
+
+
+class SnapshotDatabase(PooledDatabase, SnapshotRepository):
+    """The outlet's row in dashboard_snapshots (migrations/007_dashboard_snapshots.sql)."""
+
+    def load_snapshot(self):
+        self.execute("load_snapshot", """
+        SELECT generated_at, payload FROM dashboard_snapshots WHERE outlet_id = %s;
+        """, (self.outlet_id,))
+        return self.cursor.fetchone()
+
+    def try_lock_refresh(self):
+        # Transaction-scoped: released by save_snapshot()'s commit or by close()
+        self.cursor.execute(
+            "SELECT pg_try_advisory_xact_lock(hashtext('dashboard_snapshot:' || %s)) AS locked;", (self.outlet_id,))
+        return self.cursor.fetchone()["locked"]
+
+    def save_snapshot(self, generated_at, payload):
+        self.execute("save_snapshot", """
+        INSERT INTO dashboard_snapshots (outlet_id, generated_at, payload) VALUES (%s, %s, %s)
+        ON CONFLICT (outlet_id) DO UPDATE SET generated_at = EXCLUDED.generated_at, payload = EXCLUDED.payload;
+        """, (self.outlet_id, generated_at, dumps(payload).decode()))
+        self.commit()
 
-    def get_company_data(self):
-        query = "SELECT * FROM company;"
-        self.cursor.execute(query)  # Execute query
-        result = self.cursor.fetchall()  # Fetch results
-        return result if result else []  # Return empty list if no data
 
-class UserDatabase:
+class OutletDatabase(PooledDatabase, OutletRepository):
+    def list_outlets(self):
+        query = "SELECT id, name, created_at FROM outlets ORDER BY id;"
+        self.execute("list_outlets", query)
+        # Every shard's migration seeds 'main'; only the shard it routes to hosts it
+        return [outlet for outlet in self.cursor.fetchall() if shards.shard_for(outlet["id"]) == self.shard]
+
+    def add_outlet(self, name):
+        query = """
+        INSERT INTO outlets (id, name) VALUES (%s, %s)
+        ON CONFLICT (id) DO UPDATE SET name = EXCLUDED.name
+        RETURNING id, name, created_at;
+        """
+        self.execute("add_outlet", query, (self.outlet_id, name))
+        outlet = self.cursor.fetchone()
+        self.commit()
+        return outlet
+
+    def has_outlet(self):
+        self.execute("has_outlet", "SELECT 1 FROM outlets WHERE id = %s;", (self.outlet_id,))
+        return self.cursor.fetchone() is not None
+
+class StateDatabase(PooledDatabase):
+    """
+    Key/value state in `app_state`, shared by every worker. Each change is
+    announced with NOTIFY on STATE_CHANNEL in the same transaction, so
+    listeners only ever hear about committed values. Lives on the default
+    shard, whichever outlets it is assigned.
+    """
+
     def __init__(self):
-        self.conn = psycopg2.connect(
-            dbname=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            host=os.getenv("DB_HOST"),
-            port=os.getenv("DB_PORT")
-        )
-        self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+        super().__init__(shard=DEFAULT_SHARD)
+
+    def get_state(self, key, default=None):
+        self.cursor.execute("SELECT value FROM app_state WHERE key = %s;", (key,))
+        row = self.cursor.fetchone()
+        return row["value"] if row else default
+
+    def get_all_state(self):
+        self.cursor.execute("SELECT key, value FROM app_state;")
+        return {row["key"]: row["value"] for row in self.cursor.fetchall()}
+
+    def _notify(self, message):
+        self.cursor.execute("SELECT pg_notify(%s, %s);", (STATE_CHANNEL, json.dumps(message)))
+
+    def set_state(self, key, value):
+        self.cursor.execute("""
+        INSERT INTO app_state (key, value, updated_at) VALUES (%s, %s, NOW())
+        ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = NOW();
+        """, (key, json.dumps(value)))
+        self._notify({"key": key, "value": value})
+        self.commit()
+        return value
+
+    def toggle_flag(self, key):
+        """Atomically flip a boolean flag (missing counts as false) and return the new value."""
+        self.cursor.execute("""
+        INSERT INTO app_state (key, value, updated_at) VALUES (%s, 'true'::jsonb, NOW())
+        ON CONFLICT (key) DO UPDATE
+            SET value = to_jsonb(NOT COALESCE((app_state.value)::boolean, false)),
+                updated_at = NOW()
+        RETURNING value;
+        """, (key,))
+        value = self.cursor.fetchone()["value"]
+        self._notify({"key": key, "value": value})
+        self.commit()
+        return value
 
+    def take_one(self, key):
+        """
+        Atomically decrement value.remaining of a {"remaining": n, ...} entry.
+        Returns the new value, or None when nothing was left to take.
+        """
+        self.cursor.execute("""
+        UPDATE app_state
+        SET value = jsonb_set(value, '{remaining}', to_jsonb((value->>'remaining')::int - 1)),
+            updated_at = NOW()
+        WHERE key = %s AND (value->>'remaining')::int > 0
+        RETURNING value;
+        """, (key,))
+        row = self.cursor.fetchone()
+        if row is None:
+            self.conn.rollback()
+            return None
+        self._notify({"key": key, "value": row["value"]})
+        self.commit()
+        return row["value"]
+
+    def publish(self, key):
+        """Announce an event (e.g. a cache invalidation) without storing anything."""
+        self._notify({"key": key})
+        self.commit()
+
+class UserDatabase(PooledDatabase, UserRepository):
     def create_user(self, name, email, password, role="customer"):
         hashed_password = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
         query = """
-            INSERT INTO employees (id, name, email, password, role, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s) RETURNING id;
+            INSERT INTO employees (id, name, email, password, role, created_at, outlet_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id;
         """
         user_id = str(uuid.uuid4())
         created_at = datetime.utcnow().isoformat()
-        self.cursor.execute(query, (user_id, name, email, hashed_password, role, created_at))
-        self.conn.commit()
+        self.execute("user_create", query, (user_id, name, email, hashed_password, role, created_at, self.outlet_id))
+        self.commit()
         return user_id
 
     def get_user_by_email(self, email):
-        query = "SELECT * FROM employees WHERE email = %s;"
-        self.cursor.execute(query, (email,))
+        query = "SELECT id, name, email, password, role, created_at FROM employees WHERE email = %s AND outlet_id = %s;"
+        self.execute("user_by_email", query, (email, self.outlet_id))
         return self.cursor.fetchone()
 
     def get_user_by_id(self, user_id):
-        query = "SELECT * FROM users WHERE id = %s;"
-        self.cursor.execute(query, (user_id,))
+        query = "SELECT id, name, email, role, created_at FROM users WHERE id = %s;"
+        self.execute("user_by_id", query, (user_id,))
         return self.cursor.fetchone()
     
     def login_user(self, email, password):
@@ -87,36 +570,39 @@ class UserDatabase:
             return {"id": user["id"], "name": user["name"], "email": user["email"], "role": user["role"], "created_at": user["created_at"]}
         return None
 
-    def close(self):
-        self.cursor.close()
-        self.conn.close()
 
-class MenuDatabase:
-    def __init__(self):
-        """Initialize connection to Supabase PostgreSQL using environment variables."""
-        self.conn = psycopg2.connect(
-            dbname=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            host=os.getenv("DB_HOST"),
-            port=os.getenv("DB_PORT")
-        )
-        self.cursor = self.conn.cursor()
+class MenuDatabase(PooledDatabase, MenuRepository):
+    def __init__(self, outlet_id=DEFAULT_OUTLET):
+        """Borrow a connection to the outlet's shard from its pool."""
+        super().__init__(outlet_id, cursor_factory=None)
     
     def get_all_menu_items(self):
         """Fetch all menu items from the database."""
         try:
-            self.cursor.execute("SELECT * FROM menu;")
+            self.execute("menu_all", f"SELECT {MENU_COLUMNS} FROM menu WHERE outlet_id = %s;", (self.outlet_id,))
             return self.cursor.fetchall()
         except Exception as e:
             print("Error fetching menu:", e)
             return []
+
+    def get_menu_for_admin(self):
+        """Fetch all menu items as compact rows in the /menu-for-admin shape."""
+        try:
+            self.execute("menu_all", f"SELECT {MENU_COLUMNS} FROM menu WHERE outlet_id = %s;", (self.outlet_id,))
+            return fetch_as(self.cursor, MenuAdminRow)
+        except Exception as e:
+            print("Error fetching menu:", e)
+            return []
     
     def generate_sku(self, sub_category):
         """Generate SKU based on category and occurrence count."""
         try:
             prefix = sub_category[:3].upper()  # First 3 letters of category
-            self.cursor.execute("SELECT COUNT(*) FROM menu WHERE sub_category = %s;", (sub_category,))
+            self.execute(
+                "menu_count_sub_category",
+                "SELECT COUNT(*) FROM menu WHERE sub_category = %s AND outlet_id = %s;",
+                (sub_category, self.outlet_id),
+            )
             count = self.cursor.fetchone()[0] + 1 
             # Get occurrence count
             sku= f"{prefix}{str(count).zfill(3)}" 
@@ -139,11 +625,11 @@ class MenuDatabase:
 
             # Insert menu item
             query = """
-            INSERT INTO menu (name, category, sub_category, sku, tax_percentage, packaging_charge,description, variations,image_url)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s,%s);
+            INSERT INTO menu (name, category, sub_category, sku, tax_percentage, packaging_charge,description, variations,image_url, outlet_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s,%s, %s);
             """
-            self.cursor.execute(query, (name, category, sub_category, sku, tax_percentage, packaging_charge,description, variations_json,image_url))
-            self.conn.commit()
+            self.execute("menu_insert", query, (name, category, sub_category, sku, tax_percentage, packaging_charge,description, variations_json,image_url, self.outlet_id))
+            self.commit()
             return f"Menu item '{name}' added with SKU: {sku}"
         
         except Exception as e:
@@ -153,11 +639,11 @@ class MenuDatabase:
         
     def delete_menu_item(self, sku):
         """Deletes a menu item by SKU."""
-        self.cursor.execute("DELETE FROM menu WHERE sku = %s RETURNING name", (sku,))
+        self.execute("menu_delete", "DELETE FROM menu WHERE sku = %s AND outlet_id = %s RETURNING name", (sku, self.outlet_id))
         deleted_item = self.cursor.fetchone()
         
         if deleted_item:
-            self.conn.commit()
+            self.commit()
             print(f"🗑️ Deleted item: {deleted_item[0]} (SKU: {sku})")
         else:
             print(f"⚠️ No item found with SKU: {sku}")
@@ -179,12 +665,12 @@ class MenuDatabase:
         if not set_clause:
             return "⚠️ No valid fields to update"
 
-        query = f"UPDATE menu SET {', '.join(set_clause)} WHERE sku = %s"
-        values.append(sku)  # SKU goes at the end for the WHERE condition
+        query = f"UPDATE menu SET {', '.join(set_clause)} WHERE sku = %s AND outlet_id = %s"
+        values.extend([sku, self.outlet_id])  # SKU and outlet go at the end for the WHERE condition
 
         try:
             self.cursor.execute(query, tuple(values))
-            self.conn.commit()
+            self.commit()
             return f"✅ Menu item with SKU {sku} updated successfully"
         except Exception as e:
             self.conn.rollback()
@@ -192,44 +678,37 @@ class MenuDatabase:
             return "Error updating menu item"
     
     
-class MenuDatabase2:
-    def __init__(self):
-        """Initialize connection to Supabase PostgreSQL using environment variables."""
-        self.conn = psycopg2.connect(
-            dbname=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            host=os.getenv("DB_HOST"),
-            port=os.getenv("DB_PORT")
-        )
-        self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+class MenuDatabase2(PooledDatabase, OfferRepository):
+    @read_only
     def get_offer_item(self):
-        """Returns the menu item with the least sales today for promotion"""
+        """
+        Returns the menu item with the least sales today for promotion. Counts
+        come from menu_daily_orders, kept by the outbox worker (outbox.py), so
+        they trail new orders by the queue lag.
+        """
         try:
             query = """
             WITH daily_orders AS (
-                SELECT 
-                    o_items.sku,
-                    SUM(o_items.quantity) AS total_ordered
-                FROM orders,
-                LATERAL jsonb_to_recordset(items) AS o_items(
-                    sku TEXT, 
-                    quantity INT, 
-                    price NUMERIC  -- Add this to match your JSON structure
-                )
-                WHERE created_at >= current_date
-                GROUP BY o_items.sku
+                SELECT sku, total_ordered
+                FROM menu_daily_orders
+                WHERE outlet_id = %s AND day = current_date
             )
             SELECT 
-                m.*,
+                m.name,
+                m.sku,
+                m.category,
+                m.preparation_time,
+                m.image_url,
+                m.variations,
                 COALESCE(d.total_ordered, 0) AS total_ordered
             FROM menu m
             LEFT JOIN daily_orders d ON m.sku = d.sku
+            WHERE m.outlet_id = %s
             ORDER BY total_ordered ASC, m.created_at DESC
             LIMIT 1;
             """
             
-            self.cursor.execute(query)
+            self.execute("offer_item", query, (self.outlet_id, self.outlet_id))
             result = self.cursor.fetchone()
             return result  # Directly return RealDictRow
             
@@ -237,24 +716,10 @@ class MenuDatabase2:
             print("Error finding offer item:", e)
             return None
 
-    def close(self):
-        """Close database connection."""
-        self.cursor.close()
-        self.conn.close()
         
 
 
-class OrderDatabase:
-    def __init__(self):
-        self.conn = psycopg2.connect(
-            dbname=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            host=os.getenv("DB_HOST"),
-            port=os.getenv("DB_PORT")
-        )
-        self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
-
+class OrderDatabase(PooledDatabase, OrderRepository):
     def get_available_waiter(self):
         """
         Get the waiter with no assigned tables or the one with the least tables.
@@ -263,12 +728,12 @@ class OrderDatabase:
         SELECT e.id AS waiter_id, COUNT(a.id) AS table_count
         FROM employees e
         LEFT JOIN allocations a ON e.id = a.waiter_id
-        WHERE e.role = 'waiter'
+        WHERE e.role = 'waiter' AND e.outlet_id = %s
         GROUP BY e.id
         ORDER BY table_count ASC
         LIMIT 1;
         """
-        self.cursor.execute(query)
+        self.cursor.execute(query, (self.outlet_id,))
         waiter = self.cursor.fetchone()
         return waiter["waiter_id"] if waiter else None
 
@@ -282,7 +747,7 @@ class OrderDatabase:
             quantity = item["quantity"]
 
             # Fetch item details from menu
-            self.cursor.execute("SELECT tax_percentage, packaging_charge FROM menu WHERE sku = %s", (sku,))
+            self.cursor.execute("SELECT tax_percentage, packaging_charge FROM menu WHERE sku = %s AND outlet_id = %s", (sku, self.outlet_id))
             menu_item = self.cursor.fetchone()
             print(menu_item)
 
@@ -301,6 +766,36 @@ class OrderDatabase:
     def create_order(self, channel_type, table_numbers, items, settlement_mode):
         """
         Place an order, assign it to the least-burdened waiter (if not Takeaway), and update company sales.
+
+        Runs the whole placement as one `place_order()` call (migrations/011_live_orders.sql),
+        so it costs a single round trip and commits atomically. The allocation,
+        sales total, offer counts and grouping refresh are queued in `outbox`
+        in the same transaction and applied shortly after by outbox.py, and
+        the kitchen backlog event is announced with NOTIFY on commit.
+        """
+        table_no_json = json.dumps({"tables": table_numbers})
+        items_json = json.dumps(items)
+
+        try:
+            self.execute(
+                "place_order",
+                "SELECT order_id, waiter_id, total_price FROM place_order(%s, %s::jsonb, %s::jsonb, %s, %s);",
+                (channel_type, table_no_json, items_json, settlement_mode, self.outlet_id),
+            )
+            placed = self.cursor.fetchone()
+            self.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        if placed["order_id"] is None:
+            return {"error": "No available waiters"}
+        return {"order_id": placed["order_id"], "waiter_id": placed["waiter_id"], "total_price": float(placed["total_price"])}
+
+    def create_order_legacy(self, channel_type, table_numbers, items, settlement_mode):
+        """
+        Original client-side placement (one round trip per step, no locking).
+        Kept only as the baseline for benchmarks/bench_create_order.py.
         """
         # Determine if a waiter is needed
         waiter_id = None if channel_type == "Takeaway" else self.get_available_waiter()
@@ -317,22 +812,22 @@ class OrderDatabase:
 
         # Insert order into `orders` table (waiter_id is NULL for Takeaway)
         order_query = """
-        INSERT INTO orders (created_at, channel_type, table_no, items, price, settlement_mode, waiter_id)
-        VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id;
+        INSERT INTO orders (created_at, channel_type, table_no, items, price, settlement_mode, waiter_id, outlet_id)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING id;
         """
-        self.cursor.execute(order_query, (datetime.now(), channel_type, table_no_json, items_json, total_price, settlement_mode, waiter_id))
+        self.cursor.execute(order_query, (datetime.now(), channel_type, table_no_json, items_json, total_price, settlement_mode, waiter_id, self.outlet_id))
         order_id = self.cursor.fetchone()["id"]
 
         # Assign waiter in `allocations` table (Skip if Takeaway)
         if channel_type != "Takeaway":
             alloc_query = """
-            INSERT INTO allocations (table_no, waiter_id, created_at)
-            VALUES (%s, %s, NOW());
+            INSERT INTO allocations (table_no, waiter_id, created_at, order_id, outlet_id)
+            VALUES (%s, %s, NOW(), %s, %s);
             """
-            self.cursor.execute(alloc_query, (table_no_json, waiter_id))
+            self.cursor.execute(alloc_query, (table_no_json, waiter_id, order_id, self.outlet_id))
 
         # Get the last recorded sales value (handle NULL case)
-        self.cursor.execute("SELECT sales FROM company ORDER BY created_at DESC LIMIT 1;")
+        self.cursor.execute("SELECT sales FROM company WHERE outlet_id = %s ORDER BY created_at DESC LIMIT 1;", (self.outlet_id,))
         last_sales = self.cursor.fetchone()
 
         # Convert Decimal to float and handle NULL case
@@ -343,19 +838,84 @@ class OrderDatabase:
 
         # Insert new sales record
         sales_update_query = """
-        INSERT INTO company (created_at, sales)
-        VALUES (NOW(), %s);
+        INSERT INTO company (created_at, sales, outlet_id)
+        VALUES (NOW(), %s, %s);
         """
-        self.cursor.execute(sales_update_query, (new_sales,))
+        self.cursor.execute(sales_update_query, (new_sales, self.outlet_id))
 
-        self.conn.commit()
+        self.commit()
         return {"order_id": order_id, "waiter_id": waiter_id, "total_price": total_price}
 
 
 
 
     
+    def transition_orders(self, order_ids, status):
+        """
+        Move orders to `status` in one statement, following lifecycle.TRANSITIONS.
+        Orders that can't make the move are left as they are. Served and
+        Cancelled orders release their waiter allocation.
+
+        Returns:
+            Dict: status, updated (order ids), rejected ([{order_id, status}]
+            with the status that blocked the move) and not_found (order ids).
+        """
+        if status not in TRANSITIONS:
+            raise ValueError(f"Unknown order status: {status}")
+        order_ids = sorted(set(order_ids))
+        result = {"status": status, "updated": [], "rejected": [], "not_found": []}
+        if not order_ids:
+            return result
+
+        query = """
+        WITH target AS (
+            SELECT id, created_at, status
+            FROM orders
+            WHERE id = ANY(%s) AND outlet_id = %s
+            FOR UPDATE
+        ), moved AS (
+            UPDATE orders o
+            SET status = %s
+            FROM target t
+            WHERE o.id = t.id AND o.created_at = t.created_at AND t.status = ANY(%s)
+            RETURNING o.id, o.created_at
+        ), released AS (
+            UPDATE allocations a
+            SET released_at = NOW()
+            FROM moved m
+            WHERE %s AND a.order_id = m.id AND a.created_at >= m.created_at AND a.released_at IS NULL
+              AND a.created_at >= (SELECT MIN(created_at) FROM moved)
+        )
+        SELECT t.id AS order_id, t.status AS previous_status, m.id IS NOT NULL AS moved
+        FROM target t
+        LEFT JOIN moved m ON m.id = t.id
+        ORDER BY t.id;
+        """
+        try:
+            self.execute("transition_orders", query, (order_ids, self.outlet_id, status, sources(status), status in RELEASES_WAITER))
+            rows = self.cursor.fetchall()
+            self.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        found = set()
+        for row in rows:
+            found.add(row["order_id"])
+            if row["moved"]:
+                result["updated"].append(row["order_id"])
+            else:
+                result["rejected"].append({"order_id": row["order_id"], "status": row["previous_status"]})
+        result["not_found"] = [order_id for order_id in order_ids if order_id not in found]
+        return result
+
+    @read_only
     def get_allocations(self):
+        """
+        Open waiter allocations, however old, with the items ordered at those
+        tables by RECENT_ORDERS. An allocation is open exactly while its order
+        is live, so they are found through live_orders.
+        """
         query = """
         WITH allocation_data AS (
             SELECT 
@@ -364,18 +924,23 @@ class OrderDatabase:
                 a.table_no, 
                 a.waiter_id, 
                 e.name AS waiter_name
-            FROM allocations a
+            FROM live_orders l
+            JOIN allocations a ON a.order_id = l.order_id AND a.created_at >= l.created_at
             JOIN employees e ON a.waiter_id = e.id
+            WHERE l.outlet_id = %s
+              AND a.released_at IS NULL
+              AND a.created_at >= (SELECT MIN(lo.created_at) FROM live_orders lo WHERE lo.outlet_id = %s)
         ), order_data AS (
             SELECT 
                 o.table_no, 
                 jsonb_array_elements(o.items) AS item
-            FROM orders o
+            FROM ({recent_orders}) o
         ), item_data AS (
             SELECT 
                 m.sku, 
                 m.name AS item_name
             FROM menu m
+            WHERE m.outlet_id = %s
         )
         SELECT 
             ad.allocation_id, 
@@ -391,17 +956,31 @@ class OrderDatabase:
         LEFT JOIN order_data od ON od.table_no @> ad.table_no
         LEFT JOIN item_data i ON (od.item->>'sku') = i.sku
         GROUP BY ad.allocation_id, ad.created_at, ad.table_no, ad.waiter_id, ad.waiter_name;
-        """
+        """.format(recent_orders=RECENT_ORDERS)
 
-        self.cursor.execute(query)
-        allocations = self.cursor.fetchall()
-
-        return allocations
+        params = (self.outlet_id, self.outlet_id, *recent_orders_params(self.outlet_id), self.outlet_id)
+        self.execute("allocations", query, params)
+        return fetch_as(self.cursor, AllocationRow)
 
 
 
     
-    def get_order_management(self):
+    @read_only
+    def get_order_management(self, since=None, until=None):
+        """
+        Orders with their items expanded from the menu. Given since and/or
+        until, the orders created in [since, until); otherwise the orders from
+        the last ACTIVE_ORDER_DAYS plus every live order, however old.
+        """
+        if since is None and until is None:
+            orders = RECENT_ORDERS
+            name, params = "order_management", recent_orders_params(self.outlet_id)
+        else:
+            orders = """
+    SELECT * FROM orders
+    WHERE outlet_id = %s AND created_at >= %s::timestamptz AND created_at < %s::timestamptz
+"""
+            name, params = "order_management_range", (self.outlet_id, since or "-infinity", until or "infinity")
         query = """
 SELECT 
     o.id AS order_id,
@@ -419,19 +998,129 @@ SELECT
     o.price,
     o.settlement_mode,
     o.waiter_id,
-    o.table_no->'tables' AS assigned_tables
-FROM orders o,
-LATERAL jsonb_array_elements(o.items) AS i
-JOIN menu m ON m.sku = i->>'sku'
-GROUP BY o.id, o.created_at, o.channel_type, o.price, o.settlement_mode, o.waiter_id, o.table_no;
+    o.table_no->'tables' AS assigned_tables,
+    o.status
+FROM ({orders}) o
+CROSS JOIN LATERAL jsonb_array_elements(o.items) AS i
+JOIN menu m ON m.sku = i->>'sku' AND m.outlet_id = o.outlet_id
+GROUP BY o.id, o.created_at, o.channel_type, o.price, o.settlement_mode, o.waiter_id, o.table_no, o.status;
 
 
-        """
-        self.cursor.execute(query)
-        result=self.cursor.fetchall()
-        return result
+        """.format(orders=orders)
+        self.execute(name, query, params)
+        return fetch_as(self.cursor, OrderManagementRow)
     
 
+    @read_only
+    def get_settlement_summary(self):
+        """
+        Order count, item sales and commission for Online Delivery and Credit Card settlements.
+
+        Returns:
+            Dict: {"Online Delivery": {...}, "Credit Card": {...}}, each with
+            total_orders, total_sales and commission_amount.
+        """
+        # Get total orders and total sales for Online Delivery
+        online_query = """
+SELECT COUNT(*) AS order_count, 
+       SUM((item->>'price')::numeric * (item->>'quantity')::integer) AS total_sales
+FROM orders, 
+     jsonb_array_elements(items) AS item
+WHERE channel_type = 'Online Delivery'
+  AND outlet_id = %s;
+
+        """
+        self.execute("settlement_online", online_query, (self.outlet_id,))
+        online_result = self.cursor.fetchone()
+        online_orders = online_result["order_count"] or 0
+        online_sales = float(online_result["total_sales"] or 0)
+        online_commission = online_sales * 0.10  # 10% commission
+
+        # Get total orders and total sales for Credit Card payments
+        credit_card_query = """
+SELECT COUNT(*) AS order_count, 
+       SUM((item->>'price')::numeric * (item->>'quantity')::integer) AS total_sales
+FROM orders, 
+     jsonb_array_elements(items) AS item
+WHERE settlement_mode = 'Credit Card'
+  AND outlet_id = %s;
+
+        """
+        self.execute("settlement_credit_card", credit_card_query, (self.outlet_id,))
+        credit_result = self.cursor.fetchone()
+        credit_orders = credit_result["order_count"] or 0
+        credit_sales = float(credit_result["total_sales"] or 0)
+        credit_commission = credit_sales * 0.05  # 5% commission
+
+        return {
+            "Online Delivery": {
+                "total_orders": online_orders,
+                "total_sales": online_sales,
+                "commission_amount": online_commission
+            },
+            "Credit Card": {
+                "total_orders": credit_orders,
+                "total_sales": credit_sales,
+                "commission_amount": credit_commission
+            }
+        }
+
+    @read_only
+    def get_order_counts(self):
+        """Order totals broken down by status and by channel."""
+        self.execute("order_counts", """
+        SELECT status, channel_type, COUNT(*) AS order_count
+        FROM orders
+        WHERE outlet_id = %s
+        GROUP BY status, channel_type;
+        """, (self.outlet_id,))
+        counts = {"total": 0, "by_status": {}, "by_channel": {}}
+        for row in self.cursor.fetchall():
+            counts["total"] += row["order_count"]
+            counts["by_status"][row["status"]] = counts["by_status"].get(row["status"], 0) + row["order_count"]
+            counts["by_channel"][row["channel_type"]] = counts["by_channel"].get(row["channel_type"], 0) + row["order_count"]
+        return counts
+
+    def get_kitchen_backlog(self):
+        """
+        One row per order line still taking kitchen time (lifecycle.KITCHEN_STATUSES),
+        with the menu's station (category) and preparation_time, oldest orders
+        first. Input for the kitchen scheduler.
+        """
+        query = """
+        SELECT
+            o.id AS order_id,
+            o.created_at,
+            o.channel_type,
+            i->>'sku' AS sku,
+            (i->>'quantity')::int AS quantity,
+            m.name,
+            m.category AS station,
+            m.preparation_time
+        FROM ({live_orders}) o
+        CROSS JOIN LATERAL jsonb_array_elements(o.items) AS i
+        JOIN menu m ON m.sku = i->>'sku' AND m.outlet_id = o.outlet_id
+        ORDER BY o.created_at, o.id;
+        """.format(live_orders=LIVE_ORDERS)
+        self.execute("kitchen_backlog", query, live_orders_params(self.outlet_id, KITCHEN_STATUSES))
+        return fetch_as(self.cursor, KitchenBacklogRow)
+
+    def get_order_groups(self):
+        """The last stored LLM grouping: input_hash, groups and refreshed_at, or None."""
+        self.execute("get_order_groups", """
+        SELECT input_hash, groups, refreshed_at FROM order_groups WHERE outlet_id = %s;
+        """, (self.outlet_id,))
+        return self.cursor.fetchone()
+
+    def save_order_groups(self, input_hash, groups):
+        self.execute("save_order_groups", """
+        INSERT INTO order_groups (outlet_id, input_hash, groups, refreshed_at)
+        VALUES (%s, %s, %s, NOW())
+        ON CONFLICT (outlet_id) DO UPDATE
+            SET input_hash = EXCLUDED.input_hash, groups = EXCLUDED.groups, refreshed_at = NOW();
+        """, (self.outlet_id, input_hash, json.dumps(groups)))
+        self.commit()
+
     def get_pending_orders_with_details(self):
         """
         Retrieve pending orders along with SKU details (name and description).
@@ -446,8 +1135,7 @@ GROUP BY o.id, o.created_at, o.channel_type, o.price, o.settlement_mode, o.waite
                 SELECT
                     o.id AS order_id,
                     jsonb_array_elements(o.items::jsonb)->>'sku' AS sku
-                FROM orders o
-                WHERE o.status = 'Pending'
+                FROM ({live_orders}) o
             )
             SELECT
                 oi.order_id,
@@ -455,9 +1143,9 @@ GROUP BY o.id, o.created_at, o.channel_type, o.price, o.settlement_mode, o.waite
                 m.name AS sku_name,
                 m.description AS sku_description
             FROM order_items oi
-            JOIN menu m ON oi.sku = m.sku;
-            """
-            self.cursor.execute(query)
+            JOIN menu m ON oi.sku = m.sku AND m.outlet_id = %s;
+            """.format(live_orders=LIVE_ORDERS)
+            self.execute("pending_orders", query, (*live_orders_params(self.outlet_id, (PENDING,)), self.outlet_id))
             rows = self.cursor.fetchall()
 
             print("Raw rows from database:", rows)  # Debugging log
@@ -481,7 +1169,141 @@ GROUP BY o.id, o.created_at, o.channel_type, o.price, o.settlement_mode, o.waite
             print("Error retrieving pending orders:", e)
             return []
     
-    def close(self):
-        self.cursor.close()
-        self.conn.close()
 
+
+class OutboxDatabase(PooledDatabase):
+    """
+    One shard's `outbox` (migrations/006_outbox.sql). claim() locks a batch
+    with FOR UPDATE SKIP LOCKED, so workers on every API process can drain
+    the same shard without taking each other's rows. The apply_* methods
+    and delete() run in the claim's transaction, so effects and their
+    removal from the queue commit together.
+
+    Grouping rows are leased instead (claim_leased(), migrations/009_outbox_claims.sql):
+    the claim commits at once, so no lock is held while the LLM runs.
+    """
+
+    def __init__(self, shard=DEFAULT_SHARD):
+        super().__init__(shard=shard)
+
+    def claim(self, kinds, limit):
+        self.execute("outbox_claim", """
+        SELECT id, outlet_id, kind, payload, attempts
+        FROM outbox
+        WHERE failed_at IS NULL AND available_at <= NOW() AND kind = ANY(%s)
+        ORDER BY id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED;
+        """, (list(kinds), limit))
+        return self.cursor.fetchall()
+
+    def claim_leased(self, kind, limit, lease_seconds):
+        """
+        Mark up to `limit` due rows of `kind` claimed and commit. Rows whose
+        claim is older than lease_seconds are taken again.
+        """
+        self.execute("outbox_claim_leased", """
+        UPDATE outbox q
+        SET claimed_at = NOW()
+        FROM (
+            SELECT id FROM outbox
+            WHERE failed_at IS NULL AND available_at <= NOW() AND kind = %s
+              AND (claimed_at IS NULL OR claimed_at < NOW() - make_interval(secs => %s))
+            ORDER BY id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        ) due
+        WHERE q.id = due.id
+        RETURNING q.id, q.outlet_id, q.kind, q.payload, q.attempts;
+        """, (kind, lease_seconds, limit))
+        jobs = self.cursor.fetchall()
+        self.commit()
+        return jobs
+
+    def savepoint(self):
+        self.cursor.execute("SAVEPOINT outbox_effect;")
+
+    def release_savepoint(self):
+        self.cursor.execute("RELEASE SAVEPOINT outbox_effect;")
+
+    def rollback_to_savepoint(self):
+        self.cursor.execute("ROLLBACK TO SAVEPOINT outbox_effect;")
+
+    def apply_sales(self, jobs):
+        """Add the batch's order totals to each outlet's running total, as one `company` row per outlet."""
+        totals = {}
+        for job in jobs:
+            totals[job["outlet_id"]] = totals.get(job["outlet_id"], 0) + float(job["payload"]["total"])
+        for outlet_id, total in sorted(totals.items()):
+            # Serializes outbox workers per outlet, so totals from concurrent batches chain up
+            self.cursor.execute("SELECT pg_advisory_xact_lock(hashtext('outbox:sales:' || %s));", (outlet_id,))
+            self.execute("outbox_sales", """
+            INSERT INTO company (created_at, sales, outlet_id)
+            SELECT clock_timestamp(), COALESCE((
+                SELECT c.sales FROM company c WHERE c.outlet_id = %s ORDER BY c.created_at DESC LIMIT 1
+            ), 0) + %s, %s;
+            """, (outlet_id, total, outlet_id))
+
+    def apply_allocations(self, jobs):
+        """
+        Insert each order's waiter allocation, already released if the order
+        was Served or Cancelled before the job ran. Orders that already have
+        one are skipped.
+        """
+        self.execute("outbox_allocations", """
+        INSERT INTO allocations (table_no, waiter_id, created_at, order_id, outlet_id, released_at)
+        SELECT j.table_no, j.waiter_id, j.created_at, o.id, o.outlet_id,
+               CASE WHEN o.status = ANY(%s) THEN NOW() END
+        FROM jsonb_to_recordset(%s::jsonb) AS j(order_id INT, waiter_id TEXT, table_no JSONB, created_at TIMESTAMPTZ)
+        JOIN orders o ON o.id = j.order_id AND o.created_at = j.created_at
+        WHERE NOT EXISTS (
+            SELECT 1 FROM allocations a WHERE a.order_id = o.id AND a.created_at >= j.created_at
+        );
+        """, (list(RELEASES_WAITER), json.dumps([job["payload"] for job in jobs])))
+
+    def apply_offer_counts(self, jobs):
+        """Add the batch's ordered quantities to menu_daily_orders, per outlet, day and SKU."""
+        lines = [
+            {"outlet_id": job["outlet_id"], "day": job["payload"]["day"],
+             "sku": item.get("sku"), "quantity": item.get("quantity")}
+            for job in jobs for item in job["payload"]["items"]
+        ]
+        self.execute("outbox_offer_counts", """
+        INSERT INTO menu_daily_orders AS d (outlet_id, day, sku, total_ordered)
+        SELECT outlet_id, day, sku, SUM(quantity)
+        FROM jsonb_to_recordset(%s::jsonb) AS l(outlet_id TEXT, day DATE, sku TEXT, quantity INT)
+        WHERE sku IS NOT NULL
+        GROUP BY outlet_id, day, sku
+        ON CONFLICT (outlet_id, day, sku) DO UPDATE SET total_ordered = d.total_ordered + EXCLUDED.total_ordered;
+        """, (json.dumps(lines),))
+
+    def delete(self, ids):
+        self.execute("outbox_delete", "DELETE FROM outbox WHERE id = ANY(%s);", (list(ids),))
+
+    def retry(self, ids, error, max_attempts, base_seconds):
+        """Count a failed attempt: retry after base_seconds * 2^attempts, or park after max_attempts."""
+        self.execute("outbox_retry", """
+        UPDATE outbox
+        SET attempts = attempts + 1,
+            last_error = %s,
+            available_at = NOW() + make_interval(secs => %s * power(2, attempts)),
+            failed_at = CASE WHEN attempts + 1 >= %s THEN NOW() END,
+            claimed_at = NULL
+        WHERE id = ANY(%s);
+        """, (error[:1000], base_seconds, max_attempts, list(ids)))
+
+    def lag(self):
+        """Per kind: queued rows, age of the oldest one in seconds, and parked (failed) rows."""
+        self.execute("outbox_lag", """
+        SELECT kind,
+               COUNT(*) FILTER (WHERE failed_at IS NULL) AS pending,
+               COALESCE(EXTRACT(EPOCH FROM NOW() - MIN(created_at) FILTER (WHERE failed_at IS NULL)), 0)::float
+                   AS oldest_seconds,
+               COUNT(*) FILTER (WHERE failed_at IS NOT NULL) AS failed
+        FROM outbox
+        GROUP BY kind;
+        """)
+        rows = self.cursor.fetchall()
+        self.conn.rollback()
+        return {row["kind"]: {"pending": row["pending"], "oldest_seconds": round(row["oldest_seconds"], 3),
+                              "failed": row["failed"]} for row in rows}
@@ -0,0 +1,45 @@
+"""
+LLM grouping of an outlet's pending orders (ai_analyser.club_orders), cached
+per outlet in order_groups.
+
+The cache is keyed by a hash of the grouping input, so it is only served
+while the pending orders (and their SKUs) are exactly the ones it was
+computed for. The outbox worker refreshes it after orders are placed, and
+/group_orders recomputes on a miss.
+"""
+import hashlib
+import json
+
+from ai_analyser import club_orders
+from backends import OrderDatabase
+
+
+def pending_order_data(db):
+    """The pending orders in the shape club_orders expects, one entry per order."""
+    order_dict = {}
+    for item in db.get_pending_orders_with_details():
+        details = order_dict.setdefault(item["order_id"], {"skus": [], "sku_names": [], "sku_descriptions": []})
+        details["skus"].append(item["sku"])
+        details["sku_names"].append(item["sku_name"])
+        details["sku_descriptions"].append(item["sku_description"])
+    return [{"order_id": order_id, **details} for order_id, details in order_dict.items()]
+
+
+def input_hash(order_data):
+    return hashlib.sha256(json.dumps(order_data, sort_keys=True).encode()).hexdigest()
+
+
+def grouped_orders(outlet_id):
+    """The outlet's grouping, from the cache when its input is unchanged, else freshly computed and stored."""
+    db = OrderDatabase(outlet_id)
+    try:
+        order_data = pending_order_data(db)
+        key = input_hash(order_data)
+        cached = db.get_order_groups()
+        if cached and cached["input_hash"] == key:
+            return cached["groups"]
+        groups = club_orders(order_data)
+        db.save_order_groups(key, groups)
+        return groups
+    finally:
+        db.close()
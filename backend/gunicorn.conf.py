@@ -0,0 +1,30 @@
+"""
+Multi-worker run profile. From backend/:
+
+    python migrate.py                 # once per deploy: creates app_state etc.
+    gunicorn app:app -c gunicorn.conf.py
+
+Every worker is a separate process with its own connection pool, kitchen
+schedule and dashboard snapshot. Anything that must agree across workers
+(the company_load override, kitchen invalidations, the replica's
+read-your-writes window) goes through
+shared_state.py, which relays changes between workers with Postgres
+LISTEN/NOTIFY. Keep WEB_CONCURRENCY * (DB_POOL_MAX + 1 listener) under the
+database's connection limit. On Supabase, use the session pooler or a direct
+connection, because the transaction pooler drops LISTEN.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+# Routes are mostly sync and run in each worker's threadpool, so one
+# process per core is enough to use the whole machine
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+# Workers hold a warm pool; recycle them slowly to bound memory growth
+max_requests = int(os.getenv("MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "500"))
+# Let in-flight orders finish during rolling restarts
+graceful_timeout = 30
+timeout = 60
+keepalive = 5
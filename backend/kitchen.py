@@ -0,0 +1,253 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from backends import OrderDatabase
+from database import DEFAULT_OUTLET
+from shared_state import shared_state
+
+# "spt" (shortest preparation time first) or "edd" (earliest due date first)
+POLICY = os.getenv("KITCHEN_POLICY", "spt")
+# Units of one SKU a station cooks together in a single batch
+BATCH_CAPACITY = int(os.getenv("KITCHEN_BATCH_CAPACITY", "6"))
+# Priority credit per minute waited, so long dishes can't starve behind short ones
+AGING_PER_MINUTE = float(os.getenv("KITCHEN_AGING_PER_MINUTE", "0.5"))
+# Target slack on top of preparation time when computing EDD due dates
+DUE_SLACK_MINUTES = float(os.getenv("KITCHEN_DUE_SLACK_MINUTES", "10"))
+# How long a schedule is served from memory before the backlog is re-read
+REFRESH_SECONDS = float(os.getenv("KITCHEN_REFRESH_SECONDS", "15"))
+# Shortest gap between the background rebuilds peek() starts, so a burst of
+# orders (each one invalidating the schedule) costs one backlog read, not one each
+MIN_REBUILD_SECONDS = float(os.getenv("KITCHEN_MIN_REBUILD_SECONDS", "2"))
+DEFAULT_PREP_MINUTES = 10
+DEFAULT_STATION = "General"
+# Shared-state event published whenever an outlet's pending backlog changes
+BACKLOG_CHANGED = "kitchen_backlog"
+
+
+@dataclass(slots=True)
+class Batch:
+    """Identical SKUs from one or more orders, cooked together at one station."""
+    station: str
+    sku: str
+    name: str
+    preparation_time: int
+    quantity: int
+    order_ids: List[int]
+    oldest_at: datetime
+    start_minute: float = 0.0
+    finish_minute: float = 0.0
+
+
+@dataclass(slots=True)
+class OrderEta:
+    order_id: int
+    channel_type: str
+    eta_minutes: float
+    ready_at: datetime
+
+
+@dataclass(slots=True)
+class KitchenSchedule:
+    generated_at: datetime
+    policy: str
+    stations: Dict[str, List[Batch]] = field(default_factory=dict)
+    orders: List[OrderEta] = field(default_factory=list)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Naive timestamps are treated as server-local time
+    return value.astimezone(timezone.utc)
+
+
+def build_batches(rows) -> List[Batch]:
+    """
+    Group pending order lines (KitchenBacklogRow, oldest first) into batches of
+    at most BATCH_CAPACITY units per station and SKU.
+    """
+    open_batches: Dict[tuple, Batch] = {}
+    batches: List[Batch] = []
+    for row in rows:
+        station = row.station or DEFAULT_STATION
+        key = (station, row.sku)
+        remaining = row.quantity or 0
+        while remaining > 0:
+            batch = open_batches.get(key)
+            if batch is None or batch.quantity >= BATCH_CAPACITY:
+                batch = Batch(
+                    station=station,
+                    sku=row.sku,
+                    name=row.name,
+                    preparation_time=row.preparation_time or DEFAULT_PREP_MINUTES,
+                    quantity=0,
+                    order_ids=[],
+                    oldest_at=_as_utc(row.created_at),
+                )
+                open_batches[key] = batch
+                batches.append(batch)
+            taken = min(remaining, BATCH_CAPACITY - batch.quantity)
+            batch.quantity += taken
+            if row.order_id not in batch.order_ids:
+                batch.order_ids.append(row.order_id)
+            remaining -= taken
+    return batches
+
+
+def _priority(batch: Batch, now: datetime, policy: str) -> float:
+    waited = (now - batch.oldest_at).total_seconds() / 60
+    if policy == "edd":
+        # Due date relative to now: placed `waited` minutes ago, due after prep + slack
+        key = batch.preparation_time + DUE_SLACK_MINUTES - waited
+    else:
+        key = batch.preparation_time
+    return key - AGING_PER_MINUTE * waited
+
+
+def build_schedule(rows, now: datetime, policy: str = POLICY) -> KitchenSchedule:
+    """
+    Turn the pending backlog into per-station work queues and per-order ETAs.
+
+    Stations work in parallel and each cooks its batches one after another,
+    so an order is ready when the last batch holding one of its items finishes.
+    """
+    schedule = KitchenSchedule(generated_at=now, policy=policy)
+    channels = {row.order_id: row.channel_type for row in rows}
+
+    for batch in build_batches(rows):
+        schedule.stations.setdefault(batch.station, []).append(batch)
+
+    finish_by_order: Dict[int, float] = {}
+    for station, queue in schedule.stations.items():
+        queue.sort(key=lambda batch: (_priority(batch, now, policy), batch.oldest_at))
+        clock = 0.0
+        for batch in queue:
+            batch.start_minute = clock
+            clock += batch.preparation_time
+            batch.finish_minute = clock
+            for order_id in batch.order_ids:
+                finish_by_order[order_id] = max(finish_by_order.get(order_id, 0.0), clock)
+
+    schedule.orders = sorted(
+        (
+            OrderEta(
+                order_id=order_id,
+                channel_type=channels[order_id],
+                eta_minutes=finish,
+                ready_at=now + timedelta(minutes=finish),
+            )
+            for order_id, finish in finish_by_order.items()
+        ),
+        key=lambda eta: (eta.eta_minutes, eta.order_id),
+    )
+    return schedule
+
+
+def backlog_event(outlet_id):
+    """The BACKLOG_CHANGED event for one outlet."""
+    return f"{BACKLOG_CHANGED}:{outlet_id}"
+
+
+def _load_backlog(outlet_id):
+    db = OrderDatabase(outlet_id)
+    try:
+        return db.get_kitchen_backlog()
+    finally:
+        db.close()
+
+
+class KitchenScheduler:
+    """
+    Serves one outlet's kitchen schedule from memory. The backlog is re-read at
+    most every `refresh_seconds`, or sooner after `invalidate()`, which runs in
+    every worker when any of them publishes the outlet's backlog_event().
+    Concurrent callers share a single rebuild; other outlets' schedulers have
+    their own locks, so a slow rebuild at one outlet never holds up another.
+
+    get() waits for a rebuild when the schedule is stale. peek() never does:
+    it is for the order hot path (admission control), which reads whatever
+    schedule is cached and leaves the rebuild to a background thread.
+    """
+
+    def __init__(self, outlet_id=DEFAULT_OUTLET, load_backlog=_load_backlog,
+                 refresh_seconds=REFRESH_SECONDS, policy=POLICY, min_rebuild_seconds=MIN_REBUILD_SECONDS):
+        self.outlet_id = outlet_id
+        self._load_backlog = load_backlog
+        self.refresh_seconds = refresh_seconds
+        self.policy = policy
+        self.min_rebuild_seconds = min_rebuild_seconds
+        self._lock = threading.Lock()
+        self._schedule = None
+        self._built_at = 0.0
+        self._dirty = True
+        self._refreshing = False
+        self._refresh_started_at = float("-inf")
+
+    def _is_fresh(self):
+        return (
+            self._schedule is not None
+            and not self._dirty
+            and time.monotonic() - self._built_at < self.refresh_seconds
+        )
+
+    def invalidate(self):
+        self._dirty = True
+
+    def _rebuild_if_stale(self):
+        with self._lock:
+            if not self._is_fresh():
+                self._dirty = False
+                try:
+                    rows = self._load_backlog(self.outlet_id)
+                except Exception:
+                    self._dirty = True
+                    raise
+                self._schedule = build_schedule(rows, datetime.now(timezone.utc), self.policy)
+                self._built_at = time.monotonic()
+
+    def get(self) -> KitchenSchedule:
+        if not self._is_fresh():
+            self._rebuild_if_stale()
+        return self._schedule
+
+    def peek(self) -> Optional[KitchenSchedule]:
+        """
+        The cached schedule, possibly stale, without waiting (None until the
+        first build). A stale one is rebuilt in the background, at most once
+        every min_rebuild_seconds.
+        """
+        if not self._is_fresh() and not self._refreshing \
+                and time.monotonic() - self._refresh_started_at >= self.min_rebuild_seconds:
+            self._refreshing = True
+            self._refresh_started_at = time.monotonic()
+            _refresher.submit(self._refresh_in_background)
+        return self._schedule
+
+    def _refresh_in_background(self):
+        try:
+            self._rebuild_if_stale()
+        except Exception as e:
+            print(f"Error refreshing kitchen schedule for {self.outlet_id}:", e)
+        finally:
+            self._refreshing = False
+
+
+_refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="kitchen-refresh")
+_schedulers: Dict[str, KitchenScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def scheduler_for(outlet_id) -> KitchenScheduler:
+    """The outlet's scheduler, created (and subscribed to its backlog_event) on first use."""
+    scheduler = _schedulers.get(outlet_id)
+    if scheduler is None:
+        with _schedulers_lock:
+            scheduler = _schedulers.get(outlet_id)
+            if scheduler is None:
+                scheduler = KitchenScheduler(outlet_id)
+                shared_state.subscribe(backlog_event(outlet_id), lambda _: scheduler.invalidate())
+                _schedulers[outlet_id] = scheduler
+    return scheduler
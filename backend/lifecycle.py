@@ -0,0 +1,33 @@
+"""
+Order lifecycle: Pending -> Preparing -> Ready -> Served -> Settled, with
+Cancelled reachable from any status before Served.
+
+Orders in ACTIVE_STATUSES are covered by the orders_active_idx partial index
+(migrations/004_order_lifecycle.sql). Moving an order into RELEASES_WAITER
+frees its waiter allocation for balancing.
+"""
+PENDING = "Pending"
+PREPARING = "Preparing"
+READY = "Ready"
+SERVED = "Served"
+SETTLED = "Settled"
+CANCELLED = "Cancelled"
+
+TRANSITIONS = {
+    PENDING: (PREPARING, CANCELLED),
+    PREPARING: (READY, CANCELLED),
+    READY: (SERVED, CANCELLED),
+    SERVED: (SETTLED,),
+    SETTLED: (),
+    CANCELLED: (),
+}
+STATUSES = tuple(TRANSITIONS)
+ACTIVE_STATUSES = (PENDING, PREPARING, READY)
+# Orders still taking kitchen time (input for the kitchen scheduler)
+KITCHEN_STATUSES = (PENDING, PREPARING)
+RELEASES_WAITER = (SERVED, CANCELLED)
+
+
+def sources(status):
+    """Statuses an order may move to `status` from."""
+    return [current for current, targets in TRANSITIONS.items() if status in targets]
@@ -0,0 +1,589 @@
+"""
+In-memory backend for the *Database classes (the interfaces are in repository.py).
+
+Each outlet's data lives in its own MemoryStore of plain dicts (`stores`).
+Each dict is indexed for the lookup the routes make:
+- menu items by SKU, plus item counts per sub-category (for SKU generation)
+- users by id and by email, plus the waiters in hiring order
+- orders by id, plus an index of live orders (lifecycle.ACTIVE_STATUSES)
+- allocations in time order, plus the open allocation of each order (what
+  waiter balancing counts)
+- quantities sold per SKU per day (for offer selection)
+
+Results match the SQL in database.py, including the ACTIVE_ORDER_DAYS window
+of order management.
+
+Nothing is persisted and every process has its own store, so run a single
+worker. Select this backend with DB_BACKEND=memory. MEMORY_DB_SEED=<file.json>
+loads {"menu": [...], "employees": [...]} into the default outlet at import,
+and {"outlets": {"<id>": {"name": ..., "menu": [...], "employees": [...]}}}
+into others. Menu entries take the add_menu_item fields plus optional sku and
+preparation_time. Employees take name, email, password and role.
+"""
+import itertools
+import json
+import os
+import threading
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from decimal import ROUND_HALF_UP, Decimal
+
+import bcrypt
+
+from database import ACTIVE_ORDER_DAYS, DEFAULT_OUTLET
+from lifecycle import ACTIVE_STATUSES, KITCHEN_STATUSES, PENDING, RELEASES_WAITER, TRANSITIONS
+from profiling import trace_methods
+from models.rows import AllocationRow, CompanyRow, KitchenBacklogRow, MenuAdminRow, OrderManagementRow
+from repository import (
+    CompanyRepository, MenuRepository, OfferRepository, OrderRepository, OutletRepository, SnapshotRepository,
+    UserRepository,
+)
+
+SEED_FILE = os.getenv("MEMORY_DB_SEED")
+
+# Same order as database.MENU_COLUMNS
+MENU_FIELDS = (
+    "id", "name", "category", "sub_category", "tax_percentage", "packaging_charge", "sku",
+    "variations", "created_at", "description", "image_url", "preparation_time",
+)
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value or 0))
+
+
+def _jsonb_contains(container, contained):
+    """Postgres `container @> contained` for JSON-shaped Python values."""
+    if isinstance(contained, dict):
+        return isinstance(container, dict) and all(
+            key in container and _jsonb_contains(container[key], value) for key, value in contained.items()
+        )
+    if isinstance(contained, list):
+        return isinstance(container, list) and all(
+            any(_jsonb_contains(candidate, value) for candidate in container) for value in contained
+        )
+    return container == contained
+
+
+class MemoryStore:
+    """The tables, with their indexes. Every access goes through `lock`."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.menu = {}  # sku -> item
+        self.items_per_sub_category = Counter()
+        self.users = {}  # id -> user
+        self.user_ids_by_email = {}
+        self.waiter_ids = []
+        self.orders = {}  # id -> order, in id order
+        self.active = {}  # id -> order in an active status
+        self.allocations = []  # oldest first
+        self.open_allocations = {}  # order id -> its unreleased allocation
+        self.sold_by_day = defaultdict(Counter)  # UTC date -> sku -> quantity
+        self.company = []  # CompanyRow, oldest first
+        self.order_groups = None  # last stored grouping (grouping.py)
+        self.dashboard_snapshot = None  # generated_at and payload (snapshot.py)
+        self._menu_ids = itertools.count(1)
+        self._order_ids = itertools.count(1)
+        self._allocation_ids = itertools.count(1)
+
+    def next_sku(self, sub_category):
+        return f"{sub_category[:3].upper()}{str(self.items_per_sub_category[sub_category] + 1).zfill(3)}"
+
+    def insert_menu_item(self, name, category, sub_category, tax_percentage, packaging_charge,
+                         description, variations, image_url, sku=None, preparation_time=None):
+        with self.lock:
+            item = {
+                "id": next(self._menu_ids),
+                "name": name,
+                "category": category,
+                "sub_category": sub_category,
+                "tax_percentage": _decimal(tax_percentage),
+                "packaging_charge": _decimal(packaging_charge),
+                "sku": sku or self.next_sku(sub_category),
+                "variations": dict(variations or {}),
+                "created_at": _now(),
+                "description": description,
+                "image_url": image_url,
+                "preparation_time": preparation_time,
+            }
+            self.menu[item["sku"]] = item
+            self.items_per_sub_category[sub_category] += 1
+            return item
+
+    def insert_user(self, name, email, password, role="customer"):
+        user = {
+            "id": str(uuid.uuid4()),
+            "name": name,
+            "email": email,
+            "password": bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8"),
+            "role": role,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        with self.lock:
+            self.users[user["id"]] = user
+            self.user_ids_by_email[email] = user["id"]
+            if role == "waiter":
+                self.waiter_ids.append(user["id"])
+        return user
+
+    def least_loaded_waiter(self):
+        """The waiter with the fewest open allocations, however old (first hired on ties)."""
+        if not self.waiter_ids:
+            return None
+        load = dict.fromkeys(self.waiter_ids, 0)
+        for allocation in self.open_allocations.values():
+            if allocation["waiter_id"] in load:
+                load[allocation["waiter_id"]] += 1
+        return min(self.waiter_ids, key=load.__getitem__)
+
+    def recent_orders(self, since=None, until=None):
+        """
+        Orders created in [since, until) when either is given, otherwise the
+        orders from the last ACTIVE_ORDER_DAYS plus every live order, like the
+        created_at predicates in database.py.
+        """
+        if since is None and until is None:
+            recent = _now() - timedelta(days=ACTIVE_ORDER_DAYS)
+            return [order for order in self.orders.values() if order["created_at"] >= recent or order["id"] in self.active]
+        return [
+            order for order in self.orders.values()
+            if (since is None or order["created_at"] >= since) and (until is None or order["created_at"] < until)
+        ]
+
+    def load_seed(self, seed):
+        for item in seed.get("menu", []):
+            self.insert_menu_item(**item)
+        for employee in seed.get("employees", []):
+            self.insert_user(**employee)
+
+
+stores = {}  # outlet id -> its MemoryStore
+outlet_names = {}  # outlet id -> display name
+_stores_lock = threading.Lock()
+
+
+def open_store(outlet_id, name=None):
+    """The outlet's store, created (registering the outlet) if it has none yet."""
+    with _stores_lock:
+        if outlet_id not in stores:
+            stores[outlet_id] = MemoryStore()
+            outlet_names[outlet_id] = name or outlet_id
+        return stores[outlet_id]
+
+
+def store_for(outlet_id):
+    """The store of a registered outlet. LookupError for any other outlet."""
+    with _stores_lock:
+        if outlet_id not in stores:
+            raise LookupError(f"Unknown outlet: {outlet_id!r}")
+        return stores[outlet_id]
+
+
+default_store = open_store(DEFAULT_OUTLET, "Main outlet")
+if SEED_FILE:
+    with open(SEED_FILE) as seed_file:
+        seed = json.load(seed_file)
+    default_store.load_seed(seed)
+    for outlet_id, outlet_seed in seed.get("outlets", {}).items():
+        open_store(outlet_id, outlet_seed.get("name")).load_seed(outlet_seed)
+
+
+class MemoryDatabase:
+    """Base for the in-memory repositories: one outlet's store, or the `store` given."""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        trace_methods(cls)
+
+    def __init__(self, outlet_id=DEFAULT_OUTLET, store=None, shard=None):
+        # shard is accepted for parity with PooledDatabase; every store is in-process
+        self.outlet_id = outlet_id
+        self.store = store if store is not None else store_for(outlet_id)
+
+    def close(self):
+        pass
+
+
+class OutletDatabase(MemoryDatabase, OutletRepository):
+    def __init__(self, outlet_id=DEFAULT_OUTLET, store=None, shard=None):
+        # Acts on the outlet registry, so it works before the outlet has a store
+        self.outlet_id = outlet_id
+        self.store = store
+
+    def list_outlets(self):
+        with _stores_lock:
+            return [{"id": outlet_id, "name": name} for outlet_id, name in sorted(outlet_names.items())]
+
+    def add_outlet(self, name):
+        open_store(self.outlet_id, name)
+        with _stores_lock:
+            outlet_names[self.outlet_id] = name
+        return {"id": self.outlet_id, "name": name}
+
+    def has_outlet(self):
+        with _stores_lock:
+            return self.outlet_id in stores
+
+
+class CompanyDatabase(MemoryDatabase, CompanyRepository):
+    def get_company_data(self, since=None):
+        with self.store.lock:
+            return [row for row in self.store.company if since is None or row.created_at >= since]
+
+
+class SnapshotDatabase(MemoryDatabase, SnapshotRepository):
+    def load_snapshot(self):
+        with self.store.lock:
+            return self.store.dashboard_snapshot
+
+    def try_lock_refresh(self):
+        return True  # one process, and SnapshotService already collapses its own refreshes
+
+    def save_snapshot(self, generated_at, payload):
+        with self.store.lock:
+            self.store.dashboard_snapshot = {"generated_at": generated_at, "payload": payload}
+
+
+class UserDatabase(MemoryDatabase, UserRepository):
+    def create_user(self, name, email, password, role="customer"):
+        return self.store.insert_user(name, email, password, role)["id"]
+
+    def get_user_by_email(self, email):
+        with self.store.lock:
+            user = self.store.users.get(self.store.user_ids_by_email.get(email))
+            return dict(user) if user else None
+
+    def get_user_by_id(self, user_id):
+        with self.store.lock:
+            user = self.store.users.get(user_id)
+        if not user:
+            return None
+        return {key: user[key] for key in ("id", "name", "email", "role", "created_at")}
+
+    def login_user(self, email, password):
+        user = self.get_user_by_email(email)
+        if user and bcrypt.checkpw(password.encode("utf-8"), user["password"].encode("utf-8")):
+            return {"id": user["id"], "name": user["name"], "email": user["email"], "role": user["role"], "created_at": user["created_at"]}
+        return None
+
+
+class MenuDatabase(MemoryDatabase, MenuRepository):
+    def get_all_menu_items(self):
+        with self.store.lock:
+            return [tuple(item[field] for field in MENU_FIELDS) for item in self.store.menu.values()]
+
+    def get_menu_for_admin(self):
+        return [MenuAdminRow(*row) for row in self.get_all_menu_items()]
+
+    def generate_sku(self, sub_category):
+        with self.store.lock:
+            return self.store.next_sku(sub_category)
+
+    def add_menu_item(self, name, category, sub_category, tax_percentage, packaging_charge, description, variations, image_url):
+        item = self.store.insert_menu_item(
+            name, category, sub_category, tax_percentage, packaging_charge, description, variations, image_url,
+        )
+        return f"Menu item '{name}' added with SKU: {item['sku']}"
+
+    def delete_menu_item(self, sku):
+        with self.store.lock:
+            item = self.store.menu.pop(sku, None)
+            if item:
+                self.store.items_per_sub_category[item["sub_category"]] -= 1
+        if item:
+            print(f"🗑️ Deleted item: {item['name']} (SKU: {sku})")
+        else:
+            print(f"⚠️ No item found with SKU: {sku}")
+
+    def edit_menu_item(self, sku, **updates):
+        if not updates:
+            return "⚠️ No updates provided"
+        updates = {column: value for column, value in updates.items() if value is not None}
+        if not updates:
+            return "⚠️ No valid fields to update"
+        if not set(updates) <= set(MENU_FIELDS):
+            return "Error updating menu item"
+
+        with self.store.lock:
+            item = self.store.menu.get(sku)
+            if item:
+                self.store.items_per_sub_category[item["sub_category"]] -= 1
+                item.update(updates)
+                for column in ("tax_percentage", "packaging_charge"):
+                    item[column] = _decimal(item[column])
+                self.store.items_per_sub_category[item["sub_category"]] += 1
+                if item["sku"] != sku:
+                    self.store.menu[item["sku"]] = self.store.menu.pop(sku)
+        return f"✅ Menu item with SKU {sku} updated successfully"
+
+
+class MenuDatabase2(MemoryDatabase, OfferRepository):
+    def get_offer_item(self):
+        with self.store.lock:
+            if not self.store.menu:
+                return None
+            sold = self.store.sold_by_day.get(_now().date(), {})
+            item = min(
+                self.store.menu.values(),
+                key=lambda item: (sold.get(item["sku"], 0), -item["created_at"].timestamp()),
+            )
+            return {
+                "name": item["name"],
+                "sku": item["sku"],
+                "category": item["category"],
+                "preparation_time": item["preparation_time"],
+                "image_url": item["image_url"],
+                "variations": dict(item["variations"]),
+                "total_ordered": sold.get(item["sku"], 0),
+            }
+
+
+class OrderDatabase(MemoryDatabase, OrderRepository):
+    def create_order(self, channel_type, table_numbers, items, settlement_mode):
+        """
+        Same steps and results as place_order() (migrations/011_live_orders.sql), except that
+        the allocation, sales total and offer counts are applied inline, not through outbox.py.
+        """
+        store = self.store
+        table_no = {"tables": list(table_numbers)}
+        with store.lock:
+            now = _now()
+            waiter_id = None
+            if channel_type != "Takeaway":
+                waiter_id = store.least_loaded_waiter()
+                if waiter_id is None:
+                    return {"error": "No available waiters"}
+
+            # Per line: base + tax on base + one packaging charge (unknown SKUs are skipped)
+            total = Decimal(0)
+            for item in items:
+                menu_item = store.menu.get(item["sku"])
+                if menu_item:
+                    base = _decimal(item["price"]) * int(item["quantity"])
+                    total += base * (1 + menu_item["tax_percentage"] / 100) + menu_item["packaging_charge"]
+            total = total.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+            order = {
+                "id": next(store._order_ids),
+                "created_at": now,
+                "channel_type": channel_type,
+                "table_no": table_no,
+                "items": [dict(item) for item in items],
+                "price": total,
+                "settlement_mode": settlement_mode,
+                "waiter_id": waiter_id,
+                "status": PENDING,
+            }
+            store.orders[order["id"]] = order
+            store.active[order["id"]] = order
+            sold_today = store.sold_by_day[now.date()]
+            for item in items:
+                sold_today[item["sku"]] += int(item["quantity"])
+
+            if waiter_id is not None:
+                allocation = {
+                    "id": next(store._allocation_ids),
+                    "table_no": table_no,
+                    "waiter_id": waiter_id,
+                    "created_at": now,
+                    "order_id": order["id"],
+                    "released_at": None,
+                }
+                store.allocations.append(allocation)
+                store.open_allocations[order["id"]] = allocation
+
+            last_sales = store.company[-1].sales if store.company else Decimal(0)
+            store.company.append(CompanyRow(created_at=now, sales=(last_sales or Decimal(0)) + total))
+
+        return {"order_id": order["id"], "waiter_id": waiter_id, "total_price": float(total)}
+
+    def transition_orders(self, order_ids, status):
+        if status not in TRANSITIONS:
+            raise ValueError(f"Unknown order status: {status}")
+        store = self.store
+        result = {"status": status, "updated": [], "rejected": [], "not_found": []}
+        with store.lock:
+            for order_id in sorted(set(order_ids)):
+                order = store.orders.get(order_id)
+                if order is None:
+                    result["not_found"].append(order_id)
+                    continue
+                if status not in TRANSITIONS[order["status"]]:
+                    result["rejected"].append({"order_id": order_id, "status": order["status"]})
+                    continue
+                order["status"] = status
+                if status in ACTIVE_STATUSES:
+                    store.active[order_id] = order
+                else:
+                    store.active.pop(order_id, None)
+                if status in RELEASES_WAITER and order_id in store.open_allocations:
+                    store.open_allocations.pop(order_id)["released_at"] = _now()
+                result["updated"].append(order_id)
+        return result
+
+    def get_allocations(self):
+        """
+        Open waiter allocations, however old, with the items ordered at those
+        tables by orders from the last ACTIVE_ORDER_DAYS or still live.
+        """
+        store = self.store
+        with store.lock:
+            orders = store.recent_orders()
+            # An order can only contain {"tables": [t, ...]} if it lists t
+            orders_by_table = defaultdict(list)
+            for order in orders:
+                for table in set(order["table_no"].get("tables") or ()):
+                    orders_by_table[table].append(order)
+
+            ordered_by_tables = {}
+            rows = []
+            for allocation in store.allocations:
+                waiter = store.users.get(allocation["waiter_id"])
+                if waiter is None or allocation["released_at"] is not None:
+                    continue
+                tables = allocation["table_no"].get("tables") or []
+                key = json.dumps(allocation["table_no"], sort_keys=True)
+                if key not in ordered_by_tables:
+                    ordered = {}
+                    for order in orders_by_table[tables[0]] if tables else orders:
+                        if _jsonb_contains(order["table_no"], allocation["table_no"]):
+                            for item in order["items"]:
+                                menu_item = store.menu.get(item.get("sku"))
+                                if menu_item:
+                                    ordered[menu_item["sku"]] = {"sku": menu_item["sku"], "item_name": menu_item["name"]}
+                    ordered_by_tables[key] = [ordered[sku] for sku in sorted(ordered)] or None
+                rows.append(AllocationRow(
+                    allocation_id=allocation["id"],
+                    created_at=allocation["created_at"],
+                    table_no=allocation["table_no"],
+                    waiter_id=allocation["waiter_id"],
+                    waiter_name=waiter["name"],
+                    ordered_items=ordered_by_tables[key],
+                ))
+            return rows
+
+    def get_order_management(self, since=None, until=None):
+        """
+        Orders with their items expanded from the menu. Given since and/or
+        until, the orders created in [since, until); otherwise the orders from
+        the last ACTIVE_ORDER_DAYS plus every live order, however old.
+        """
+        store = self.store
+        with store.lock:
+            rows = []
+            for order in store.recent_orders(since, until):
+                items = [
+                    {
+                        "name": menu_item["name"],
+                        "preparation_time": menu_item["preparation_time"],
+                        "sku": item["sku"],
+                        "price": _decimal(item.get("price")),
+                        "quantity": int(item["quantity"]),
+                    }
+                    for item in order["items"]
+                    if (menu_item := store.menu.get(item.get("sku")))
+                ]
+                if items:
+                    rows.append(OrderManagementRow(
+                        order_id=order["id"],
+                        created_at=order["created_at"],
+                        channel_type=order["channel_type"],
+                        items=items,
+                        price=order["price"],
+                        settlement_mode=order["settlement_mode"],
+                        waiter_id=order["waiter_id"],
+                        assigned_tables=order["table_no"].get("tables"),
+                        status=order["status"],
+                    ))
+            return rows
+
+    def get_settlement_summary(self):
+        """Same figures as the SQL version: total_orders counts order lines."""
+        lines = {"Online Delivery": [0, Decimal(0)], "Credit Card": [0, Decimal(0)]}
+        with self.store.lock:
+            for order in self.store.orders.values():
+                matches = [
+                    label for label, hit in (
+                        ("Online Delivery", order["channel_type"] == "Online Delivery"),
+                        ("Credit Card", order["settlement_mode"] == "Credit Card"),
+                    ) if hit
+                ]
+                for item in order["items"] if matches else ():
+                    sales = _decimal(item.get("price")) * int(item.get("quantity") or 0)
+                    for label in matches:
+                        lines[label][0] += 1
+                        lines[label][1] += sales
+
+        summary = {}
+        for label, rate in (("Online Delivery", 0.10), ("Credit Card", 0.05)):
+            total_orders, total_sales = lines[label]
+            summary[label] = {
+                "total_orders": total_orders,
+                "total_sales": float(total_sales),
+                "commission_amount": float(total_sales) * rate,
+            }
+        return summary
+
+    def get_order_counts(self):
+        """Order totals broken down by status and by channel."""
+        counts = {"total": 0, "by_status": Counter(), "by_channel": Counter()}
+        with self.store.lock:
+            for order in self.store.orders.values():
+                counts["total"] += 1
+                counts["by_status"][order["status"]] += 1
+                counts["by_channel"][order["channel_type"]] += 1
+        counts["by_status"] = dict(counts["by_status"])
+        counts["by_channel"] = dict(counts["by_channel"])
+        return counts
+
+    def _order_lines(self, statuses):
+        """(order, item, menu item) for every line of a live order in `statuses` whose SKU is on the menu, oldest first."""
+        store = self.store
+        orders = [order for order in store.active.values() if order["status"] in statuses]
+        for order in sorted(orders, key=lambda order: (order["created_at"], order["id"])):
+            for item in order["items"]:
+                menu_item = store.menu.get(item.get("sku"))
+                if menu_item:
+                    yield order, item, menu_item
+
+    def get_kitchen_backlog(self):
+        with self.store.lock:
+            return [
+                KitchenBacklogRow(
+                    order_id=order["id"],
+                    created_at=order["created_at"],
+                    channel_type=order["channel_type"],
+                    sku=item["sku"],
+                    quantity=int(item["quantity"]),
+                    name=menu_item["name"],
+                    station=menu_item["category"],
+                    preparation_time=menu_item["preparation_time"],
+                )
+                for order, item, menu_item in self._order_lines(KITCHEN_STATUSES)
+            ]
+
+    def get_pending_orders_with_details(self):
+        with self.store.lock:
+            return [
+                {
+                    "order_id": order["id"],
+                    "sku": item["sku"],
+                    "sku_name": menu_item["name"],
+                    "sku_description": menu_item["description"].strip() if menu_item["description"] else None,
+                }
+                for order, item, menu_item in self._order_lines((PENDING,))
+            ]
+
+    def get_order_groups(self):
+        with self.store.lock:
+            return dict(self.store.order_groups) if self.store.order_groups else None
+
+    def save_order_groups(self, input_hash, groups):
+        with self.store.lock:
+            self.store.order_groups = {"input_hash": input_hash, "groups": groups, "refreshed_at": _now()}
@@ -0,0 +1,49 @@
+"""
+Apply the SQL files in migrations/ in name order, once each, on every shard
+(database.shards).
+
+Usage (from backend/):  python migrate.py
+"""
+from pathlib import Path
+
+from database import shards
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+
+def migrate(pool):
+    conn = pool.acquire()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                name TEXT PRIMARY KEY,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            );
+            """)
+            cursor.execute("SELECT name FROM schema_migrations;")
+            applied = {row[0] for row in cursor.fetchall()}
+            conn.commit()
+
+            for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+                if path.name in applied:
+                    continue
+                print(f"  Applying {path.name}")
+                cursor.execute(path.read_text())
+                cursor.execute("INSERT INTO schema_migrations (name) VALUES (%s);", (path.name,))
+                conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.release(conn)
+
+
+def main():
+    for name, pool in shards.pools.items():
+        print(f"Shard {name}")
+        migrate(pool)
+
+
+if __name__ == "__main__":
+    main()
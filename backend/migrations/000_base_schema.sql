@@ -0,0 +1,53 @@
+-- The original tables, for bootstrapping an empty database (e.g. a new
+-- outlet shard). Existing databases already have them, and every statement
+-- here is a no-op there. Later migrations partition orders and allocations
+-- and add the lifecycle and outlet columns.
+
+CREATE TABLE IF NOT EXISTS employees (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    email TEXT UNIQUE,
+    password TEXT,
+    role TEXT,
+    created_at TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS menu (
+    id SERIAL PRIMARY KEY,
+    name TEXT,
+    category TEXT,
+    sub_category TEXT,
+    tax_percentage NUMERIC,
+    packaging_charge NUMERIC,
+    sku TEXT UNIQUE,
+    variations JSONB,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    description TEXT,
+    image_url TEXT,
+    preparation_time INT DEFAULT 10
+);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id SERIAL PRIMARY KEY,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    channel_type TEXT,
+    table_no JSONB,
+    items JSONB,
+    price NUMERIC,
+    settlement_mode TEXT,
+    waiter_id TEXT,
+    status TEXT DEFAULT 'Pending'
+);
+
+CREATE TABLE IF NOT EXISTS allocations (
+    id SERIAL PRIMARY KEY,
+    table_no JSONB,
+    waiter_id TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS company (
+    id SERIAL PRIMARY KEY,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    sales NUMERIC
+);
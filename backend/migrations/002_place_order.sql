@@ -0,0 +1,68 @@
+-- Order placement in one round trip: assign the least-loaded waiter, price the
+-- items from `menu`, insert the order and its allocation, and append the new
+-- running sales total, all in the caller's transaction.
+--
+-- Two transaction-scoped advisory locks serialize the racy steps under READ
+-- COMMITTED: waiter selection (so two concurrent dine-in orders can't both
+-- pick the same "least busy" waiter off a stale count) and the sales ledger
+-- read-modify-write (so no running total is lost). Both are released at commit.
+--
+-- Returns one row; order_id is NULL when a waiter is needed but none exists.
+CREATE OR REPLACE FUNCTION place_order(
+    p_channel_type TEXT,
+    p_table_no JSONB,
+    p_items JSONB,
+    p_settlement_mode TEXT
+) RETURNS TABLE (order_id INT, waiter_id TEXT, total_price NUMERIC)
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_waiter_id employees.id%TYPE;
+    v_total NUMERIC;
+    v_order_id INT;
+    v_last_sales NUMERIC;
+BEGIN
+    IF p_channel_type <> 'Takeaway' THEN
+        PERFORM pg_advisory_xact_lock(hashtext('place_order:waiter'));
+
+        SELECT e.id INTO v_waiter_id
+        FROM employees e
+        LEFT JOIN allocations a ON e.id = a.waiter_id
+        WHERE e.role = 'waiter'
+        GROUP BY e.id
+        ORDER BY COUNT(a.id) ASC
+        LIMIT 1;
+
+        IF v_waiter_id IS NULL THEN
+            RETURN QUERY SELECT NULL::INT, NULL::TEXT, NULL::NUMERIC;
+            RETURN;
+        END IF;
+    END IF;
+
+    -- Per line: base + tax on base + one packaging charge (unknown SKUs are skipped)
+    SELECT ROUND(COALESCE(SUM(
+        i.price * i.quantity * (1 + m.tax_percentage / 100) + m.packaging_charge
+    ), 0), 2) INTO v_total
+    FROM jsonb_to_recordset(p_items) AS i(sku TEXT, quantity INT, price NUMERIC)
+    JOIN menu m ON m.sku = i.sku;
+
+    INSERT INTO orders (created_at, channel_type, table_no, items, price, settlement_mode, waiter_id)
+    VALUES (NOW(), p_channel_type, p_table_no, p_items, v_total, p_settlement_mode, v_waiter_id)
+    RETURNING id INTO v_order_id;
+
+    IF v_waiter_id IS NOT NULL THEN
+        INSERT INTO allocations (table_no, waiter_id, created_at)
+        VALUES (p_table_no, v_waiter_id, NOW());
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(hashtext('place_order:sales'));
+
+    SELECT c.sales INTO v_last_sales FROM company c ORDER BY c.created_at DESC LIMIT 1;
+
+    -- clock_timestamp(), not NOW(): rows must sort in lock order, not in
+    -- transaction start order, for the next order to read the latest total
+    INSERT INTO company (created_at, sales)
+    VALUES (clock_timestamp(), COALESCE(v_last_sales, 0) + v_total);
+
+    RETURN QUERY SELECT v_order_id, v_waiter_id::TEXT, v_total;
+END;
+$$;
@@ -0,0 +1,132 @@
+-- Monthly range partitioning of `orders` and `allocations` on created_at.
+--
+-- Each table is rebuilt as a partitioned table with the same columns, a
+-- default partition, and one partition per month from its oldest row to three
+-- months ahead. Existing rows are copied over, and the original table is kept
+-- as <name>_unpartitioned until you drop it. Ids keep counting from the old
+-- maximum. The primary key becomes (id, created_at), because Postgres needs
+-- the partition key in every unique index.
+--
+-- Run partitions.py regularly (e.g. daily) to add upcoming months and to
+-- archive expired ones.
+
+CREATE OR REPLACE FUNCTION ensure_monthly_partitions(p_parent TEXT, p_from DATE, p_months_ahead INT)
+RETURNS VOID LANGUAGE plpgsql AS $$
+DECLARE
+    v_month DATE := date_trunc('month', p_from)::DATE;
+    v_last DATE := (date_trunc('month', NOW()) + make_interval(months => p_months_ahead))::DATE;
+BEGIN
+    WHILE v_month <= v_last LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            p_parent || '_p' || to_char(v_month, 'YYYYMM'),
+            p_parent,
+            v_month,
+            (v_month + INTERVAL '1 month')::DATE
+        );
+        v_month := (v_month + INTERVAL '1 month')::DATE;
+    END LOOP;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION partition_by_month(p_table TEXT)
+RETURNS VOID LANGUAGE plpgsql AS $$
+DECLARE
+    v_old TEXT := p_table || '_unpartitioned';
+    v_seq TEXT := p_table || '_monthly_id_seq';
+    v_oldest DATE;
+    v_max_id BIGINT;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = p_table::regclass) = 'p' THEN
+        RETURN;  -- already partitioned
+    END IF;
+
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', p_table, v_old);
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)', p_table, v_old);
+
+    -- Fresh sequence continuing after the old ids, so serial and identity columns behave the same
+    EXECUTE format('SELECT COALESCE(MAX(id), 0), COALESCE(MIN(created_at), NOW())::DATE FROM %I', v_old)
+        INTO v_max_id, v_oldest;
+    EXECUTE format('CREATE SEQUENCE IF NOT EXISTS %I OWNED BY %I.id', v_seq, p_table);
+    PERFORM setval(v_seq, GREATEST(v_max_id, 1), v_max_id > 0);
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN id SET DEFAULT nextval(%L)', p_table, v_seq);
+
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN created_at SET DEFAULT NOW(), ALTER COLUMN created_at SET NOT NULL', p_table);
+    EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id, created_at)', p_table);
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', p_table || '_default', p_table);
+    PERFORM ensure_monthly_partitions(p_table, v_oldest, 3);
+
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I WHERE created_at IS NOT NULL', p_table, v_old);
+END;
+$$;
+
+SELECT partition_by_month('orders');
+SELECT partition_by_month('allocations');
+
+CREATE INDEX IF NOT EXISTS orders_created_at_idx ON orders (created_at);
+CREATE INDEX IF NOT EXISTS allocations_waiter_created_at_idx ON allocations (waiter_id, created_at);
+
+-- place_order() balanced waiters on every allocation ever made, which now
+-- means scanning every partition. Count only the last day's allocations
+-- (the same window as ACTIVE_ORDER_DAYS in database.py) so the lookup prunes
+-- down to the current month.
+CREATE OR REPLACE FUNCTION place_order(
+    p_channel_type TEXT,
+    p_table_no JSONB,
+    p_items JSONB,
+    p_settlement_mode TEXT
+) RETURNS TABLE (order_id INT, waiter_id TEXT, total_price NUMERIC)
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_waiter_id employees.id%TYPE;
+    v_total NUMERIC;
+    v_order_id INT;
+    v_last_sales NUMERIC;
+BEGIN
+    IF p_channel_type <> 'Takeaway' THEN
+        PERFORM pg_advisory_xact_lock(hashtext('place_order:waiter'));
+
+        SELECT e.id INTO v_waiter_id
+        FROM employees e
+        LEFT JOIN allocations a
+          ON e.id = a.waiter_id
+         AND a.created_at >= NOW() - INTERVAL '1 day'  -- current partitions only
+        WHERE e.role = 'waiter'
+        GROUP BY e.id
+        ORDER BY COUNT(a.id) ASC
+        LIMIT 1;
+
+        IF v_waiter_id IS NULL THEN
+            RETURN QUERY SELECT NULL::INT, NULL::TEXT, NULL::NUMERIC;
+            RETURN;
+        END IF;
+    END IF;
+
+    -- Per line: base + tax on base + one packaging charge (unknown SKUs are skipped)
+    SELECT ROUND(COALESCE(SUM(
+        i.price * i.quantity * (1 + m.tax_percentage / 100) + m.packaging_charge
+    ), 0), 2) INTO v_total
+    FROM jsonb_to_recordset(p_items) AS i(sku TEXT, quantity INT, price NUMERIC)
+    JOIN menu m ON m.sku = i.sku;
+
+    INSERT INTO orders (created_at, channel_type, table_no, items, price, settlement_mode, waiter_id)
+    VALUES (NOW(), p_channel_type, p_table_no, p_items, v_total, p_settlement_mode, v_waiter_id)
+    RETURNING id INTO v_order_id;
+
+    IF v_waiter_id IS NOT NULL THEN
+        INSERT INTO allocations (table_no, waiter_id, created_at)
+        VALUES (p_table_no, v_waiter_id, NOW());
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(hashtext('place_order:sales'));
+
+    SELECT c.sales INTO v_last_sales FROM company c ORDER BY c.created_at DESC LIMIT 1;
+
+    -- clock_timestamp(), not NOW(): rows must sort in lock order, not in
+    -- transaction start order, for the next order to read the latest total
+    INSERT INTO company (created_at, sales)
+    VALUES (clock_timestamp(), COALESCE(v_last_sales, 0) + v_total);
+
+    RETURN QUERY SELECT v_order_id, v_waiter_id::TEXT, v_total;
+END;
+$$;
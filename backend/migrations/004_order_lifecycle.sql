@@ -0,0 +1,101 @@
+-- Order lifecycle: Pending -> Preparing -> Ready -> Served -> Settled, or
+-- Cancelled from any status before Served (see lifecycle.py).
+--
+-- Each allocation now records the order it belongs to, and gets released_at
+-- set when that order is Served or Cancelled. Waiter balancing counts only
+-- allocations that are still open. Older allocations are matched to their
+-- orders the way place_order() wrote them (same waiter, tables and
+-- timestamp). Allocations that can't be matched, or whose order is already
+-- finished, are released.
+--
+-- Partial indexes cover only live rows, so lookups of pending orders and open
+-- allocations scale with current service rather than total history.
+
+ALTER TABLE allocations ADD COLUMN IF NOT EXISTS order_id INT;
+ALTER TABLE allocations ADD COLUMN IF NOT EXISTS released_at TIMESTAMPTZ;
+
+UPDATE allocations a
+SET order_id = o.id
+FROM orders o
+WHERE a.order_id IS NULL
+  AND o.waiter_id::TEXT = a.waiter_id::TEXT
+  AND o.table_no = a.table_no
+  AND o.created_at = a.created_at;
+
+UPDATE allocations a
+SET released_at = NOW()
+WHERE a.released_at IS NULL
+  AND NOT EXISTS (
+      SELECT 1 FROM orders o
+      WHERE o.id = a.order_id AND o.status IN ('Pending', 'Preparing', 'Ready')
+  );
+
+CREATE INDEX IF NOT EXISTS orders_active_idx
+    ON orders (created_at, id) WHERE status IN ('Pending', 'Preparing', 'Ready');
+CREATE INDEX IF NOT EXISTS allocations_open_waiter_idx
+    ON allocations (waiter_id, created_at) WHERE released_at IS NULL;
+CREATE INDEX IF NOT EXISTS allocations_open_order_idx
+    ON allocations (order_id) WHERE released_at IS NULL;
+
+-- Link each new allocation to its order and balance waiters on open allocations only
+CREATE OR REPLACE FUNCTION place_order(
+    p_channel_type TEXT,
+    p_table_no JSONB,
+    p_items JSONB,
+    p_settlement_mode TEXT
+) RETURNS TABLE (order_id INT, waiter_id TEXT, total_price NUMERIC)
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_waiter_id employees.id%TYPE;
+    v_total NUMERIC;
+    v_order_id INT;
+    v_last_sales NUMERIC;
+BEGIN
+    IF p_channel_type <> 'Takeaway' THEN
+        PERFORM pg_advisory_xact_lock(hashtext('place_order:waiter'));
+
+        SELECT e.id INTO v_waiter_id
+        FROM employees e
+        LEFT JOIN allocations a
+          ON e.id = a.waiter_id
+         AND a.released_at IS NULL
+         AND a.created_at >= NOW() - INTERVAL '1 day'  -- current partitions only
+        WHERE e.role = 'waiter'
+        GROUP BY e.id
+        ORDER BY COUNT(a.id) ASC
+        LIMIT 1;
+
+        IF v_waiter_id IS NULL THEN
+            RETURN QUERY SELECT NULL::INT, NULL::TEXT, NULL::NUMERIC;
+            RETURN;
+        END IF;
+    END IF;
+
+    -- Per line: base + tax on base + one packaging charge (unknown SKUs are skipped)
+    SELECT ROUND(COALESCE(SUM(
+        i.price * i.quantity * (1 + m.tax_percentage / 100) + m.packaging_charge
+    ), 0), 2) INTO v_total
+    FROM jsonb_to_recordset(p_items) AS i(sku TEXT, quantity INT, price NUMERIC)
+    JOIN menu m ON m.sku = i.sku;
+
+    INSERT INTO orders (created_at, channel_type, table_no, items, price, settlement_mode, waiter_id)
+    VALUES (NOW(), p_channel_type, p_table_no, p_items, v_total, p_settlement_mode, v_waiter_id)
+    RETURNING id INTO v_order_id;
+
+    IF v_waiter_id IS NOT NULL THEN
+        INSERT INTO allocations (table_no, waiter_id, created_at, order_id)
+        VALUES (p_table_no, v_waiter_id, NOW(), v_order_id);
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(hashtext('place_order:sales'));
+
+    SELECT c.sales INTO v_last_sales FROM company c ORDER BY c.created_at DESC LIMIT 1;
+
+    -- clock_timestamp(), not NOW(): rows must sort in lock order, not in
+    -- transaction start order, for the next order to read the latest total
+    INSERT INTO company (created_at, sales)
+    VALUES (clock_timestamp(), COALESCE(v_last_sales, 0) + v_total);
+
+    RETURN QUERY SELECT v_order_id, v_waiter_id::TEXT, v_total;
+END;
+$$;
@@ -0,0 +1,134 @@
+-- Outlet-scoped data. Every row of menu, employees, company, orders and
+-- allocations now belongs to an outlet. Existing rows go to 'main', the
+-- default DEFAULT_OUTLET_ID. outlets lists the outlets a shard hosts, and
+-- cross-outlet reports read it. Run this on every shard (migrate.py does).
+--
+-- outlet_id has no default once the backfill is done, so a write that forgets
+-- it fails instead of landing in the wrong outlet.
+
+CREATE TABLE IF NOT EXISTS outlets (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+INSERT INTO outlets (id, name) VALUES ('main', 'Main outlet') ON CONFLICT (id) DO NOTHING;
+
+DO $$
+DECLARE
+    v_table TEXT;
+BEGIN
+    FOREACH v_table IN ARRAY ARRAY['menu', 'employees', 'company', 'orders', 'allocations'] LOOP
+        EXECUTE format('ALTER TABLE %I ADD COLUMN IF NOT EXISTS outlet_id TEXT NOT NULL DEFAULT %L', v_table, 'main');
+        EXECUTE format('ALTER TABLE %I ALTER COLUMN outlet_id DROP DEFAULT', v_table);
+    END LOOP;
+END;
+$$;
+
+-- SKUs and staff emails only need to be unique within an outlet
+DO $$
+DECLARE
+    v_target RECORD;
+    v_constraint TEXT;
+BEGIN
+    FOR v_target IN SELECT * FROM (VALUES ('menu', 'sku'), ('employees', 'email')) AS t(tbl, col) LOOP
+        FOR v_constraint IN
+            SELECT c.conname
+            FROM pg_constraint c
+            JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+            WHERE c.conrelid = v_target.tbl::regclass
+              AND c.contype = 'u'
+              AND array_length(c.conkey, 1) = 1
+              AND a.attname = v_target.col
+        LOOP
+            EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', v_target.tbl, v_constraint);
+        END LOOP;
+        EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I UNIQUE (outlet_id, %I)',
+                       v_target.tbl, v_target.tbl || '_outlet_' || v_target.col || '_key', v_target.col);
+    END LOOP;
+END;
+$$;
+
+ALTER TABLE menu ADD CONSTRAINT menu_outlet_fk FOREIGN KEY (outlet_id) REFERENCES outlets (id);
+ALTER TABLE employees ADD CONSTRAINT employees_outlet_fk FOREIGN KEY (outlet_id) REFERENCES outlets (id);
+
+CREATE INDEX IF NOT EXISTS menu_outlet_sub_category_idx ON menu (outlet_id, sub_category);
+CREATE INDEX IF NOT EXISTS company_outlet_created_at_idx ON company (outlet_id, created_at);
+
+-- Live orders and open allocations, looked up per outlet
+DROP INDEX IF EXISTS orders_active_idx;
+CREATE INDEX IF NOT EXISTS orders_outlet_active_idx
+    ON orders (outlet_id, created_at, id) WHERE status IN ('Pending', 'Preparing', 'Ready');
+CREATE INDEX IF NOT EXISTS allocations_outlet_open_idx
+    ON allocations (outlet_id, created_at) WHERE released_at IS NULL;
+
+-- place_order() now takes the outlet. Waiters, prices and the running sales
+-- total are per outlet, and so are the advisory locks, so outlets on the same
+-- shard don't queue behind each other.
+DROP FUNCTION IF EXISTS place_order(TEXT, JSONB, JSONB, TEXT);
+
+CREATE OR REPLACE FUNCTION place_order(
+    p_channel_type TEXT,
+    p_table_no JSONB,
+    p_items JSONB,
+    p_settlement_mode TEXT,
+    p_outlet_id TEXT
+) RETURNS TABLE (order_id INT, waiter_id TEXT, total_price NUMERIC)
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_waiter_id employees.id%TYPE;
+    v_total NUMERIC;
+    v_order_id INT;
+    v_last_sales NUMERIC;
+BEGIN
+    IF p_channel_type <> 'Takeaway' THEN
+        PERFORM pg_advisory_xact_lock(hashtext('place_order:waiter:' || p_outlet_id));
+
+        SELECT e.id INTO v_waiter_id
+        FROM employees e
+        LEFT JOIN allocations a
+          ON e.id = a.waiter_id
+         AND a.released_at IS NULL
+         AND a.created_at >= NOW() - INTERVAL '1 day'  -- current partitions only
+        WHERE e.role = 'waiter' AND e.outlet_id = p_outlet_id
+        GROUP BY e.id
+        ORDER BY COUNT(a.id) ASC
+        LIMIT 1;
+
+        IF v_waiter_id IS NULL THEN
+            RETURN QUERY SELECT NULL::INT, NULL::TEXT, NULL::NUMERIC;
+            RETURN;
+        END IF;
+    END IF;
+
+    -- Per line: base + tax on base + one packaging charge (unknown SKUs are skipped)
+    SELECT ROUND(COALESCE(SUM(
+        i.price * i.quantity * (1 + m.tax_percentage / 100) + m.packaging_charge
+    ), 0), 2) INTO v_total
+    FROM jsonb_to_recordset(p_items) AS i(sku TEXT, quantity INT, price NUMERIC)
+    JOIN menu m ON m.sku = i.sku AND m.outlet_id = p_outlet_id;
+
+    INSERT INTO orders (created_at, channel_type, table_no, items, price, settlement_mode, waiter_id, outlet_id)
+    VALUES (NOW(), p_channel_type, p_table_no, p_items, v_total, p_settlement_mode, v_waiter_id, p_outlet_id)
+    RETURNING id INTO v_order_id;
+
+    IF v_waiter_id IS NOT NULL THEN
+        INSERT INTO allocations (table_no, waiter_id, created_at, order_id, outlet_id)
+        VALUES (p_table_no, v_waiter_id, NOW(), v_order_id, p_outlet_id);
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(hashtext('place_order:sales:' || p_outlet_id));
+
+    SELECT c.sales INTO v_last_sales
+    FROM company c
+    WHERE c.outlet_id = p_outlet_id
+    ORDER BY c.created_at DESC
+    LIMIT 1;
+
+    -- clock_timestamp(), not NOW(): rows must sort in lock order, not in
+    -- transaction start order, for the next order to read the latest total
+    INSERT INTO company (created_at, sales, outlet_id)
+    VALUES (clock_timestamp(), COALESCE(v_last_sales, 0) + v_total, p_outlet_id);
+
+    RETURN QUERY SELECT v_order_id, v_waiter_id::TEXT, v_total;
+END;
+$$;
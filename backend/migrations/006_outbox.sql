@@ -0,0 +1,127 @@
+-- Write-behind queue for the side effects of placing an order. place_order()
+-- now writes only the order itself plus one outbox row per side effect, in
+-- the same transaction, and returns. outbox.py applies the queued effects
+-- in batches:
+--   sales         running total in `company` (one row per outlet per batch)
+--   allocation    the waiter's `allocations` row
+--   offer_counts  today's per-SKU counts in menu_daily_orders (get_offer_item)
+--   grouping      re-run the LLM grouping of pending orders into order_groups
+-- A processed row is deleted. A failing one is retried with backoff and
+-- parked (failed_at set) after OUTBOX_MAX_ATTEMPTS.
+
+CREATE TABLE IF NOT EXISTS outbox (
+    id BIGSERIAL PRIMARY KEY,
+    outlet_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+    available_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    attempts INT NOT NULL DEFAULT 0,
+    last_error TEXT,
+    failed_at TIMESTAMPTZ
+);
+CREATE INDEX IF NOT EXISTS outbox_ready_idx ON outbox (available_at, id) WHERE failed_at IS NULL;
+CREATE INDEX IF NOT EXISTS outbox_pending_kind_idx ON outbox (outlet_id, kind) WHERE failed_at IS NULL;
+
+CREATE TABLE IF NOT EXISTS menu_daily_orders (
+    outlet_id TEXT NOT NULL,
+    day DATE NOT NULL,
+    sku TEXT NOT NULL,
+    total_ordered BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (outlet_id, day, sku)
+);
+
+-- Today's counts so far, so the offer item doesn't reset at deploy time
+INSERT INTO menu_daily_orders (outlet_id, day, sku, total_ordered)
+SELECT o.outlet_id, CURRENT_DATE, i.sku, SUM(i.quantity)
+FROM orders o
+CROSS JOIN LATERAL jsonb_to_recordset(o.items) AS i(sku TEXT, quantity INT)
+WHERE o.created_at >= CURRENT_DATE AND i.sku IS NOT NULL
+GROUP BY o.outlet_id, i.sku
+ON CONFLICT (outlet_id, day, sku) DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS order_groups (
+    outlet_id TEXT PRIMARY KEY,
+    input_hash TEXT NOT NULL,
+    groups JSONB NOT NULL,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION place_order(
+    p_channel_type TEXT,
+    p_table_no JSONB,
+    p_items JSONB,
+    p_settlement_mode TEXT,
+    p_outlet_id TEXT
+) RETURNS TABLE (order_id INT, waiter_id TEXT, total_price NUMERIC)
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_waiter_id employees.id%TYPE;
+    v_total NUMERIC;
+    v_order_id INT;
+BEGIN
+    IF p_channel_type <> 'Takeaway' THEN
+        PERFORM pg_advisory_xact_lock(hashtext('place_order:waiter:' || p_outlet_id));
+
+        -- A waiter's load is their open allocations plus those still queued,
+        -- so back-to-back orders spread out before the worker catches up
+        SELECT e.id INTO v_waiter_id
+        FROM employees e
+        LEFT JOIN (
+            SELECT a.waiter_id
+            FROM allocations a
+            WHERE a.outlet_id = p_outlet_id
+              AND a.released_at IS NULL
+              AND a.created_at >= NOW() - INTERVAL '1 day'  -- current partitions only
+            UNION ALL
+            SELECT q.payload->>'waiter_id'
+            FROM outbox q
+            WHERE q.outlet_id = p_outlet_id AND q.kind = 'allocation' AND q.failed_at IS NULL
+        ) load ON load.waiter_id = e.id
+        WHERE e.role = 'waiter' AND e.outlet_id = p_outlet_id
+        GROUP BY e.id
+        ORDER BY COUNT(load.waiter_id) ASC
+        LIMIT 1;
+
+        IF v_waiter_id IS NULL THEN
+            RETURN QUERY SELECT NULL::INT, NULL::TEXT, NULL::NUMERIC;
+            RETURN;
+        END IF;
+    END IF;
+
+    -- Per line: base + tax on base + one packaging charge (unknown SKUs are skipped)
+    SELECT ROUND(COALESCE(SUM(
+        i.price * i.quantity * (1 + m.tax_percentage / 100) + m.packaging_charge
+    ), 0), 2) INTO v_total
+    FROM jsonb_to_recordset(p_items) AS i(sku TEXT, quantity INT, price NUMERIC)
+    JOIN menu m ON m.sku = i.sku AND m.outlet_id = p_outlet_id;
+
+    INSERT INTO orders (created_at, channel_type, table_no, items, price, settlement_mode, waiter_id, outlet_id)
+    VALUES (NOW(), p_channel_type, p_table_no, p_items, v_total, p_settlement_mode, v_waiter_id, p_outlet_id)
+    RETURNING id INTO v_order_id;
+
+    INSERT INTO outbox (outlet_id, kind, payload)
+    SELECT p_outlet_id, kind, payload
+    FROM (VALUES
+        ('sales', jsonb_build_object('order_id', v_order_id, 'total', v_total)),
+        ('offer_counts', jsonb_build_object('order_id', v_order_id, 'day', CURRENT_DATE, 'items', p_items))
+    ) AS effects (kind, payload);
+
+    IF v_waiter_id IS NOT NULL THEN
+        INSERT INTO outbox (outlet_id, kind, payload)
+        VALUES (p_outlet_id, 'allocation', jsonb_build_object(
+            'order_id', v_order_id, 'waiter_id', v_waiter_id, 'table_no', p_table_no, 'created_at', NOW()));
+    END IF;
+
+    -- One queued refresh per outlet is enough: it reads the pending orders
+    -- when it runs. /group_orders recomputes if one still comes out stale.
+    INSERT INTO outbox (outlet_id, kind)
+    SELECT p_outlet_id, 'grouping'
+    WHERE NOT EXISTS (
+        SELECT 1 FROM outbox q
+        WHERE q.outlet_id = p_outlet_id AND q.kind = 'grouping' AND q.failed_at IS NULL
+    );
+
+    RETURN QUERY SELECT v_order_id, v_waiter_id::TEXT, v_total;
+END;
+$$;
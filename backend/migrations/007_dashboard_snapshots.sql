@@ -0,0 +1,8 @@
+-- The latest dashboard snapshot of each outlet (snapshot.py), shared by every
+-- API worker. Whichever worker finds it due first rebuilds it, under an
+-- advisory lock; the others read the stored copy.
+CREATE TABLE IF NOT EXISTS dashboard_snapshots (
+    outlet_id TEXT PRIMARY KEY,
+    generated_at TIMESTAMPTZ NOT NULL,
+    payload JSONB NOT NULL
+);
@@ -0,0 +1,93 @@
+-- Grouping refreshes are claimed by setting claimed_at and committing, so
+-- the LLM call runs outside any transaction (outbox.py). A claim that isn't
+-- settled within GROUPING_CLAIM_SECONDS (worker died) is taken again.
+-- place_order() only skips queueing a refresh when an unclaimed one is
+-- waiting. A claimed refresh may have read the pending orders before this
+-- order. Otherwise unchanged from 008_place_order_notify.sql.
+
+ALTER TABLE outbox ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ;
+
+CREATE OR REPLACE FUNCTION place_order(
+    p_channel_type TEXT,
+    p_table_no JSONB,
+    p_items JSONB,
+    p_settlement_mode TEXT,
+    p_outlet_id TEXT
+) RETURNS TABLE (order_id INT, waiter_id TEXT, total_price NUMERIC)
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_waiter_id employees.id%TYPE;
+    v_total NUMERIC;
+    v_order_id INT;
+BEGIN
+    IF p_channel_type <> 'Takeaway' THEN
+        PERFORM pg_advisory_xact_lock(hashtext('place_order:waiter:' || p_outlet_id));
+
+        -- A waiter's load is their open allocations plus those still queued,
+        -- so back-to-back orders spread out before the worker catches up
+        SELECT e.id INTO v_waiter_id
+        FROM employees e
+        LEFT JOIN (
+            SELECT a.waiter_id
+            FROM allocations a
+            WHERE a.outlet_id = p_outlet_id
+              AND a.released_at IS NULL
+              AND a.created_at >= NOW() - INTERVAL '1 day'  -- current partitions only
+            UNION ALL
+            SELECT q.payload->>'waiter_id'
+            FROM outbox q
+            WHERE q.outlet_id = p_outlet_id AND q.kind = 'allocation' AND q.failed_at IS NULL
+        ) load ON load.waiter_id = e.id
+        WHERE e.role = 'waiter' AND e.outlet_id = p_outlet_id
+        GROUP BY e.id
+        ORDER BY COUNT(load.waiter_id) ASC
+        LIMIT 1;
+
+        IF v_waiter_id IS NULL THEN
+            RETURN QUERY SELECT NULL::INT, NULL::TEXT, NULL::NUMERIC;
+            RETURN;
+        END IF;
+    END IF;
+
+    -- Per line: base + tax on base + one packaging charge (unknown SKUs are skipped)
+    SELECT ROUND(COALESCE(SUM(
+        i.price * i.quantity * (1 + m.tax_percentage / 100) + m.packaging_charge
+    ), 0), 2) INTO v_total
+    FROM jsonb_to_recordset(p_items) AS i(sku TEXT, quantity INT, price NUMERIC)
+    JOIN menu m ON m.sku = i.sku AND m.outlet_id = p_outlet_id;
+
+    INSERT INTO orders (created_at, channel_type, table_no, items, price, settlement_mode, waiter_id, outlet_id)
+    VALUES (NOW(), p_channel_type, p_table_no, p_items, v_total, p_settlement_mode, v_waiter_id, p_outlet_id)
+    RETURNING id INTO v_order_id;
+
+    INSERT INTO outbox (outlet_id, kind, payload)
+    SELECT p_outlet_id, kind, payload
+    FROM (VALUES
+        ('sales', jsonb_build_object('order_id', v_order_id, 'total', v_total)),
+        ('offer_counts', jsonb_build_object('order_id', v_order_id, 'day', CURRENT_DATE, 'items', p_items))
+    ) AS effects (kind, payload);
+
+    IF v_waiter_id IS NOT NULL THEN
+        INSERT INTO outbox (outlet_id, kind, payload)
+        VALUES (p_outlet_id, 'allocation', jsonb_build_object(
+            'order_id', v_order_id, 'waiter_id', v_waiter_id, 'table_no', p_table_no, 'created_at', NOW()));
+    END IF;
+
+    -- One queued refresh per outlet is enough: it reads the pending orders
+    -- when it runs. A claimed one may already have read them, so it doesn't
+    -- count. /group_orders recomputes if one still comes out stale.
+    INSERT INTO outbox (outlet_id, kind)
+    SELECT p_outlet_id, 'grouping'
+    WHERE NOT EXISTS (
+        SELECT 1 FROM outbox q
+        WHERE q.outlet_id = p_outlet_id AND q.kind = 'grouping'
+          AND q.failed_at IS NULL AND q.claimed_at IS NULL
+    );
+
+    -- kitchen.backlog_event(): invalidate the kitchen schedule on every worker,
+    -- delivered only if this order commits (shared_state.py listens)
+    PERFORM pg_notify('app_state', json_build_object('key', 'kitchen_backlog:' || p_outlet_id)::text);
+
+    RETURN QUERY SELECT v_order_id, v_waiter_id::TEXT, v_total;
+END;
+$$;
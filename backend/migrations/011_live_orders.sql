@@ -0,0 +1,125 @@
+-- Live orders (lifecycle.ACTIVE_STATUSES) of any age, kept in a small
+-- unpartitioned table by a trigger on `orders`. The operational queries take
+-- the last ACTIVE_ORDER_DAYS from `orders` and join older live orders in
+-- through here, so every scan of `orders` and `allocations` stays bounded by
+-- created_at and Postgres prunes it to the partitions involved
+-- (database.py, e.g. RECENT_ORDERS).
+--
+-- place_order() now counts a waiter's load over live_orders too, so it sees
+-- every open allocation, not only the last day's. Otherwise unchanged from
+-- 010_waiter_tie_break.sql.
+--
+-- partitions.py restore re-attaches archived months without firing the
+-- trigger; archived orders are long settled, so none of them is live.
+
+CREATE TABLE IF NOT EXISTS live_orders (
+    order_id INT PRIMARY KEY,
+    created_at TIMESTAMPTZ NOT NULL,
+    outlet_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    waiter_id TEXT
+);
+CREATE INDEX IF NOT EXISTS live_orders_outlet_idx ON live_orders (outlet_id, created_at);
+CREATE INDEX IF NOT EXISTS live_orders_waiter_idx ON live_orders (outlet_id, waiter_id);
+
+CREATE OR REPLACE FUNCTION track_live_order() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF NEW.status IN ('Pending', 'Preparing', 'Ready') THEN
+        INSERT INTO live_orders (order_id, created_at, outlet_id, status, waiter_id)
+        VALUES (NEW.id, NEW.created_at, NEW.outlet_id, NEW.status, NEW.waiter_id)
+        ON CONFLICT (order_id) DO UPDATE SET status = EXCLUDED.status, waiter_id = EXCLUDED.waiter_id;
+    ELSIF TG_OP = 'UPDATE' THEN
+        DELETE FROM live_orders WHERE order_id = NEW.id;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS orders_track_live ON orders;
+CREATE TRIGGER orders_track_live
+    AFTER INSERT OR UPDATE OF status, waiter_id ON orders
+    FOR EACH ROW EXECUTE FUNCTION track_live_order();
+
+INSERT INTO live_orders (order_id, created_at, outlet_id, status, waiter_id)
+SELECT id, created_at, outlet_id, status, waiter_id
+FROM orders
+WHERE status IN ('Pending', 'Preparing', 'Ready')
+ON CONFLICT (order_id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION place_order(
+    p_channel_type TEXT,
+    p_table_no JSONB,
+    p_items JSONB,
+    p_settlement_mode TEXT,
+    p_outlet_id TEXT
+) RETURNS TABLE (order_id INT, waiter_id TEXT, total_price NUMERIC)
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_waiter_id employees.id%TYPE;
+    v_total NUMERIC;
+    v_order_id INT;
+BEGIN
+    IF p_channel_type <> 'Takeaway' THEN
+        PERFORM pg_advisory_xact_lock(hashtext('place_order:waiter:' || p_outlet_id));
+
+        -- A waiter's load is their live orders, however old: the same set as
+        -- their open allocations (released on Served or Cancelled), plus the
+        -- ones still queued, so back-to-back orders spread out before the
+        -- outbox worker catches up
+        SELECT e.id INTO v_waiter_id
+        FROM employees e
+        LEFT JOIN live_orders l ON l.outlet_id = p_outlet_id AND l.waiter_id = e.id
+        WHERE e.role = 'waiter' AND e.outlet_id = p_outlet_id
+        GROUP BY e.id
+        ORDER BY COUNT(l.order_id) ASC, e.created_at, e.id
+        LIMIT 1;
+
+        IF v_waiter_id IS NULL THEN
+            RETURN QUERY SELECT NULL::INT, NULL::TEXT, NULL::NUMERIC;
+            RETURN;
+        END IF;
+    END IF;
+
+    -- Per line: base + tax on base + one packaging charge (unknown SKUs are skipped)
+    SELECT ROUND(COALESCE(SUM(
+        i.price * i.quantity * (1 + m.tax_percentage / 100) + m.packaging_charge
+    ), 0), 2) INTO v_total
+    FROM jsonb_to_recordset(p_items) AS i(sku TEXT, quantity INT, price NUMERIC)
+    JOIN menu m ON m.sku = i.sku AND m.outlet_id = p_outlet_id;
+
+    INSERT INTO orders (created_at, channel_type, table_no, items, price, settlement_mode, waiter_id, outlet_id)
+    VALUES (NOW(), p_channel_type, p_table_no, p_items, v_total, p_settlement_mode, v_waiter_id, p_outlet_id)
+    RETURNING id INTO v_order_id;
+
+    INSERT INTO outbox (outlet_id, kind, payload)
+    SELECT p_outlet_id, kind, payload
+    FROM (VALUES
+        ('sales', jsonb_build_object('order_id', v_order_id, 'total', v_total)),
+        ('offer_counts', jsonb_build_object('order_id', v_order_id, 'day', CURRENT_DATE, 'items', p_items))
+    ) AS effects (kind, payload);
+
+    IF v_waiter_id IS NOT NULL THEN
+        INSERT INTO outbox (outlet_id, kind, payload)
+        VALUES (p_outlet_id, 'allocation', jsonb_build_object(
+            'order_id', v_order_id, 'waiter_id', v_waiter_id, 'table_no', p_table_no, 'created_at', NOW()));
+    END IF;
+
+    -- One queued refresh per outlet is enough: it reads the pending orders
+    -- when it runs. A claimed one may already have read them, so it doesn't
+    -- count. /group_orders recomputes if one still comes out stale.
+    INSERT INTO outbox (outlet_id, kind)
+    SELECT p_outlet_id, 'grouping'
+    WHERE NOT EXISTS (
+        SELECT 1 FROM outbox q
+        WHERE q.outlet_id = p_outlet_id AND q.kind = 'grouping'
+          AND q.failed_at IS NULL AND q.claimed_at IS NULL
+    );
+
+    -- kitchen.backlog_event(): invalidate the kitchen schedule on every worker,
+    -- delivered only if this order commits (shared_state.py listens)
+    PERFORM pg_notify('app_state', json_build_object('key', 'kitchen_backlog:' || p_outlet_id)::text);
+
+    RETURN QUERY SELECT v_order_id, v_waiter_id::TEXT, v_total;
+END;
+$$;
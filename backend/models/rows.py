@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Optional
+
+# Compact row types built straight from cursor rows. Field order matches the
+# explicit column projection of the query that produces each row, so a tuple
+# row can be splatted positionally without building an intermediate dict.
+
+
+@dataclass(slots=True)
+class MenuAdminRow:
+    """Row shape served by /menu-for-admin (keeps the legacy "price"/"SKU" keys)."""
+    id: int
+    name: str
+    category: str
+    sub_category: str
+    tax_percentage: Decimal
+    price: Decimal  # packaging_charge, kept under the key the frontend reads
+    SKU: str
+    variations: dict
+    created_at: datetime
+    description: Optional[str]
+    image_url: Optional[str]
+    preparation_time: Optional[int]
+
+
+@dataclass(slots=True)
+class CompanyRow:
+    created_at: datetime
+    sales: Decimal
+
+
+@dataclass(slots=True)
+class AllocationRow:
+    allocation_id: int
+    created_at: datetime
+    table_no: Any
+    waiter_id: Any
+    waiter_name: str
+    ordered_items: Optional[list]
+
+
+@dataclass(slots=True)
+class OrderManagementRow:
+    order_id: int
+    created_at: datetime
+    channel_type: str
+    items: list
+    price: Decimal
+    settlement_mode: str
+    waiter_id: Any
+    assigned_tables: Optional[list]
+    status: str
+
+
+@dataclass(slots=True)
+class KitchenBacklogRow:
+    order_id: int
+    created_at: datetime
+    channel_type: str
+    sku: str
+    quantity: int
+    name: str
+    station: Optional[str]
+    preparation_time: Optional[int]
@@ -0,0 +1,228 @@
+"""
+Write-behind worker for the side effects of placing an order.
+
+place_order() commits the order together with one `outbox` row per side
+effect (migrations/006_outbox.sql); this worker applies them afterwards, in
+batches of up to OUTBOX_BATCH_SIZE per shard:
+- sales, allocation and offer_counts rows are applied with one statement per
+  kind, in the same transaction that deletes them. A kind whose batch fails
+  is retried one row at a time, so a bad row doesn't hold the rest back.
+- grouping rows re-run the LLM grouping of the outlet's pending orders
+  every GROUPING_REFRESH_SECONDS, on a thread of their own so a slow LLM
+  call doesn't hold up the rest. They are claimed for GROUPING_CLAIM_SECONDS
+  in a transaction of their own. The LLM runs with no transaction open, and
+  the row is then deleted (or retried) in another short one.
+A failed row is retried after OUTBOX_RETRY_SECONDS * 2^attempts and parked
+(failed_at set) after OUTBOX_MAX_ATTEMPTS. Delivery is at least once: a
+worker dying mid-batch leaves its rows to be claimed again, and a grouping
+refresh whose claim expires before it is settled only runs again.
+
+Every API process runs a worker (OUTBOX_WORKER=0 turns it off, e.g. to run
+`python outbox.py` on its own instead); claims use SKIP LOCKED, so they share
+the queue. The memory backend applies side effects inline and has no queue.
+"""
+import argparse
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from backends import BACKEND
+from database import OutboxDatabase, shards
+from grouping import grouped_orders
+
+BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "0.5"))
+MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+RETRY_SECONDS = float(os.getenv("OUTBOX_RETRY_SECONDS", "1"))
+GROUPING_REFRESH_SECONDS = float(os.getenv("GROUPING_REFRESH_SECONDS", "30"))
+GROUPING_CLAIM_SECONDS = float(os.getenv("GROUPING_CLAIM_SECONDS", "300"))
+ENABLED = os.getenv("OUTBOX_WORKER", "1") != "0"
+
+SALES = "sales"
+ALLOCATION = "allocation"
+OFFER_COUNTS = "offer_counts"
+GROUPING = "grouping"
+
+# Kinds applied in SQL, and the OutboxDatabase method applying a batch of each
+HANDLERS = {
+    SALES: "apply_sales",
+    ALLOCATION: "apply_allocations",
+    OFFER_COUNTS: "apply_offer_counts",
+}
+
+
+class OutboxWorker:
+    def __init__(self, batch_size=BATCH_SIZE, poll_seconds=POLL_SECONDS, max_attempts=MAX_ATTEMPTS,
+                 retry_seconds=RETRY_SECONDS, grouping_refresh_seconds=GROUPING_REFRESH_SECONDS,
+                 grouping_claim_seconds=GROUPING_CLAIM_SECONDS):
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.grouping_refresh_seconds = grouping_refresh_seconds
+        self.grouping_claim_seconds = grouping_claim_seconds
+        self._stop = threading.Event()
+        self._threads = []
+        self.processed = 0
+        self.retried = 0
+        self.last_error = None
+        self.last_batch_at = None
+
+    def _apply(self, db, method, jobs):
+        """Apply jobs under a savepoint. Returns the error, or None once applied."""
+        db.savepoint()
+        try:
+            getattr(db, method)(jobs)
+        except Exception as e:
+            db.rollback_to_savepoint()
+            return str(e)
+        db.release_savepoint()
+        return None
+
+    def _fail(self, db, ids, error):
+        db.retry(ids, error, self.max_attempts, self.retry_seconds)
+        self.retried += len(ids)
+        self.last_error = error
+
+    def run_once(self, shard):
+        """Claim and apply one batch of the shard's SQL side effects. Returns the number of rows claimed."""
+        db = OutboxDatabase(shard)
+        try:
+            jobs = db.claim(HANDLERS, self.batch_size)
+            by_kind = {}
+            for job in jobs:
+                by_kind.setdefault(job["kind"], []).append(job)
+            done = []
+            for kind, kind_jobs in by_kind.items():
+                if self._apply(db, HANDLERS[kind], kind_jobs) is None:
+                    done.extend(job["id"] for job in kind_jobs)
+                    continue
+                for job in kind_jobs:
+                    error = self._apply(db, HANDLERS[kind], [job])
+                    if error is None:
+                        done.append(job["id"])
+                    else:
+                        print(f"Error applying outbox {kind} row {job['id']}:", error)
+                        self._fail(db, [job["id"]], error)
+            if done:
+                db.delete(done)
+            db.conn.commit()
+            self.processed += len(done)
+            if jobs:
+                self.last_batch_at = time.time()
+            return len(jobs)
+        finally:
+            db.close()
+
+    def refresh_groupings(self, shard):
+        """Refresh the grouping of every outlet with a queued grouping row."""
+        db = OutboxDatabase(shard)
+        try:
+            jobs = db.claim_leased(GROUPING, self.batch_size, self.grouping_claim_seconds)
+        finally:
+            db.close()
+        by_outlet = {}
+        for job in jobs:
+            by_outlet.setdefault(job["outlet_id"], []).append(job["id"])
+        for outlet_id, ids in by_outlet.items():
+            try:
+                grouped_orders(outlet_id)
+                error = None
+            except Exception as e:
+                print(f"Error refreshing order groups for {outlet_id}:", e)
+                error = str(e)
+            db = OutboxDatabase(shard)
+            try:
+                if error is None:
+                    db.delete(ids)
+                    self.processed += len(ids)
+                else:
+                    self._fail(db, ids, error)
+                db.conn.commit()
+            finally:
+                db.close()
+        return len(jobs)
+
+    def drain(self, shard):
+        """Apply the shard's due SQL side effects until a batch comes back short."""
+        while self.run_once(shard) >= self.batch_size and not self._stop.is_set():
+            pass
+
+    def _run(self, step, interval):
+        while not self._stop.is_set():
+            for shard in list(shards.pools):
+                try:
+                    step(shard)
+                except Exception as e:
+                    # e.g. the shard is down; its rows wait in the queue
+                    self.last_error = str(e)
+                    print(f"Error draining outbox on shard {shard}:", e)
+            self._stop.wait(interval)
+
+    def start(self):
+        if not any(thread.is_alive() for thread in self._threads):
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._run, args=(self.drain, self.poll_seconds),
+                                 name="outbox-worker", daemon=True),
+                threading.Thread(target=self._run, args=(self.refresh_groupings, self.grouping_refresh_seconds),
+                                 name="outbox-grouping", daemon=True),
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue lag per shard and kind, plus this process's worker counters."""
+        if BACKEND != "postgres":
+            return {"backend": BACKEND, "inline": True}
+        lag, errors = {}, {}
+        for shard in shards.pools:
+            db = OutboxDatabase(shard)
+            try:
+                lag[shard] = db.lag()
+            except Exception as e:
+                errors[shard] = str(e)
+            finally:
+                db.close()
+        pending = [kind for kinds in lag.values() for kind in kinds.values() if kind["pending"]]
+        return {
+            "backend": BACKEND,
+            "worker_running": any(thread.is_alive() for thread in self._threads),
+            "max_lag_seconds": max((kind["oldest_seconds"] for kind in pending), default=0.0),
+            "pending": sum(kind["pending"] for kind in pending),
+            "shards": lag,
+            "errors": errors,
+            "processed": self.processed,
+            "retried": self.retried,
+            "last_error": self.last_error,
+            "last_batch_at": self.last_batch_at,
+        }
+
+
+worker = OutboxWorker()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply queued order side effects from the outbox.")
+    parser.add_argument("--once", action="store_true", help="drain every shard once, grouping included, then exit")
+    args = parser.parse_args()
+    if args.once:
+        for shard in shards.pools:
+            worker.drain(shard)
+            worker.refresh_groupings(shard)
+        print(worker.stats())
+        return
+    worker.start()
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Outlet scoping and cross-outlet reports.
+
+Every request acts for one outlet, named by the X-Outlet-Id header
+(DEFAULT_OUTLET_ID when absent); routes take it through `current_outlet`
+and pass it to the *Database classes, which route to the outlet's shard.
+An outlet must be registered (POST /api/outlets) before requests can act
+for it, so per-outlet state (schedulers, snapshots, memory stores) is only
+ever created for real outlets. Registered ids are cached per process;
+outlets are never removed, so the cache never goes stale.
+
+Reports over several outlets run one query per outlet on a thread pool, so
+each shard is read in parallel, then merge the results. An outlet that fails
+is listed under "errors" instead of failing the whole report.
+"""
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import Header, HTTPException
+
+from backends import SHARD_NAMES, CompanyDatabase, OrderDatabase, OutletDatabase
+from database import DEFAULT_OUTLET
+
+FAN_OUT_WORKERS = int(os.getenv("REPORT_FAN_OUT_WORKERS", "8"))
+
+_OUTLET_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+_executor = ThreadPoolExecutor(max_workers=FAN_OUT_WORKERS, thread_name_prefix="outlet-report")
+
+_registered = set()  # outlet ids known to exist
+_registered_lock = threading.Lock()
+
+
+def outlet_header(x_outlet_id: Optional[str] = Header(None)) -> str:
+    """Route dependency: the X-Outlet-Id outlet, checked for format only (for registering it)."""
+    outlet_id = x_outlet_id or DEFAULT_OUTLET
+    if not _OUTLET_ID.match(outlet_id):
+        raise HTTPException(status_code=400, detail=f"Invalid outlet id: {outlet_id!r}")
+    return outlet_id
+
+
+def remember_outlet(outlet_id):
+    with _registered_lock:
+        _registered.add(outlet_id)
+
+
+def is_registered(outlet_id) -> bool:
+    """Whether the outlet exists, asking its shard the first time."""
+    if outlet_id in _registered:
+        return True
+    db = OutletDatabase(outlet_id)
+    try:
+        found = db.has_outlet()
+    finally:
+        db.close()
+    if found:
+        remember_outlet(outlet_id)
+    return found
+
+
+def current_outlet(x_outlet_id: Optional[str] = Header(None)) -> str:
+    """Route dependency: the outlet this request acts for. 404 if it isn't registered."""
+    outlet_id = outlet_header(x_outlet_id)
+    if not is_registered(outlet_id):
+        raise HTTPException(status_code=404, detail=f"Unknown outlet: {outlet_id!r}")
+    return outlet_id
+
+
+def fan_out(keys, fetch: Callable[[str], Any]):
+    """Run fetch(key) for every key in parallel. Returns ({key: result}, {key: error})."""
+    futures = {key: _executor.submit(fetch, key) for key in keys}
+    results, errors = {}, {}
+    for key, future in futures.items():
+        try:
+            results[key] = future.result()
+        except Exception as e:
+            print(f"Error reading {key} for report:", e)
+            errors[key] = str(e)
+    return results, errors
+
+
+def _with(db_class, method, **kwargs):
+    db = db_class(**kwargs)
+    try:
+        return getattr(db, method)()
+    finally:
+        db.close()
+
+
+def known_outlets() -> List[Dict[str, Any]]:
+    """Every outlet registered on any shard."""
+    by_shard, errors = fan_out(SHARD_NAMES, lambda shard: _with(OutletDatabase, "list_outlets", shard=shard))
+    if errors:
+        raise HTTPException(status_code=503, detail={"shards_unavailable": errors})
+    return sorted((outlet for outlets in by_shard.values() for outlet in outlets), key=lambda outlet: outlet["id"])
+
+
+def _outlet_ids(outlets: Optional[str]) -> List[str]:
+    if not outlets:
+        return [outlet["id"] for outlet in known_outlets()]
+    outlet_ids = list(dict.fromkeys(outlet.strip() for outlet in outlets.split(",") if outlet.strip()))
+    for outlet_id in outlet_ids:
+        current_outlet(outlet_id)
+    return outlet_ids
+
+
+def _merge_settlement(summaries):
+    merged = {}
+    for summary in summaries:
+        for mode, totals in summary.items():
+            into = merged.setdefault(mode, {"total_orders": 0, "total_sales": 0.0, "commission_amount": 0.0})
+            for field, value in totals.items():
+                into[field] += value
+    return merged
+
+
+def _merge_order_counts(all_counts):
+    merged = {"total": 0, "by_status": {}, "by_channel": {}}
+    for counts in all_counts:
+        merged["total"] += counts["total"]
+        for group in ("by_status", "by_channel"):
+            for key, count in counts[group].items():
+                merged[group][key] = merged[group].get(key, 0) + count
+    return merged
+
+
+def _report(outlets, db_class, method, merge):
+    outlet_ids = _outlet_ids(outlets)
+    by_outlet, errors = fan_out(outlet_ids, lambda outlet_id: _with(db_class, method, outlet_id=outlet_id))
+    return {
+        "outlets": outlet_ids,
+        "total": merge(by_outlet.values()),
+        "by_outlet": by_outlet,
+        "errors": errors,
+    }
+
+
+def settlement_report(outlets: Optional[str] = None):
+    return _report(outlets, OrderDatabase, "get_settlement_summary", _merge_settlement)
+
+
+def order_counts_report(outlets: Optional[str] = None):
+    return _report(outlets, OrderDatabase, "get_order_counts", _merge_order_counts)
+
+
+def sales_report(outlets: Optional[str] = None):
+    """Latest running sales total per outlet, and their sum."""
+    def latest(outlet_id):
+        rows = _with(CompanyDatabase, "get_company_data", outlet_id=outlet_id)
+        return float(max(rows, key=lambda row: row.created_at).sales) if rows else 0.0
+    outlet_ids = _outlet_ids(outlets)
+    by_outlet, errors = fan_out(outlet_ids, latest)
+    return {"outlets": outlet_ids, "total": sum(by_outlet.values()), "by_outlet": by_outlet, "errors": errors}
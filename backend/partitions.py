@@ -0,0 +1,195 @@
+"""
+Monthly partition upkeep for `orders` and `allocations`
+(migrations/003_partition_orders.sql).
+
+maintain: creates the partitions for the coming months, then detaches every
+partition older than the retention window, writes it to
+<archive>/<partition>.csv.gz, checks the row count, and drops the table.
+A run that stops halfway is finished by the next one, because partitions
+that are already detached get archived too.
+
+restore: puts an archived month back as a partition of its table. The next
+`maintain` archives it again unless the retention window now covers it.
+
+Every shard (database.shards) is maintained; archives go to <archive>/<shard>/.
+
+Usage (from backend/), e.g. daily from cron:
+    python partitions.py maintain --archive-dir archive/
+    python partitions.py restore archive/default/orders_p202401.csv.gz --shard default
+    python partitions.py list
+"""
+import argparse
+import csv
+import gzip
+import io
+import os
+import re
+from datetime import date
+from pathlib import Path
+
+from psycopg2 import sql
+
+from database import DEFAULT_SHARD, shards
+
+PARTITIONED_TABLES = ("orders", "allocations")
+MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+RETAIN_MONTHS = {
+    "orders": int(os.getenv("ORDERS_RETAIN_MONTHS", "12")),
+    "allocations": int(os.getenv("ALLOCATIONS_RETAIN_MONTHS", "3")),
+}
+ARCHIVE_DIR = Path(os.getenv("PARTITION_ARCHIVE_DIR", "archive"))
+
+_PARTITION_NAME = re.compile(r"^(?P<parent>[a-z_]+)_p(?P<year>\d{4})(?P<month>\d{2})$")
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _parse_name(name):
+    """(parent, first day of month) for a monthly partition name, else None."""
+    match = _PARTITION_NAME.match(name)
+    if not match or match["parent"] not in PARTITIONED_TABLES:
+        return None
+    return match["parent"], date(int(match["year"]), int(match["month"]), 1)
+
+
+def list_partitions(cursor, parent):
+    """[(name, month, attached)] for the monthly tables of `parent`, oldest first."""
+    cursor.execute("""
+    SELECT c.relname, EXISTS (
+        SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid AND i.inhparent = %s::regclass
+    ) AS attached
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = current_schema() AND c.relkind = 'r' AND c.relname LIKE %s
+    ORDER BY c.relname;
+    """, (parent, f"{parent}\\_p%"))
+    partitions = []
+    for name, attached in cursor.fetchall():
+        parsed = _parse_name(name)
+        if parsed and parsed[0] == parent:
+            partitions.append((name, parsed[1], attached))
+    return partitions
+
+
+def archive_partition(conn, parent, name, archive_dir: Path) -> int:
+    """Detach `name` if needed, copy it to <archive_dir>/<name>.csv.gz, then drop it."""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_inherits WHERE inhrelid = %s::regclass;", (name,))
+        if cursor.fetchone():
+            cursor.execute(sql.SQL("ALTER TABLE {} DETACH PARTITION {};").format(
+                sql.Identifier(parent), sql.Identifier(name)))
+            conn.commit()
+
+        cursor.execute(sql.SQL("SELECT COUNT(*) FROM {};").format(sql.Identifier(name)))
+        expected = cursor.fetchone()[0]
+
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        target = archive_dir / f"{name}.csv.gz"
+        tmp = archive_dir / f"{name}.csv.gz.tmp"
+        with gzip.open(tmp, "wb") as out:
+            cursor.copy_expert(
+                sql.SQL("COPY {} TO STDOUT WITH (FORMAT csv, HEADER)").format(sql.Identifier(name)), out)
+        with gzip.open(tmp, "rt", newline="") as written:
+            archived = sum(1 for _ in csv.reader(written)) - 1  # minus the header
+        if archived != expected:
+            tmp.unlink()
+            raise RuntimeError(f"{name}: archived {archived} rows, expected {expected}; table kept")
+        os.replace(tmp, target)
+
+        cursor.execute(sql.SQL("DROP TABLE {};").format(sql.Identifier(name)))
+        conn.commit()
+    return expected
+
+
+def maintain(pool, archive_dir: Path = ARCHIVE_DIR, months_ahead: int = MONTHS_AHEAD, today: date = None):
+    today = today or date.today()
+    conn = pool.acquire()
+    try:
+        with conn.cursor() as cursor:
+            for parent in PARTITIONED_TABLES:
+                cursor.execute("SELECT ensure_monthly_partitions(%s, CURRENT_DATE, %s);", (parent, months_ahead))
+            conn.commit()
+
+        for parent in PARTITIONED_TABLES:
+            # Partitions ending on or before this month are out of the window
+            cutoff = _add_months(today.replace(day=1), -RETAIN_MONTHS[parent])
+            with conn.cursor() as cursor:
+                expired = [name for name, month, _ in list_partitions(cursor, parent)
+                           if _add_months(month, 1) <= cutoff]
+            conn.rollback()
+            for name in expired:
+                rows = archive_partition(conn, parent, name, archive_dir)
+                print(f"Archived {name}: {rows} rows -> {archive_dir / (name + '.csv.gz')}")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.release(conn)
+
+
+def restore(pool, path: Path):
+    name = path.name.split(".", 1)[0]
+    parsed = _parse_name(name)
+    if parsed is None:
+        raise SystemExit(f"{path.name} is not a <table>_pYYYYMM.csv.gz archive")
+    parent, month = parsed
+
+    conn = pool.acquire()
+    try:
+        with conn.cursor() as cursor, gzip.open(path, "rt", newline="") as archive:
+            cursor.execute(sql.SQL(
+                "CREATE TABLE IF NOT EXISTS {} PARTITION OF {} FOR VALUES FROM (%s) TO (%s);"
+            ).format(sql.Identifier(name), sql.Identifier(parent)), (month, _add_months(month, 1)))
+            cursor.execute(sql.SQL("SELECT EXISTS (SELECT 1 FROM {});").format(sql.Identifier(name)))
+            if cursor.fetchone()[0]:
+                raise SystemExit(f"{name} already has rows; not restoring over them")
+
+            columns = next(csv.reader(io.StringIO(archive.readline())))
+            cursor.copy_expert(sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+                sql.Identifier(name), sql.SQL(", ").join(map(sql.Identifier, columns))), archive)
+            restored = cursor.rowcount
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        pool.release(conn)
+    print(f"Restored {restored} rows into {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create, archive and restore monthly order partitions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    maintain_cmd = commands.add_parser("maintain", help="create upcoming partitions and archive expired ones")
+    maintain_cmd.add_argument("--archive-dir", type=Path, default=ARCHIVE_DIR)
+    maintain_cmd.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD)
+    restore_cmd = commands.add_parser("restore", help="load an archived partition back")
+    restore_cmd.add_argument("archive", type=Path)
+    restore_cmd.add_argument("--shard", default=DEFAULT_SHARD, choices=sorted(shards.pools))
+    commands.add_parser("list", help="show monthly partitions")
+    args = parser.parse_args()
+
+    if args.command == "restore":
+        restore(shards.pools[args.shard], args.archive)
+        return
+    for shard, pool in shards.pools.items():
+        print(f"Shard {shard}")
+        if args.command == "maintain":
+            maintain(pool, args.archive_dir / shard, args.months_ahead)
+            continue
+        conn = pool.acquire()
+        try:
+            with conn.cursor() as cursor:
+                for parent in PARTITIONED_TABLES:
+                    for name, month, attached in list_partitions(cursor, parent):
+                        print(f"  {name:<24} {month:%Y-%m}  {'attached' if attached else 'DETACHED'}")
+            conn.rollback()
+        finally:
+            pool.release(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+On-demand request profiling.
+
+Nothing is profiled until asked for, in one of two ways:
+- arm(count, path_prefix): the next `count` requests under `path_prefix`,
+  counted across all workers (through shared_state), get profiled. This is
+  what POST /api/admin/profile does.
+- A request carrying `X-Profile: <PROFILE_TOKEN>` is profiled. This only
+  works when PROFILE_TOKEN is set.
+The /api/admin/profile* endpoints require `X-Profile-Token: <PROFILE_TOKEN>`
+and are off (403) while PROFILE_TOKEN is unset.
+
+For each profiled request, the route function runs under cProfile while a
+sampler thread records its stack every PROFILE_SAMPLE_MS. Frames of
+*Database methods are tagged "[db]". Spans time every *Database method,
+SQL statement, JSON encode and Groq call. Three files are written to
+PROFILE_DIR:
+- <id>.json: timings per category and the span list
+- <id>.pstats: load it with pstats or snakeviz
+- <id>.folded: collapsed stacks for flamegraph.pl or speedscope
+
+When nothing is armed and no token is set, a request costs one attribute
+check in ProfilingMiddleware and one context-variable read per span.
+"""
+import contextvars
+import cProfile
+import functools
+import hmac
+import inspect
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+SAMPLE_SECONDS = float(os.getenv("PROFILE_SAMPLE_MS", "2")) / 1000
+MAX_SPANS = 2000
+# Shared-state key holding {"remaining": n, "path": prefix} while armed
+ARM_KEY = "profile_requests"
+
+_current = contextvars.ContextVar("request_profile", default=None)
+_ids = itertools.count(1)
+# cProfile allows one active profiler per thread (per process from 3.12 on)
+_cprofile_lock = threading.Lock()
+
+
+class RequestProfile:
+    def __init__(self, method, path):
+        started = datetime.now(timezone.utc)
+        self.id = f"{started:%Y%m%dT%H%M%S}-{os.getpid()}-{next(_ids)}"
+        self.method = method
+        self.path = path
+        self.started_at = started
+        self.started = time.perf_counter()
+        self.status = None
+        self.total_ms = None
+        self.endpoint_ms = 0.0
+        self.spans = []
+        self.stacks = Counter()
+        self.samples = 0
+        self.stats = None
+        self._threads = set()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name=f"profile-{self.id}", daemon=True)
+        self._sampler.start()
+
+    def add_span(self, category, name, started, ended):
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append({
+                "category": category,
+                "name": name,
+                "start_ms": round((started - self.started) * 1000, 3),
+                "duration_ms": round((ended - started) * 1000, 3),
+            })
+
+    def _sample(self):
+        while not self._stop.wait(SAMPLE_SECONDS):
+            frames = sys._current_frames()
+            for thread_id in list(self._threads):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self.stacks[_fold(frame)] += 1
+                    self.samples += 1
+
+    def run_endpoint(self, call, *args, **kwargs):
+        """Run a sync route function on this thread under cProfile and the sampler."""
+        thread_id = threading.get_ident()
+        self._threads.add(thread_id)
+        profiler = cProfile.Profile() if _cprofile_lock.acquire(blocking=False) else None
+        started = time.perf_counter()
+        try:
+            if profiler is None:
+                return call(*args, **kwargs)
+            profiler.enable()
+            try:
+                return call(*args, **kwargs)
+            finally:
+                profiler.disable()
+                _cprofile_lock.release()
+                self.stats = profiler
+        finally:
+            self.endpoint_ms += (time.perf_counter() - started) * 1000
+            self._threads.discard(thread_id)
+
+    def finish(self, status):
+        self._stop.set()
+        self._sampler.join()
+        self.status = status
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+
+    def summary(self):
+        by_category = Counter()
+        for span in self.spans:
+            by_category[span["category"]] += span["duration_ms"]
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "total_ms": round(self.total_ms, 3),
+            "endpoint_ms": round(self.endpoint_ms, 3),
+            # Routing, validation, encoding of dict responses and sending, on the event loop
+            "outside_endpoint_ms": round(self.total_ms - self.endpoint_ms, 3),
+            "by_category_ms": {category: round(ms, 3) for category, ms in by_category.items()},
+            "samples": self.samples,
+            "sample_interval_ms": SAMPLE_SECONDS * 1000,
+            "spans": self.spans,
+        }
+
+    def write(self, directory: Path = PROFILE_DIR):
+        """Write <id>.json, <id>.folded and (if cProfile ran) <id>.pstats; returns the summary."""
+        directory.mkdir(parents=True, exist_ok=True)
+        summary = self.summary()
+        summary["artifacts"] = [f"{self.id}.json", f"{self.id}.folded"]
+        with open(directory / f"{self.id}.folded", "w") as folded:
+            for stack, count in self.stacks.most_common():
+                folded.write(f"{stack} {count}\n")
+        if self.stats is not None:
+            self.stats.dump_stats(str(directory / f"{self.id}.pstats"))
+            summary["artifacts"].append(f"{self.id}.pstats")
+        (directory / f"{self.id}.json").write_text(json.dumps(summary, indent=2))
+        return summary
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    owner = name.split(".", 1)[0]
+    if owner.endswith("Database") and "." in name:
+        return f"[db] {name}"
+    return f"{os.path.basename(code.co_filename)}:{name}"
+
+
+def _fold(frame):
+    names = []
+    while frame is not None:
+        if frame.f_code.co_filename != __file__:  # leave the profiler's own wrappers out
+            names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Span:
+    """Time a block as a span of the current request's profile, if any."""
+
+    __slots__ = ("category", "name", "profile", "started")
+
+    def __init__(self, category, name):
+        self.category = category
+        self.name = name
+
+    def __enter__(self):
+        self.profile = _current.get()
+        if self.profile is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profile is not None:
+            self.profile.add_span(self.category, self.name, self.started, time.perf_counter())
+
+
+def traced(category, name=None):
+    """Decorator: record each call as a `category` span while a profile is active."""
+    def decorate(function):
+        label = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profile = _current.get()
+            if profile is None:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profile.add_span(category, label, started, time.perf_counter())
+        return wrapper
+    return decorate
+
+
+def trace_methods(cls, category="db"):
+    """Wrap the public methods `cls` defines itself with traced(category)."""
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith("_") or attr == "close" or not inspect.isfunction(value):
+            continue
+        setattr(cls, attr, traced(category, f"{cls.__name__}.{attr}")(value))
+
+
+def profiled_endpoint(call):
+    """
+    Wrap a route function so that, in a profiled request, it runs under
+    RequestProfile.run_endpoint on the thread FastAPI gives it.
+    """
+    if inspect.iscoroutinefunction(call):
+        return call  # every route here is sync; async ones are covered by spans and the totals
+
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return call(*args, **kwargs)
+        return profile.run_endpoint(call, *args, **kwargs)
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """route_class for APIRouter: lets profiled requests run their route function under RequestProfile."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, profiled_endpoint(endpoint), **kwargs)
+
+
+class Arming:
+    """This worker's copy of the shared ARM_KEY value, kept current by shared_state."""
+
+    def __init__(self):
+        self.remaining = 0
+        self.path = None
+
+    def update(self, value):
+        value = value or {}
+        self.path = value.get("path")
+        self.remaining = int(value.get("remaining") or 0)
+
+    def matches(self, path):
+        return self.remaining > 0 and (not self.path or path.startswith(self.path))
+
+
+arming = Arming()
+
+
+def token_matches(supplied, token=PROFILE_TOKEN) -> bool:
+    """Constant-time check of a supplied token (str or bytes) against PROFILE_TOKEN."""
+    if not token or not supplied:
+        return False
+    if isinstance(supplied, str):
+        supplied = supplied.encode()
+    if isinstance(token, str):
+        token = token.encode()
+    return hmac.compare_digest(supplied, token)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that starts a RequestProfile for armed or token-carrying requests."""
+
+    def __init__(self, app, shared_state, directory: Path = PROFILE_DIR, token=PROFILE_TOKEN):
+        self.app = app
+        self.shared_state = shared_state
+        self.directory = directory
+        self.token = token.encode() if token else None
+        shared_state.subscribe(ARM_KEY, arming.update)
+
+    async def _wanted(self, scope):
+        if self.token is not None and any(
+            name == b"x-profile" and token_matches(value, self.token) for name, value in scope["headers"]
+        ):
+            return True
+        # Only claim a slot when this worker's copy says one may be left
+        return arming.matches(scope["path"]) and await run_in_threadpool(self.shared_state.take, ARM_KEY)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (arming.remaining or self.token) or not await self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        status = {}
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        token = _current.set(profile)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _current.reset(token)
+            profile.finish(status.get("code"))
+            try:
+                await run_in_threadpool(profile.write, self.directory)
+            except Exception as e:
+                print(f"Error writing profile {profile.id}:", e)
+
+
+def arm(shared_state, count, path=None):
+    """Profile the next `count` requests whose path starts with `path` (any path if None), across workers."""
+    return shared_state.set(ARM_KEY, {"remaining": count, "path": path})
+
+
+def list_profiles(directory: Path = PROFILE_DIR):
+    """Summaries of the written profiles, newest first (without their span lists)."""
+    summaries = []
+    for path in sorted(directory.glob("*.json"), reverse=True):
+        try:
+            summary = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        summary.pop("spans", None)
+        summaries.append(summary)
+    return summaries
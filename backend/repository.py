@@ -0,0 +1,136 @@
+"""
+Repository interfaces for the *Database classes.
+
+database.py implements them on Postgres. memory_store.py implements them on
+in-process dicts for hermetic benchmarks and demo/kiosk deployments. Routes
+and background services get their classes from backends.py, so they work
+with either one. Both implementations return the same row shapes: dicts,
+tuples or the dataclasses in models/rows.py, as documented below.
+
+Instances act for one outlet, given as the first constructor argument
+(`OrderDatabase(outlet_id)`; DEFAULT_OUTLET when omitted), and only ever see
+that outlet's rows.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Protocol, runtime_checkable
+
+from models.rows import AllocationRow, CompanyRow, KitchenBacklogRow, MenuAdminRow, OrderManagementRow
+
+
+@runtime_checkable
+class Repository(Protocol):
+    def close(self) -> None:
+        """Release whatever the instance holds (a pooled connection, or nothing)."""
+
+
+@runtime_checkable
+class OutletRepository(Repository, Protocol):
+    def list_outlets(self) -> List[Dict[str, Any]]:
+        """id and name of every outlet this instance's shard hosts."""
+
+    def add_outlet(self, name: str) -> Dict[str, Any]:
+        """Register this instance's outlet (on the shard that will hold it)."""
+
+    def has_outlet(self) -> bool:
+        """Whether this instance's outlet is registered on its shard."""
+
+
+@runtime_checkable
+class CompanyRepository(Repository, Protocol):
+    def get_company_data(self, since: Optional[datetime] = None) -> List[CompanyRow]:
+        """Every running sales total (or those from `since` on), oldest first."""
+
+
+@runtime_checkable
+class SnapshotRepository(Repository, Protocol):
+    """The outlet's shared dashboard snapshot (snapshot.py)."""
+
+    def load_snapshot(self) -> Optional[Dict[str, Any]]:
+        """generated_at and payload of the stored snapshot, or None."""
+
+    def try_lock_refresh(self) -> bool:
+        """Claim the rebuild until save_snapshot() or close(); False while another worker holds it."""
+
+    def save_snapshot(self, generated_at: datetime, payload: Dict[str, Any]) -> None: ...
+
+
+@runtime_checkable
+class UserRepository(Repository, Protocol):
+    def create_user(self, name: str, email: str, password: str, role: str = "customer") -> str:
+        """Store a user with a bcrypt-hashed password and return the new id."""
+
+    def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """id, name, email, password (hash), role and created_at, or None."""
+
+    def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """id, name, email, role and created_at, or None."""
+
+    def login_user(self, email: str, password: str) -> Optional[Dict[str, Any]]:
+        """The user without the password hash if the password matches, else None."""
+
+
+@runtime_checkable
+class MenuRepository(Repository, Protocol):
+    def get_all_menu_items(self) -> List[tuple]:
+        """Menu rows as tuples in MENU_COLUMNS order (the admin page reads them positionally)."""
+
+    def get_menu_for_admin(self) -> List[MenuAdminRow]: ...
+
+    def generate_sku(self, sub_category: str) -> Optional[str]:
+        """First three letters of the sub-category plus (items in it + 1), e.g. "STA004"."""
+
+    def add_menu_item(self, name, category, sub_category, tax_percentage, packaging_charge,
+                      description, variations, image_url) -> str: ...
+
+    def delete_menu_item(self, sku: str) -> None: ...
+
+    def edit_menu_item(self, sku: str, **updates) -> str: ...
+
+
+@runtime_checkable
+class OfferRepository(Repository, Protocol):
+    def get_offer_item(self) -> Optional[Dict[str, Any]]:
+        """The menu item ordered least today (newest item on ties), with total_ordered."""
+
+
+@runtime_checkable
+class OrderRepository(Repository, Protocol):
+    def create_order(self, channel_type: str, table_numbers: List[str], items: List[dict],
+                     settlement_mode: str) -> Dict[str, Any]:
+        """
+        Price the items from the menu, assign the waiter with the fewest open
+        allocations in the last day (none for Takeaway), record the order,
+        its allocation and the new running sales total. The Postgres backend
+        records the last two (and the offer counts) write-behind, through
+        outbox.py. Returns order_id, waiter_id and total_price, or
+        {"error": ...} when no waiter exists.
+        """
+
+    def transition_orders(self, order_ids: List[int], status: str) -> Dict[str, Any]:
+        """
+        Move orders to `status` where lifecycle.TRANSITIONS allows it; Served and
+        Cancelled release the waiter allocation. Returns status, updated,
+        rejected ([{order_id, status}]) and not_found. ValueError on an unknown status.
+        """
+
+    def get_allocations(self) -> List[AllocationRow]: ...
+
+    def get_order_management(self, since: Optional[datetime] = None,
+                             until: Optional[datetime] = None) -> List[OrderManagementRow]:
+        """
+        Orders created in [since, until) when either is given, otherwise those
+        from the last ACTIVE_ORDER_DAYS plus every live order.
+        """
+
+    def get_settlement_summary(self) -> Dict[str, Dict[str, Any]]: ...
+
+    def get_order_counts(self) -> Dict[str, Any]: ...
+
+    def get_kitchen_backlog(self) -> List[KitchenBacklogRow]: ...
+
+    def get_pending_orders_with_details(self) -> List[Dict[str, Any]]: ...
+
+    def get_order_groups(self) -> Optional[Dict[str, Any]]:
+        """The last stored grouping (grouping.py): input_hash, groups and refreshed_at, or None."""
+
+    def save_order_groups(self, input_hash: str, groups: List[dict]) -> None: ...
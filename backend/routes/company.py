@@ -1,13 +1,20 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 
-from database import CompanyDatabase
+from admission import shed_under_load
+from backends import CompanyDatabase
+from outlets import current_outlet
+from profiling import ProfiledRoute
+from serialization import FastJSONResponse
 
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
-@router.get("/company_data")
-def company_data():
-    db = CompanyDatabase()
-    result = db.get_company_data()
-    return result
\ No newline at end of file
+@router.get("/company_data", dependencies=[Depends(shed_under_load)])
+def company_data(outlet_id: str = Depends(current_outlet)):
+    db = CompanyDatabase(outlet_id)
+    try:
+        result = db.get_company_data()
+        return FastJSONResponse(result)
+    finally:
+        db.close()
\ No newline at end of file
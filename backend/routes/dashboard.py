@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from outlets import current_outlet
+from profiling import ProfiledRoute
+from serialization import FastJSONResponse
+from snapshot import snapshots
+
+
+router = APIRouter(route_class=ProfiledRoute)
+
+@router.get("/dashboard/snapshot")
+def dashboard_snapshot(outlet_id: str = Depends(current_outlet)):
+    """The outlet's settlement totals, sales series, allocations and order counts from the last background refresh."""
+    snapshot = snapshots.get(outlet_id)
+    if snapshot is None:
+        # No snapshot yet: the build failed, or another worker is still running it
+        error = snapshots.last_errors.get(outlet_id)
+        raise HTTPException(
+            status_code=503,
+            detail=f"Dashboard snapshot unavailable: {error}" if error else "Dashboard snapshot is being built",
+            headers={"Retry-After": "5"},
+        )
+
+    age = snapshots.age_seconds(outlet_id)
+    return FastJSONResponse({
+        "outlet_id": outlet_id,
+        "generated_at": snapshot.generated_at,
+        "age_seconds": round(age, 3),
+        "stale": age > 2 * snapshots.refresh_seconds,
+        "refresh_interval": snapshots.refresh_seconds,
+        "settlement": snapshot.settlement,
+        "sales_series": snapshot.sales_series,
+        "allocations": snapshot.allocations,
+        "order_counts": snapshot.order_counts,
+    })
@@ -0,0 +1,56 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from ai_analyser import groq_status
+from backends import BACKEND
+from database import pool, replica, shards
+from outbox import worker as outbox_worker
+from profiling import ProfiledRoute
+from shared_state import shared_state
+from statements import registry
+
+
+router = APIRouter(route_class=ProfiledRoute)
+
+@router.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@router.get("/readyz")
+def readyz():
+    """
+    Readiness: only report ready once the default shard's pool is warm and
+    Postgres answers. Other shards are listed but don't gate readiness, so one
+    shard being down leaves the outlets on the rest serving.
+    """
+    if BACKEND == "memory":
+        database = {"backend": BACKEND, "warmed": True, "reachable": True}
+    else:
+        database = {"backend": BACKEND, **pool.stats()}
+        try:
+            database["reachable"] = pool.warmed and pool.ping()
+        except Exception as e:
+            database["reachable"] = False
+            database["last_error"] = str(e)
+
+    ready = database["warmed"] and database["reachable"]
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "database": database,
+        "replica": replica.stats(),
+        "shards": shards.stats() if BACKEND == "postgres" else {},
+        "shared_state": shared_state.stats(),
+        "groq": groq_status(),
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+@router.get("/stats/statements")
+def statement_stats():
+    """Prepare/execute counts per named statement in this worker."""
+    return registry.stats()
+
+@router.get("/stats/outbox")
+def outbox_stats():
+    """Outbox queue lag (pending rows and age of the oldest, per shard and kind) and this worker's counters."""
+    return outbox_worker.stats()
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends
+
+from kitchen import scheduler_for
+from outlets import current_outlet
+from profiling import ProfiledRoute
+from serialization import FastJSONResponse
+
+
+router = APIRouter(route_class=ProfiledRoute)
+
+@router.get("/kitchen/queue")
+def kitchen_queue(outlet_id: str = Depends(current_outlet)):
+    """The outlet's station work queues of batched SKUs and an ETA for every pending order."""
+    return FastJSONResponse(scheduler_for(outlet_id).get())
@@ -1,53 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException
 from models.menu import AddMenuItem, EditMenuItem
-from database import MenuDatabase2,MenuDatabase
+from backends import MenuDatabase2,MenuDatabase
 from pydantic import BaseModel
+from outlets import current_outlet
+from profiling import ProfiledRoute
+from serialization import FastJSONResponse
 
 # Initialize FastAPI router
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
-# Database instance
-db = MenuDatabase()
+def get_menu_db(outlet_id: str = Depends(current_outlet)):
+    """Per-request database handle for the request's outlet, returned to the pool afterwards."""
+    db = MenuDatabase(outlet_id)
+    try:
+        yield db
+    finally:
+        db.close()
 
 @router.get("/menu", response_model=list)
-async def get_menu_items():
+def get_menu_items(db: MenuDatabase = Depends(get_menu_db)):
     """Fetch all menu items."""
     menu_items = db.get_all_menu_items()
     if not menu_items:
         raise HTTPException(status_code=404, detail="No menu items found")
-    return menu_items
+    return FastJSONResponse(menu_items)
 
 
 @router.get("/menu-for-admin", response_model=list)
-async def get_menu_items():
+def get_menu_items(db: MenuDatabase = Depends(get_menu_db)):
     """Fetch all menu items."""
-    menu_items = db.get_all_menu_items()
+    menu_items = db.get_menu_for_admin()
     if not menu_items:
         raise HTTPException(status_code=404, detail="No menu items found")
-    
-    # Format the menu items as dictionaries to ensure correct structure
-    formatted_items = []
-    for item in menu_items:
-        formatted_items.append({
-            "id": item[0],  # Assuming item[0] is the id
-            "name": item[1],  # Assuming item[1] is the name
-            "category": item[2],  # Assuming item[2] is the category
-            "sub_category": item[3],  # Assuming item[3] is the sub_category
-            "tax_percentage": item[4],  # Assuming item[4] is tax_percentage
-            "price": item[5],  # Assuming item[5] is packaging_charge
-            "SKU": item[6],  # Assuming item[6] is SKU
-            "variations": item[7],  # Assuming item[7] is variations (dict)
-            "created_at": item[8],  # Assuming item[8] is created_at
-            "description": item[9],  # Assuming item[9] is description
-            "image_url": item[10]  # Assuming item[10] is image_url
-        })
-    
-    return formatted_items
+    return FastJSONResponse(menu_items)
  
  
 
 @router.post("/menu")
-async def add_menu_item(item: AddMenuItem):
+def add_menu_item(item: AddMenuItem, db: MenuDatabase = Depends(get_menu_db)):
     """Add a new menu item."""
     response = db.add_menu_item(
         name=item.name,
@@ -64,7 +54,7 @@ async def add_menu_item(item: AddMenuItem):
     return {"message": response}
 
 @router.put("/menu")
-async def edit_menu_item(item: EditMenuItem):
+def edit_menu_item(item: EditMenuItem, db: MenuDatabase = Depends(get_menu_db)):
     """Edit a menu item with dynamic updates."""
     updates = item.dict(exclude_unset=True)  # Ignore fields not provided
     response = db.edit_menu_item(item.sku, **updates)
@@ -73,7 +63,7 @@ async def edit_menu_item(item: EditMenuItem):
     return {"message": response}
 
 @router.delete("/menu/{sku}")
-async def delete_menu_item(sku: str):
+def delete_menu_item(sku: str, db: MenuDatabase = Depends(get_menu_db)):
     """Delete a menu item by SKU."""
     print(sku)
     response = db.delete_menu_item(sku)
@@ -93,9 +83,9 @@ class OfferItemResponse(BaseModel):
     variations: dict
     
 @router.get("/get_offer_item", response_model=OfferItemResponse)
-async def get_daily_promotion():
+def get_daily_promotion(outlet_id: str = Depends(current_outlet)):
     """Returns today's promotional item with essential details"""
-    db = MenuDatabase2()
+    db = MenuDatabase2(outlet_id)
     try:
         item = db.get_offer_item()
         if not item:
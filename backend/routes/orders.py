@@ -1,11 +1,19 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from typing import List
-from database import OrderDatabase
-from ai_analyser import club_orders
-import json
+from datetime import datetime, timezone
+from typing import List, Optional
+from backends import OrderDatabase
+from grouping import grouped_orders
+from kitchen import backlog_event
+from shared_state import shared_state
+from admission import NORMAL, controller, shed_under_load
+from lifecycle import STATUSES
+from outlets import current_outlet
+from profiling import ProfiledRoute
+from serialization import FastJSONResponse
+import os
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 class OrderItem(BaseModel):
     sku: str
@@ -17,12 +25,29 @@ class CreateOrderRequest(BaseModel):
     table_numbers: List[str]
     items: List[OrderItem]
     settlement_mode: str
-    
-company_load=False
+
+class StatusChange(BaseModel):
+    status: str
+
+class BulkStatusChange(StatusChange):
+    order_ids: List[int]
+
+def _transition(outlet_id, order_ids, status):
+    if status not in STATUSES:
+        raise HTTPException(status_code=400, detail=f"Unknown status {status}; expected one of {', '.join(STATUSES)}")
+    db = OrderDatabase(outlet_id)
+    try:
+        result = db.transition_orders(order_ids, status)
+    finally:
+        db.close()
+    if result["updated"]:
+        shared_state.publish(backlog_event(outlet_id))
+    return result
 
 @router.post("/create_order")
-def create_order(request: CreateOrderRequest):
-    db = OrderDatabase()
+def create_order(request: CreateOrderRequest, outlet_id: str = Depends(current_outlet)):
+    controller.admit_order(outlet_id, request.channel_type)
+    db = OrderDatabase(outlet_id)
     try:
         result = db.create_order(
             channel_type=request.channel_type,
@@ -32,83 +57,82 @@ def create_order(request: CreateOrderRequest):
         )
         if "error" in result:
             raise HTTPException(status_code=400, detail=result["error"])
+        # place_order() announced it to the other workers when it committed
+        shared_state.published(backlog_event(outlet_id))
         return result
     finally:
         db.close()
         
-@router.get("/get_allocations")
-def get_allocations():
-    db=OrderDatabase()
-    result=db.get_allocations()
+@router.post("/orders/status")
+def change_orders_status(request: BulkStatusChange, outlet_id: str = Depends(current_outlet)):
+    """
+    Move many orders at once, e.g. the kitchen starting or finishing a batch.
+    Orders that can't make the move are listed under "rejected" with their status.
+    """
+    return _transition(outlet_id, request.order_ids, request.status)
+
+@router.post("/orders/{order_id}/status")
+def change_order_status(order_id: int, request: StatusChange, outlet_id: str = Depends(current_outlet)):
+    """Move one order along its lifecycle (Pending → Preparing → Ready → Served → Settled, or Cancelled)."""
+    result = _transition(outlet_id, [order_id], request.status)
+    if result["not_found"]:
+        raise HTTPException(status_code=404, detail=f"Order {order_id} not found")
+    if result["rejected"]:
+        current = result["rejected"][0]["status"]
+        raise HTTPException(status_code=409, detail=f"Order {order_id} is {current} and can't move to {request.status}")
     return result
 
+@router.get("/get_allocations", dependencies=[Depends(shed_under_load)])
+def get_allocations(outlet_id: str = Depends(current_outlet)):
+    db=OrderDatabase(outlet_id)
+    try:
+        result=db.get_allocations()
+        return FastJSONResponse(result)
+    finally:
+        db.close()
+
 @router.get("/toggle_company_load")
-def toggle_company_load():
-    global company_load
-    if(company_load==False):
-        company_load=True
+def toggle_company_load(outlet_id: str = Depends(current_outlet)):
+    """Flip the outlet's manual load-mode override for every worker."""
+    if controller.toggle_override(outlet_id):
         return {"message":"Company load enabled"}
-    else:
-        company_load=False
-        return {"message":"Company load disabled"}
+    return {"message":"Company load disabled"}
     
 @router.get("/is_company_load")
-def is_company_load():
-    global company_load
-    return {"company_load":company_load}
+def is_company_load(outlet_id: str = Depends(current_outlet)):
+    """Load mode is on when forced manually or when live signals say the outlet's kitchen is busy."""
+    status = controller.status(outlet_id)
+    return {"company_load": status["level"] != NORMAL, **status, "worker": os.getpid()}
+
+
+def _utc(value):
+    """Query-string datetimes without an offset are taken as UTC."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
 
 
 @router.get("/get_order_management")
-def get_orders():
-    db=OrderDatabase()
-    result=db.get_order_management()
-    return result
+def get_orders(since: Optional[datetime] = None, until: Optional[datetime] = None,
+               outlet_id: str = Depends(current_outlet)):
+    # Without since/until: the last ACTIVE_ORDER_DAYS plus every live order
+    since, until = _utc(since), _utc(until)
+    if since and until and since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    db=OrderDatabase(outlet_id)
+    try:
+        result=db.get_order_management(since, until)
+        return FastJSONResponse(result)
+    finally:
+        db.close()
 
 
 @router.get("/group_orders")
-def group_orders():
-    db = OrderDatabase()
+def group_orders(outlet_id: str = Depends(current_outlet)):
+    # Served from order_groups while the pending orders are unchanged; the
+    # outbox worker refreshes it in the background after new orders
     try:
-        # Step 1: Retrieve pending orders with SKU details
-        pending_orders = db.get_pending_orders_with_details()
-        
-        # Step 2: Transform the data into the format required by club_orders
-        order_dict = {}
-        for item in pending_orders:
-            order_id = item["order_id"]
-            sku = item["sku"]
-            sku_name = item["sku_name"]  # Include SKU name
-            sku_description = item["sku_description"]
-            
-            if order_id not in order_dict:
-                order_dict[order_id] = {"skus": [], "sku_names": [], "sku_descriptions": []}
-            
-            order_dict[order_id]["skus"].append(sku)
-            order_dict[order_id]["sku_names"].append(sku_name)  # Add SKU name
-            order_dict[order_id]["sku_descriptions"].append(sku_description)
-        
-        # Convert the dictionary into a list of dictionaries
-        order_data = [
-            {
-                "order_id": order_id,
-                "skus": details["skus"],
-                "sku_names": details["sku_names"],  # Include SKU names
-                "sku_descriptions": details["sku_descriptions"]
-            }
-            for order_id, details in order_dict.items()
-        ]
-        
-        print("Transformed order_data for club_orders:", json.dumps(order_data, indent=2))  # Debugging log
-        
-        # Step 3: Call club_orders with the transformed data
-        grouped_orders = club_orders(order_data)
-        
-        # Return the grouped orders as the API response
-        return grouped_orders
-    
+        return grouped_orders(outlet_id)
     except Exception as e:
         print("Error grouping orders:", str(e))  # Debugging log
         raise HTTPException(status_code=500, detail=f"Error grouping orders: {str(e)}")
-    
-    finally:
-        db.close()
\ No newline at end of file
@@ -0,0 +1,53 @@
+import re
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+
+from profiling import PROFILE_DIR, PROFILE_TOKEN, ProfiledRoute, arm, arming, list_profiles, token_matches
+from serialization import FastJSONResponse
+from shared_state import shared_state
+
+
+def require_profile_token(x_profile_token: Optional[str] = Header(None)):
+    """Router dependency: the admin profiling endpoints need PROFILE_TOKEN."""
+    if PROFILE_TOKEN is None:
+        raise HTTPException(status_code=403, detail="Profiling is disabled; set PROFILE_TOKEN to enable it")
+    if not token_matches(x_profile_token, PROFILE_TOKEN):
+        raise HTTPException(status_code=401, detail="Missing or wrong X-Profile-Token")
+
+
+router = APIRouter(route_class=ProfiledRoute, dependencies=[Depends(require_profile_token)])
+
+_ARTIFACT = re.compile(r"^[\w.-]+\.(json|pstats|folded)$")
+
+class ArmProfiling(BaseModel):
+    count: int = Field(1, ge=1, le=100)
+    path: Optional[str] = None  # e.g. "/api/group_orders"; any path when omitted
+
+@router.post("/admin/profile")
+def arm_profiling(request: ArmProfiling):
+    """Profile the next `count` requests under `path`, counted across all workers."""
+    return arm(shared_state, request.count, request.path)
+
+@router.delete("/admin/profile")
+def disarm_profiling():
+    return arm(shared_state, 0)
+
+@router.get("/admin/profile")
+def profiling_status():
+    return {"remaining": arming.remaining, "path": arming.path, "header_enabled": PROFILE_TOKEN is not None}
+
+@router.get("/admin/profiles")
+def profiles():
+    """Summaries of the profiles written so far, newest first."""
+    return FastJSONResponse(list_profiles())
+
+@router.get("/admin/profiles/{name}")
+def profile_artifact(name: str):
+    """Download <id>.json, <id>.pstats or <id>.folded."""
+    path = PROFILE_DIR / name
+    if not _ARTIFACT.match(name) or not path.is_file():
+        raise HTTPException(status_code=404, detail=f"No profile artifact {name}")
+    return FileResponse(path)
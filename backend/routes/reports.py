@@ -0,0 +1,48 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel
+
+from backends import OutletDatabase
+from outlets import (
+    known_outlets, order_counts_report, outlet_header, remember_outlet, sales_report, settlement_report,
+)
+from profiling import ProfiledRoute
+from serialization import FastJSONResponse
+
+
+router = APIRouter(route_class=ProfiledRoute)
+
+class NewOutlet(BaseModel):
+    name: str
+
+@router.get("/outlets")
+def list_outlets():
+    """Every outlet, across all shards."""
+    return FastJSONResponse(known_outlets())
+
+@router.post("/outlets")
+def add_outlet(outlet: NewOutlet, outlet_id: str = Depends(outlet_header)):
+    """Register the X-Outlet-Id outlet on the shard DB_SHARDS assigns it to."""
+    db = OutletDatabase(outlet_id)
+    try:
+        added = db.add_outlet(outlet.name)
+    finally:
+        db.close()
+    remember_outlet(outlet_id)
+    return FastJSONResponse(added)
+
+@router.get("/reports/settlement")
+def settlement(outlets: Optional[str] = None):
+    """Settlement totals per outlet and combined; `outlets` is a comma-separated list (default: all)."""
+    return FastJSONResponse(settlement_report(outlets))
+
+@router.get("/reports/order_counts")
+def order_counts(outlets: Optional[str] = None):
+    """Order counts by status and channel, per outlet and combined."""
+    return FastJSONResponse(order_counts_report(outlets))
+
+@router.get("/reports/sales")
+def sales(outlets: Optional[str] = None):
+    """Latest running sales total per outlet, and their sum."""
+    return FastJSONResponse(sales_report(outlets))
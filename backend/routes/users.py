@@ -1,24 +1,29 @@
 from fastapi import APIRouter, HTTPException, Depends
 from models.users import UserSignup, UserSchema, LoginRequest
-from database import UserDatabase
+from backends import UserDatabase
+from outlets import current_outlet
 from passlib.context import CryptContext
+from profiling import ProfiledRoute
 
-router = APIRouter()
-db = UserDatabase()
+router = APIRouter(route_class=ProfiledRoute)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+def get_user_db(outlet_id: str = Depends(current_outlet)):
+    """Per-request database handle for the request's outlet, returned to the pool afterwards."""
+    db = UserDatabase(outlet_id)
+    try:
+        yield db
+    finally:
+        db.close()
+
 @router.post("/signup")
-async def signup(user: UserSignup):
-    db = UserDatabase()
+def signup(user: UserSignup, db: UserDatabase = Depends(get_user_db)):
     user_id = db.create_user(user.name, user.email, user.password)
-    db.close()
     return {"user_id": user_id, "message": "User created successfully"}
 
 @router.post("/login")
-def login(user_data: LoginRequest):
-    db = UserDatabase()
+def login(user_data: LoginRequest, db: UserDatabase = Depends(get_user_db)):
     user = db.login_user(user_data.email, user_data.password)
-    db.close()
     
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
@@ -0,0 +1,208 @@
+"""
+State shared by every API worker process: flags such as the `company_load`
+override, and events such as cache invalidations.
+
+Two backends:
+- "postgres" (default): values live in `app_state`; changes are announced with
+  NOTIFY and each worker keeps a local copy current through a LISTEN thread,
+  so reads cost no round trip and changes reach all workers within
+  milliseconds. Until the listener is connected, reads go to the table.
+  Values are on the default shard, but events may be announced on any shard
+  (place_order() announces new orders on the outlet's), so the thread
+  listens on all of them.
+- "local": an in-process dict, for a single worker.
+
+Pick one with SHARED_STATE_BACKEND. It defaults to "local" when DB_BACKEND=memory,
+since there is no Postgres to LISTEN on.
+"""
+import json
+import os
+import select
+import threading
+from collections import defaultdict
+
+import psycopg2
+
+from database import DEFAULT_SHARD, STATE_CHANNEL, StateDatabase, shards
+
+BACKEND = os.getenv("SHARED_STATE_BACKEND", "local" if os.getenv("DB_BACKEND") == "memory" else "postgres")
+RECONNECT_SECONDS = 2.0
+
+
+class LocalSharedState:
+    """Single-process backend; also the base for the Postgres one."""
+
+    def __init__(self):
+        self._values = {}
+        self._subscribers = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def subscribe(self, key, callback):
+        """Call `callback(value)` whenever `key` changes or is published."""
+        self._subscribers[key].append(callback)
+
+    def _dispatch(self, key, value):
+        for callback in list(self._subscribers.get(key, ())):
+            try:
+                callback(value)
+            except Exception as e:
+                print(f"Error in shared state subscriber for {key}:", e)
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def set(self, key, value):
+        self._values[key] = value
+        self._dispatch(key, value)
+        return value
+
+    def toggle(self, key):
+        with self._lock:
+            value = not self._values.get(key, False)
+            self._values[key] = value
+        self._dispatch(key, value)
+        return value
+
+    def publish(self, key):
+        self._dispatch(key, None)
+
+    def published(self, key):
+        """Act locally on an event the database already announced in the writer's transaction."""
+        self._dispatch(key, None)
+
+    def take(self, key):
+        """Atomically take one from {"remaining": n, ...} at `key`; False once none are left."""
+        with self._lock:
+            value = self._values.get(key) or {}
+            if int(value.get("remaining") or 0) <= 0:
+                return False
+            value = {**value, "remaining": value["remaining"] - 1}
+            self._values[key] = value
+        self._dispatch(key, value)
+        return True
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def stats(self):
+        return {"backend": "local", "worker": os.getpid()}
+
+
+class PostgresSharedState(LocalSharedState):
+    def __init__(self):
+        super().__init__()
+        self._synced = False
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+
+    def get(self, key, default=None):
+        if self._synced:
+            return self._values.get(key, default)
+        db = StateDatabase()
+        try:
+            return db.get_state(key, default)
+        finally:
+            db.close()
+
+    # Writes go through the table; the worker's own cache is updated by the
+    # NOTIFY it receives like everyone else, so all caches apply changes in
+    # commit order.
+
+    def set(self, key, value):
+        db = StateDatabase()
+        try:
+            return db.set_state(key, value)
+        finally:
+            db.close()
+
+    def toggle(self, key):
+        db = StateDatabase()
+        try:
+            return db.toggle_flag(key)
+        finally:
+            db.close()
+
+    def take(self, key):
+        db = StateDatabase()
+        try:
+            return db.take_one(key) is not None
+        finally:
+            db.close()
+
+    def publish(self, key):
+        db = StateDatabase()
+        try:
+            db.publish(key)
+        finally:
+            db.close()
+        # Invalidations are idempotent: act locally without waiting for the echo
+        self._dispatch(key, None)
+
+    def _handle(self, payload):
+        message = json.loads(payload)
+        key = message["key"]
+        if "value" in message:
+            self._values[key] = message["value"]
+            self._dispatch(key, message["value"])
+        else:
+            self._dispatch(key, None)
+
+    def _listen_once(self):
+        conns = {}
+        try:
+            for name, shard_pool in shards.pools.items():
+                conn = conns[name] = psycopg2.connect(**shard_pool.connect_kwargs)
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {STATE_CHANNEL};")
+            # Load after LISTEN so no change can slip between the two
+            with conns[DEFAULT_SHARD].cursor() as cursor:
+                cursor.execute("SELECT key, value FROM app_state;")
+                self._values = {key: value for key, value in cursor.fetchall()}
+            self._synced = True
+            self.last_error = None
+            # Events may have been missed while disconnected: tell every subscriber
+            for key in list(self._subscribers):
+                self._dispatch(key, self._values.get(key))
+            while not self._stop.is_set():
+                for conn in select.select(list(conns.values()), [], [], 1.0)[0]:
+                    conn.poll()
+                    while conn.notifies:
+                        self._handle(conn.notifies.pop(0).payload)
+        finally:
+            self._synced = False
+            for conn in conns.values():
+                conn.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._listen_once()
+            except Exception as e:
+                self.last_error = str(e)
+                print("Shared state listener disconnected:", e)
+                self._stop.wait(RECONNECT_SECONDS)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="shared-state-listener", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            "backend": "postgres",
+            "worker": os.getpid(),
+            "listening": self._synced,
+            "last_error": self.last_error,
+        }
+
+
+shared_state = PostgresSharedState() if BACKEND == "postgres" else LocalSharedState()
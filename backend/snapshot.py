@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from backends import CompanyDatabase, OrderDatabase, SnapshotDatabase
+from database import DEFAULT_OUTLET
+
+# Seconds between background rebuilds of the dashboard snapshot
+REFRESH_SECONDS = float(os.getenv("DASHBOARD_REFRESH_SECONDS", "30"))
+# How far back the sales series in the snapshot goes
+SALES_SERIES_DAYS = float(os.getenv("DASHBOARD_SALES_DAYS", "1"))
+
+
+@dataclass(slots=True)
+class DashboardSnapshot:
+    generated_at: datetime
+    settlement: Dict[str, Any]
+    sales_series: List[Any]
+    allocations: List[Any]
+    order_counts: Dict[str, Any]
+
+
+def build_snapshot(outlet_id=DEFAULT_OUTLET) -> DashboardSnapshot:
+    """Run every dashboard query once for the outlet and bundle the results."""
+    orders = OrderDatabase(outlet_id)
+    company = CompanyDatabase(outlet_id)
+    generated_at = datetime.now(timezone.utc)
+    try:
+        return DashboardSnapshot(
+            generated_at=generated_at,
+            settlement=orders.get_settlement_summary(),
+            sales_series=company.get_company_data(since=generated_at - timedelta(days=SALES_SERIES_DAYS)),
+            allocations=orders.get_allocations(),
+            order_counts=orders.get_order_counts(),
+        )
+    finally:
+        orders.close()
+        company.close()
+
+
+def _payload(snapshot: DashboardSnapshot) -> Dict[str, Any]:
+    return {field.name: getattr(snapshot, field.name) for field in fields(snapshot) if field.name != "generated_at"}
+
+
+class SnapshotService:
+    """
+    Keeps the latest DashboardSnapshot of each outlet in memory, synced by a
+    background thread every `refresh_seconds` for DEFAULT_OUTLET and every
+    outlet whose dashboard has been read. Readers never hit the database
+    unless their outlet has no snapshot yet; concurrent refreshes of one
+    outlet collapse into a single sync.
+
+    The snapshot itself is shared by every worker (SnapshotDatabase). A sync
+    adopts the stored one, and only rebuilds it when it is due and no other
+    worker holds the rebuild lock, so each interval runs the dashboard
+    queries once per outlet, not once per worker.
+    """
+
+    def __init__(self, build=build_snapshot, refresh_seconds=REFRESH_SECONDS, database=SnapshotDatabase):
+        self._build = build
+        self._database = database
+        self.refresh_seconds = refresh_seconds
+        self._snapshots: Dict[str, DashboardSnapshot] = {}
+        self._refresh_locks: Dict[str, threading.Lock] = {DEFAULT_OUTLET: threading.Lock()}
+        self._locks_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_errors: Dict[str, str] = {}
+
+    def _refresh_lock(self, outlet_id):
+        with self._locks_lock:
+            return self._refresh_locks.setdefault(outlet_id, threading.Lock())
+
+    def _due(self, stored) -> bool:
+        if stored is None:
+            return True
+        # A little early, so the worker whose own timer set the last rebuild
+        # going finds the next one due when it wakes up
+        age = (datetime.now(timezone.utc) - stored["generated_at"]).total_seconds()
+        return age >= 0.9 * self.refresh_seconds
+
+    def _sync(self, outlet_id):
+        """The stored snapshot, rebuilt first if it is due and no other worker is rebuilding it."""
+        db = self._database(outlet_id)
+        try:
+            stored = db.load_snapshot()
+            if not self._due(stored) or not db.try_lock_refresh():
+                return stored
+            stored = db.load_snapshot()  # another worker may have saved one just before we locked
+            if self._due(stored):
+                snapshot = self._build(outlet_id)
+                stored = {"generated_at": snapshot.generated_at, "payload": _payload(snapshot)}
+                db.save_snapshot(snapshot.generated_at, stored["payload"])
+            return stored
+        finally:
+            db.close()
+
+    def refresh(self, outlet_id=DEFAULT_OUTLET) -> Optional[DashboardSnapshot]:
+        """Sync the outlet's snapshot, or wait for the sync already in flight."""
+        lock = self._refresh_lock(outlet_id)
+        if not lock.acquire(blocking=False):
+            with lock:
+                return self._snapshots.get(outlet_id)
+        try:
+            stored = self._sync(outlet_id)
+            if stored is not None:
+                self._snapshots[outlet_id] = DashboardSnapshot(generated_at=stored["generated_at"], **stored["payload"])
+            self.last_errors.pop(outlet_id, None)
+        except Exception as e:
+            self.last_errors[outlet_id] = str(e)
+            print(f"Error refreshing dashboard snapshot for {outlet_id}:", e)
+        finally:
+            lock.release()
+        return self._snapshots.get(outlet_id)
+
+    def get(self, outlet_id=DEFAULT_OUTLET) -> Optional[DashboardSnapshot]:
+        return self._snapshots.get(outlet_id) or self.refresh(outlet_id)
+
+    def age_seconds(self, outlet_id=DEFAULT_OUTLET) -> Optional[float]:
+        snapshot = self._snapshots.get(outlet_id)
+        if snapshot is None:
+            return None
+        return (datetime.now(timezone.utc) - snapshot.generated_at).total_seconds()
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            with self._locks_lock:
+                outlet_ids = list(self._refresh_locks)
+            for outlet_id in outlet_ids:
+                self.refresh(outlet_id)
+            self._stop.wait(max(0.0, self.refresh_seconds - (time.monotonic() - started)))
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="dashboard-snapshot", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+snapshots = SnapshotService()
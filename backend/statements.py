@@ -0,0 +1,114 @@
+"""
+Prepared-statement cache for the fixed queries in database.py.
+
+Each named query is PREPAREd once per pooled connection (server session) and
+then run with EXECUTE, so Postgres parses it once and can reuse a generic
+plan instead of re-parsing and re-planning the long CTEs on every request.
+Sessions are told apart by backend pid: a reconnected connection gets its
+statements prepared again, and a statement that disappeared server-side
+(DISCARD ALL, failover) is re-prepared and retried.
+
+Set DB_PREPARED_STATEMENTS=0 behind a transaction-mode pooler (e.g. the
+Supabase pooler on port 6543), which does not keep sessions.
+"""
+import os
+import re
+import threading
+import weakref
+from collections import defaultdict
+
+from psycopg2 import errors
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+ENABLED = os.getenv("DB_PREPARED_STATEMENTS", "1") == "1"
+
+_PLACEHOLDER = re.compile(r"%s")
+
+
+def _to_prepare(name, sql):
+    """Rewrite psycopg2 %s placeholders as $1..$n for PREPARE."""
+    count = 0
+
+    def number(_):
+        nonlocal count
+        count += 1
+        return f"${count}"
+
+    body = _PLACEHOLDER.sub(number, sql.strip().rstrip(";"))
+    return f"PREPARE {name} AS {body}", count
+
+
+class StatementRegistry:
+    def __init__(self, enabled=ENABLED):
+        self.enabled = enabled
+        self._statements = {}  # name -> (PREPARE sql, EXECUTE sql, original sql)
+        self._sessions = weakref.WeakKeyDictionary()  # conn -> (backend pid, names prepared there)
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"prepares": 0, "executions": 0, "reprepares": 0})
+
+    def _register(self, name, sql):
+        if name not in self._statements:
+            prepare, count = _to_prepare(name, sql)
+            placeholders = ", ".join(["%s"] * count)
+            execute = f"EXECUTE {name} ({placeholders})" if count else f"EXECUTE {name}"
+            self._statements[name] = (prepare, execute, sql)
+        return self._statements[name]
+
+    def sql(self, name):
+        """Original text of a statement that has run at least once."""
+        return self._statements[name][2]
+
+    def _prepared_names(self, conn):
+        pid = conn.get_backend_pid()
+        with self._lock:
+            session = self._sessions.get(conn)
+            if session is None or session[0] != pid:
+                # New connection, or the same object reconnected to a new session
+                session = (pid, set())
+                self._sessions[conn] = session
+        return session[1]
+
+    def execute(self, cursor, name, sql, params=()):
+        """Run `sql` under `name`, preparing it first on this connection if needed."""
+        if not self.enabled:
+            cursor.execute(sql, params)
+            return
+
+        conn = cursor.connection
+        prepare, execute, _ = self._register(name, sql)
+        prepared = self._prepared_names(conn)
+        fresh_transaction = conn.info.transaction_status == TRANSACTION_STATUS_IDLE
+
+        if name not in prepared:
+            cursor.execute(prepare)
+            prepared.add(name)
+            self._stats[name]["prepares"] += 1
+        try:
+            cursor.execute(execute, params)
+        except errors.InvalidSqlStatementName:
+            # Dropped server-side. Retrying is only safe if nothing else ran
+            # in the transaction this error just aborted.
+            prepared.discard(name)
+            if not fresh_transaction:
+                raise
+            conn.rollback()
+            cursor.execute(prepare)
+            prepared.add(name)
+            self._stats[name]["reprepares"] += 1
+            cursor.execute(execute, params)
+        self._stats[name]["executions"] += 1
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "sessions": len(self._sessions),
+            "statements": {name: dict(counts) for name, counts in self._stats.items()},
+        }
+
+    def server_stats(self, cursor):
+        """Plan-cache counters from this session's pg_prepared_statements (PG 14+)."""
+        cursor.execute("SELECT name, generic_plans, custom_plans FROM pg_prepared_statements;")
+        return cursor.fetchall()
+
+
+registry = StatementRegistry()
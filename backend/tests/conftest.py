@@ -0,0 +1,57 @@
+"""
+The tests run on the in-memory backend with local shared state, so they
+need no database: `cd backend && python -m pytest -q tests`.
+
+test_parity.py also compares the memory backend with Postgres when
+TEST_POSTGRES=1 and DB_* point at a migrated scratch database.
+"""
+import os
+import sys
+
+os.environ["DB_BACKEND"] = "memory"
+os.environ["SHARED_STATE_BACKEND"] = "local"
+os.environ.setdefault("OUTBOX_WORKER", "0")
+os.environ.setdefault("GROQ_API_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+import memory_store  # noqa: E402
+
+MENU = [
+    # name, category (kitchen station), sub_category, preparation_time
+    ("Veg Burger", "Grill", "Burgers", 12),
+    ("Chicken Burger", "Grill", "Burgers", 15),
+    ("Lemonade", "Bar", "Drinks", 3),
+]
+WAITERS = ["Asha", "Ravi"]
+
+
+def seed(store):
+    """Fill a MemoryStore with MENU and WAITERS; returns {name: sku}."""
+    skus = {}
+    for name, category, sub_category, preparation_time in MENU:
+        item = store.insert_menu_item(
+            name, category, sub_category, tax_percentage=5, packaging_charge=10,
+            description=f"{name} description", variations={}, image_url=None, preparation_time=preparation_time,
+        )
+        skus[name] = item["sku"]
+    for name in WAITERS:
+        store.insert_user(name, f"{name.lower()}@example.com", "secret", role="waiter")
+    return skus
+
+
+@pytest.fixture
+def store():
+    return memory_store.MemoryStore()
+
+
+@pytest.fixture
+def skus(store):
+    return seed(store)
+
+
+@pytest.fixture
+def orders(store, skus):
+    return memory_store.OrderDatabase(store=store)
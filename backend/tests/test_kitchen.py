@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta, timezone
+
+import threading
+import time
+
+import pytest
+
+import kitchen
+from kitchen import KitchenScheduler, build_batches, build_schedule
+from models.rows import KitchenBacklogRow
+
+NOW = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def line(order_id, sku, preparation_time, minutes_ago=0, quantity=1, station="Grill", channel="Dine In"):
+    return KitchenBacklogRow(
+        order_id=order_id,
+        created_at=NOW - timedelta(minutes=minutes_ago),
+        channel_type=channel,
+        sku=sku,
+        quantity=quantity,
+        name=sku.title(),
+        station=station,
+        preparation_time=preparation_time,
+    )
+
+
+def etas(schedule):
+    return {eta.order_id: eta.eta_minutes for eta in schedule.orders}
+
+
+def test_spt_cooks_the_shortest_dish_first():
+    rows = [line(1, "steak", 20), line(2, "toast", 5)]
+    schedule = build_schedule(rows, NOW, policy="spt")
+    assert [batch.sku for batch in schedule.stations["Grill"]] == ["toast", "steak"]
+    assert etas(schedule) == {2: 5, 1: 25}
+    assert [eta.order_id for eta in schedule.orders] == [2, 1]
+    assert schedule.orders[1].ready_at == NOW + timedelta(minutes=25)
+
+
+def test_edd_cooks_the_order_due_first():
+    # The steak was ordered 12 minutes ago: due sooner, though slower to cook
+    rows = [line(1, "steak", 20, minutes_ago=12), line(2, "toast", 5)]
+    assert [b.sku for b in build_schedule(rows, NOW, policy="spt").stations["Grill"]] == ["toast", "steak"]
+    schedule = build_schedule(rows, NOW, policy="edd")
+    assert [batch.sku for batch in schedule.stations["Grill"]] == ["steak", "toast"]
+    assert etas(schedule) == {1: 20, 2: 25}
+
+
+def test_aging_stops_long_dishes_from_starving():
+    rows = [line(1, "steak", 20, minutes_ago=60), line(2, "toast", 5)]
+    schedule = build_schedule(rows, NOW, policy="spt")
+    assert [batch.sku for batch in schedule.stations["Grill"]] == ["steak", "toast"]
+
+
+def test_stations_work_in_parallel():
+    # An order is ready when its slowest station is done
+    rows = [line(1, "burger", 12), line(1, "lemonade", 3, station="Bar"), line(2, "soda", 2, station="Bar")]
+    schedule = build_schedule(rows, NOW, policy="spt")
+    assert [batch.sku for batch in schedule.stations["Bar"]] == ["soda", "lemonade"]
+    assert etas(schedule) == {1: 12, 2: 2}
+
+
+def test_identical_skus_are_batched_up_to_capacity(monkeypatch):
+    monkeypatch.setattr(kitchen, "BATCH_CAPACITY", 4)
+    rows = [line(1, "fries", 6, quantity=3), line(2, "fries", 6, quantity=3)]
+    batches = build_batches(rows)
+    assert [(batch.quantity, batch.order_ids) for batch in batches] == [(4, [1, 2]), (2, [2])]
+    assert etas(build_schedule(rows, NOW)) == {1: 6, 2: 12}
+
+
+def test_missing_station_and_preparation_time_use_defaults():
+    rows = [line(1, "special", None, station=None)]
+    schedule = build_schedule(rows, NOW)
+    assert list(schedule.stations) == [kitchen.DEFAULT_STATION]
+    assert etas(schedule) == {1: kitchen.DEFAULT_PREP_MINUTES}
+
+
+def test_scheduler_rebuilds_only_after_invalidate():
+    loads = []
+
+    def load_backlog(outlet_id):
+        loads.append(outlet_id)
+        return [line(len(loads), "toast", 5)]
+
+    scheduler = KitchenScheduler("main", load_backlog=load_backlog, refresh_seconds=3600)
+    first = scheduler.get()
+    assert scheduler.get() is first
+    scheduler.invalidate()
+    assert [eta.order_id for eta in scheduler.get().orders] == [2]
+    assert loads == ["main", "main"]
+
+
+def test_scheduler_retries_a_failed_load():
+    calls = []
+
+    def load_backlog(outlet_id):
+        calls.append(outlet_id)
+        if len(calls) == 1:
+            raise RuntimeError("database down")
+        return []
+
+    scheduler = KitchenScheduler("main", load_backlog=load_backlog, refresh_seconds=3600)
+    with pytest.raises(RuntimeError):
+        scheduler.get()
+    assert scheduler.get().orders == []
+
+
+def wait_for_refresh(scheduler):
+    deadline = time.monotonic() + 5
+    while scheduler._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_peek_never_waits_for_a_rebuild():
+    release = threading.Event()
+
+    def load_backlog(outlet_id):
+        release.wait(5)
+        return [line(1, "toast", 5)]
+
+    scheduler = KitchenScheduler("main", load_backlog=load_backlog, refresh_seconds=3600, min_rebuild_seconds=0)
+    # The load is blocked, yet peek() returns at once with nothing cached yet
+    assert scheduler.peek() is None
+    release.set()
+    wait_for_refresh(scheduler)
+    assert etas(scheduler.peek()) == {1: 5}
+
+
+def test_peek_rebuilds_at_most_once_per_interval():
+    loads = []
+
+    def load_backlog(outlet_id):
+        loads.append(outlet_id)
+        return []
+
+    scheduler = KitchenScheduler("main", load_backlog=load_backlog, refresh_seconds=3600, min_rebuild_seconds=3600)
+    scheduler.get()
+    for _ in range(5):
+        scheduler.invalidate()
+        assert scheduler.peek() is not None
+        wait_for_refresh(scheduler)
+    # One rebuild from get(), one from the first peek(); the rest wait out the interval
+    assert loads == ["main", "main"]
@@ -0,0 +1,70 @@
+import pytest
+
+import lifecycle
+from lifecycle import CANCELLED, PENDING, PREPARING, READY, SERVED, SETTLED
+
+
+def place(orders, skus, tables=("T1",), channel="Dine In"):
+    placed = orders.create_order(channel, list(tables), [{"sku": skus["Veg Burger"], "quantity": 1, "price": 100}], "Cash")
+    return placed["order_id"]
+
+
+@pytest.mark.parametrize("current, target", [
+    (PENDING, PREPARING), (PREPARING, READY), (READY, SERVED), (SERVED, SETTLED),
+    (PENDING, CANCELLED), (PREPARING, CANCELLED), (READY, CANCELLED),
+])
+def test_allowed_transitions(current, target):
+    assert target in lifecycle.TRANSITIONS[current]
+    assert current in lifecycle.sources(target)
+
+
+@pytest.mark.parametrize("current, target", [
+    (PENDING, READY), (PENDING, SERVED), (READY, PREPARING), (SERVED, CANCELLED),
+    (SETTLED, PENDING), (CANCELLED, PENDING),
+])
+def test_rejected_transitions(current, target):
+    assert target not in lifecycle.TRANSITIONS[current]
+
+
+def test_pending_order_cannot_skip_to_ready(orders, skus):
+    order_id = place(orders, skus)
+    result = orders.transition_orders([order_id], READY)
+    assert result["updated"] == []
+    assert result["rejected"] == [{"order_id": order_id, "status": PENDING}]
+    assert orders.get_order_management()[0].status == PENDING
+
+
+def test_bulk_transition_splits_updated_rejected_and_not_found(orders, skus):
+    pending, preparing = place(orders, skus), place(orders, skus, tables=("T2",))
+    orders.transition_orders([preparing], PREPARING)
+    result = orders.transition_orders([preparing, pending, 999, preparing], READY)
+    assert result == {
+        "status": READY,
+        "updated": [preparing],
+        "rejected": [{"order_id": pending, "status": PENDING}],
+        "not_found": [999],
+    }
+
+
+def test_unknown_status_is_an_error(orders, skus):
+    with pytest.raises(ValueError):
+        orders.transition_orders([place(orders, skus)], "Eaten")
+
+
+def test_serving_releases_the_waiter_and_leaves_the_kitchen(orders, skus):
+    order_id = place(orders, skus)
+    assert [row.order_id for row in orders.get_kitchen_backlog()] == [order_id]
+    assert len(orders.get_allocations()) == 1
+    for status in (PREPARING, READY):
+        orders.transition_orders([order_id], status)
+    assert orders.get_kitchen_backlog() == []
+    assert len(orders.get_allocations()) == 1
+    orders.transition_orders([order_id], SERVED)
+    assert orders.get_allocations() == []
+
+
+def test_cancelling_frees_the_waiter_for_the_next_order(orders, skus):
+    first = orders.create_order("Dine In", ["T1"], [{"sku": skus["Lemonade"], "quantity": 1, "price": 50}], "Cash")
+    orders.transition_orders([first["order_id"]], CANCELLED)
+    second = orders.create_order("Dine In", ["T2"], [{"sku": skus["Lemonade"], "quantity": 1, "price": 50}], "Cash")
+    assert second["waiter_id"] == first["waiter_id"]
@@ -0,0 +1,93 @@
+"""
+The memory backend against Postgres: the same calls on both must give the
+same results. Opt in with TEST_POSTGRES=1; every run registers a fresh
+outlet on the database configured by DB_*.
+"""
+import os
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.skipif(os.getenv("TEST_POSTGRES") != "1", reason="set TEST_POSTGRES=1 to compare with Postgres")
+
+import database  # noqa: E402
+import memory_store  # noqa: E402
+from conftest import MENU, WAITERS  # noqa: E402
+from lifecycle import CANCELLED, PREPARING, READY, SERVED  # noqa: E402
+
+
+def setup_outlet(backend, outlet_id):
+    backend.OutletDatabase(outlet_id).add_outlet("Parity outlet")
+    menu, users = backend.MenuDatabase(outlet_id), backend.UserDatabase(outlet_id)
+    try:
+        for name, category, sub_category, _ in MENU:
+            menu.add_menu_item(name, category, sub_category, 5, 10, f"{name} description", {}, None)
+        for name in WAITERS:
+            users.create_user(name, f"{name.lower()}-{outlet_id}@example.com", "secret", role="waiter")
+        name, sku = memory_store.MENU_FIELDS.index("name"), memory_store.MENU_FIELDS.index("sku")
+        skus = {row[name]: row[sku] for row in menu.get_all_menu_items()}
+        waiter_names = {}
+        for name in WAITERS:
+            user = users.get_user_by_email(f"{name.lower()}-{outlet_id}@example.com")
+            waiter_names[str(user["id"])] = name
+    finally:
+        menu.close()
+        users.close()
+    return skus, waiter_names
+
+
+def drain(outlet_id):
+    """Apply the outbox rows Postgres queued for the outlet's orders."""
+    from outbox import OutboxWorker
+    OutboxWorker().drain(database.shards.shard_for(outlet_id))
+
+
+def run_scenario(backend, outlet_id):
+    skus, waiter_names = setup_outlet(backend, outlet_id)
+    db = backend.OrderDatabase(outlet_id)
+    try:
+        placed = [
+            db.create_order("Dine In", ["T1"], [{"sku": skus["Veg Burger"], "quantity": 2, "price": 120}], "Cash"),
+            db.create_order("Dine In", ["T2"], [{"sku": skus["Chicken Burger"], "quantity": 1, "price": 180},
+                                                {"sku": skus["Lemonade"], "quantity": 3, "price": 40}], "Credit Card"),
+            db.create_order("Takeaway", [], [{"sku": skus["Lemonade"], "quantity": 1, "price": 40}], "Cash"),
+            db.create_order("Dine In", ["T3"], [{"sku": skus["Veg Burger"], "quantity": 1, "price": 120}], "Cash"),
+        ]
+        ids = [order["order_id"] for order in placed]
+        transitions = [
+            db.transition_orders([ids[0]], READY),
+            db.transition_orders([ids[0], ids[1]], PREPARING),
+            db.transition_orders([ids[1], ids[2], ids[0] + 10_000], CANCELLED),
+            db.transition_orders([ids[0]], READY),
+            db.transition_orders([ids[0]], SERVED),
+        ]
+        if backend is database:
+            drain(outlet_id)
+        number = {order_id: n for n, order_id in enumerate(ids)}
+        number[ids[0] + 10_000] = "missing"
+        return {
+            "placed": [(waiter_names.get(str(order["waiter_id"])), order["total_price"]) for order in placed],
+            "transitions": [
+                (sorted(number[i] for i in result["updated"]),
+                 sorted((number[r["order_id"]], r["status"]) for r in result["rejected"]),
+                 sorted(number[i] for i in result["not_found"]))
+                for result in transitions
+            ],
+            "orders": sorted(
+                (number[row.order_id], row.status, row.channel_type, float(row.price), row.assigned_tables,
+                 sorted((item["sku"], item["quantity"]) for item in row.items))
+                for row in db.get_order_management()
+            ),
+            "allocations": sorted(
+                (row.table_no["tables"], row.waiter_name, sorted(item["sku"] for item in row.ordered_items or []))
+                for row in db.get_allocations()
+            ),
+            "kitchen": [(number[row.order_id], row.sku, row.quantity, row.station) for row in db.get_kitchen_backlog()],
+        }
+    finally:
+        db.close()
+
+
+def test_memory_backend_matches_postgres():
+    outlet_id = f"parity-{uuid.uuid4().hex[:12]}"
+    assert run_scenario(memory_store, outlet_id) == run_scenario(database, outlet_id)
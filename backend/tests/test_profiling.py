@@ -0,0 +1,51 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import routes.profiling
+from app import app
+from profiling import arm, token_matches
+from shared_state import shared_state
+
+ENDPOINTS = [
+    ("post", "/api/admin/profile"),
+    ("delete", "/api/admin/profile"),
+    ("get", "/api/admin/profile"),
+    ("get", "/api/admin/profiles"),
+    ("get", "/api/admin/profiles/missing.json"),
+]
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+    arm(shared_state, 0)  # so no later request gets profiled
+
+
+def call(client, method, path, **kwargs):
+    if method == "post":
+        kwargs["json"] = {"count": 1}
+    return getattr(client, method)(path, **kwargs)
+
+
+@pytest.mark.parametrize("method, path", ENDPOINTS)
+def test_admin_profiling_is_off_without_a_token(client, monkeypatch, method, path):
+    monkeypatch.setattr(routes.profiling, "PROFILE_TOKEN", None)
+    assert call(client, method, path, headers={"X-Profile-Token": "anything"}).status_code == 403
+
+
+@pytest.mark.parametrize("method, path", ENDPOINTS)
+def test_admin_profiling_needs_the_token(client, monkeypatch, method, path):
+    monkeypatch.setattr(routes.profiling, "PROFILE_TOKEN", "s3cret")
+    assert call(client, method, path).status_code == 401
+    assert call(client, method, path, headers={"X-Profile-Token": "wrong"}).status_code == 401
+    allowed = call(client, method, path, headers={"X-Profile-Token": "s3cret"})
+    assert allowed.status_code == (404 if path.endswith(".json") else 200)
+
+
+def test_token_matches():
+    assert token_matches("s3cret", "s3cret")
+    assert token_matches(b"s3cret", b"s3cret")
+    assert not token_matches("s3cre", "s3cret")
+    assert not token_matches("", "s3cret")
+    assert not token_matches("s3cret", None)
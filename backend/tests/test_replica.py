@@ -0,0 +1,77 @@
+"""
+Read routing with a fake replica pool: reads fall back to the primary when
+the replica fails, and any worker's write holds reads on the primary.
+"""
+import psycopg2
+import pytest
+
+import database
+from app import app  # noqa: F401  (wires the replica to shared state)
+from database import REPLICA_WRITE_EVENT, PooledDatabase, read_only, replica
+from shared_state import shared_state
+
+
+class FakeConnection:
+    def cursor(self, cursor_factory=None):
+        return self
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self):
+        self.released = []
+
+    def acquire(self):
+        return FakeConnection()
+
+    def release(self, conn):
+        self.released.append(conn)
+
+
+class Reads(PooledDatabase):
+    def __init__(self, replica_fails=False):
+        super().__init__(shard=database.DEFAULT_SHARD)
+        self.replica_fails = replica_fails
+        self.roles = []
+
+    def _handle(self, role):
+        if role == "primary":
+            return (None, None, None)
+        return super()._handle(role)
+
+    @read_only
+    def read(self):
+        self.roles.append(self._role)
+        if self._role == "replica" and self.replica_fails:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        return self._role
+
+
+@pytest.fixture
+def replica_pool(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(replica, "pool", pool)
+    monkeypatch.setattr(replica, "read_your_writes_seconds", 60)
+    monkeypatch.setattr(replica, "_last_write", float("-inf"))
+    monkeypatch.setattr(replica, "_down_until", 0.0)
+    return pool
+
+
+def test_reads_go_to_the_replica(replica_pool):
+    assert Reads().read() == "replica"
+
+
+def test_a_failed_replica_query_is_retried_on_the_primary(replica_pool):
+    db = Reads(replica_fails=True)
+    assert db.read() == "primary"
+    assert db.roles == ["replica", "primary"]
+    assert len(replica_pool.released) == 1
+    # Marked down: the next read skips the replica
+    assert Reads().read() == "primary"
+
+
+def test_another_workers_write_holds_reads_on_the_primary(replica_pool):
+    shared_state.published(REPLICA_WRITE_EVENT)
+    assert Reads().read() == "primary"
@@ -0,0 +1,102 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+import memory_store
+from app import app
+from conftest import seed
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def outlet(client):
+    """A freshly registered outlet with the test menu and waiters; returns (headers, skus)."""
+    outlet_id = f"test-{uuid.uuid4().hex[:12]}"
+    headers = {"X-Outlet-Id": outlet_id}
+    assert client.post("/api/outlets", json={"name": "Test outlet"}, headers=headers).status_code == 200
+    return headers, seed(memory_store.store_for(outlet_id))
+
+
+def place(client, headers, skus, table="T1"):
+    response = client.post("/api/create_order", headers=headers, json={
+        "channel_type": "Dine In",
+        "table_numbers": [table],
+        "items": [{"sku": skus["Veg Burger"], "quantity": 2, "price": 100}],
+        "settlement_mode": "Cash",
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["order_id"]
+
+
+def test_unknown_outlet_is_rejected_before_any_state(client):
+    headers = {"X-Outlet-Id": f"nope-{uuid.uuid4().hex[:8]}"}
+    assert client.get("/api/kitchen/queue", headers=headers).status_code == 404
+    assert headers["X-Outlet-Id"] not in memory_store.stores
+    assert client.get("/api/kitchen/queue", headers={"X-Outlet-Id": "Not Valid"}).status_code == 400
+
+
+def test_new_order_reaches_order_management_and_the_kitchen(client, outlet):
+    headers, skus = outlet
+    order_id = place(client, headers, skus)
+    rows = client.get("/api/get_order_management", headers=headers).json()
+    assert [(row["order_id"], row["status"], row["assigned_tables"]) for row in rows] == [(order_id, "Pending", ["T1"])]
+    queue = client.get("/api/kitchen/queue", headers=headers).json()
+    assert [eta["order_id"] for eta in queue["orders"]] == [order_id]
+
+
+def test_status_changes(client, outlet):
+    headers, skus = outlet
+    order_id = place(client, headers, skus)
+    skipped = client.post(f"/api/orders/{order_id}/status", json={"status": "Ready"}, headers=headers)
+    assert skipped.status_code == 409
+    assert client.post(f"/api/orders/{order_id}/status", json={"status": "Preparing"}, headers=headers).status_code == 200
+    assert client.post("/api/orders/999/status", json={"status": "Ready"}, headers=headers).status_code == 404
+    assert client.post(f"/api/orders/{order_id}/status", json={"status": "Eaten"}, headers=headers).status_code == 400
+
+    other = place(client, headers, skus, table="T2")
+    bulk = client.post("/api/orders/status", json={"order_ids": [order_id, other, 999], "status": "Ready"},
+                       headers=headers).json()
+    assert bulk["updated"] == [order_id]
+    assert bulk["rejected"] == [{"order_id": other, "status": "Pending"}]
+    assert bulk["not_found"] == [999]
+
+
+def test_order_management_date_range(client, outlet):
+    headers, skus = outlet
+    order_id = place(client, headers, skus)
+    now = datetime.now(timezone.utc)
+    hour_ago, in_an_hour = (now - timedelta(hours=1)).isoformat(), (now + timedelta(hours=1)).isoformat()
+
+    def listed(**params):
+        response = client.get("/api/get_order_management", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        return [row["order_id"] for row in response.json()]
+
+    assert listed(since=hour_ago, until=in_an_hour) == [order_id]
+    assert listed(until=hour_ago) == []
+    assert listed(since=in_an_hour) == []
+    response = client.get("/api/get_order_management", params={"since": in_an_hour, "until": hour_ago}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_live_orders_stay_visible_however_old(client, outlet):
+    headers, skus = outlet
+    order_id = place(client, headers, skus)
+    store = memory_store.store_for(headers["X-Outlet-Id"])
+    with store.lock:
+        store.orders[order_id]["created_at"] -= timedelta(days=40)
+        store.open_allocations[order_id]["created_at"] -= timedelta(days=40)
+    listed = [row["order_id"] for row in client.get("/api/get_order_management", headers=headers).json()]
+    assert listed == [order_id]
+    assert [eta["order_id"] for eta in client.get("/api/kitchen/queue", headers=headers).json()["orders"]] == [order_id]
+    assert len(client.get("/api/get_allocations", headers=headers).json()) == 1
+    # The old allocation still counts towards its waiter's load
+    first_waiter = store.orders[order_id]["waiter_id"]
+    assert store.orders[place(client, headers, skus, table="T2")]["waiter_id"] != first_waiter
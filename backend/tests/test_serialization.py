@@ -0,0 +1,12 @@
+from decimal import Decimal
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from serialization import dumps
+
+
+def test_decimals_encode_like_jsonable_encoder():
+    values = [Decimal("12"), Decimal("1E+2"), Decimal("12.50"), Decimal("0.1"), Decimal("-3")]
+    assert orjson.loads(dumps(values)) == jsonable_encoder(values)
+    assert dumps([Decimal("12"), Decimal("12.50")]) == b"[12,12.5]"
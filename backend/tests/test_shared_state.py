@@ -0,0 +1,111 @@
+"""
+Two workers' PostgresSharedState, wired to a fake app_state table whose
+NOTIFYs reach every listener, the way the LISTEN thread delivers them.
+"""
+import json
+
+import pytest
+
+import shared_state
+from shared_state import PostgresSharedState
+
+
+class FakeChannel:
+    """app_state plus the listeners NOTIFY on STATE_CHANNEL reaches."""
+
+    def __init__(self):
+        self.values = {}
+        self.listeners = []
+
+    def notify(self, message):
+        for listener in self.listeners:
+            listener._handle(json.dumps(message))
+
+
+class FakeStateDatabase:
+    channel = None
+
+    def get_state(self, key, default=None):
+        return self.channel.values.get(key, default)
+
+    def set_state(self, key, value):
+        self.channel.values[key] = value
+        self.channel.notify({"key": key, "value": value})
+        return value
+
+    def toggle_flag(self, key):
+        value = not self.channel.values.get(key, False)
+        return self.set_state(key, value)
+
+    def take_one(self, key):
+        value = self.channel.values.get(key) or {}
+        if int(value.get("remaining") or 0) <= 0:
+            return None
+        return self.set_state(key, {**value, "remaining": value["remaining"] - 1})
+
+    def publish(self, key):
+        self.channel.notify({"key": key})
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    channel = FakeChannel()
+    monkeypatch.setattr(FakeStateDatabase, "channel", channel)
+    monkeypatch.setattr(shared_state, "StateDatabase", FakeStateDatabase)
+    workers = [PostgresSharedState(), PostgresSharedState()]
+    for worker in workers:
+        channel.listeners.append(worker)
+        worker._synced = True  # as if the LISTEN thread had connected
+    return workers
+
+
+def test_toggle_in_one_worker_is_seen_by_the_other(workers):
+    first, second = workers
+    seen = []
+    second.subscribe("company_load", seen.append)
+    assert first.toggle("company_load") is True
+    assert second.get("company_load") is True
+    assert first.toggle("company_load") is False
+    assert second.get("company_load") is False
+    assert seen == [True, False]
+
+
+def test_set_and_take_reach_every_worker(workers):
+    first, second = workers
+    first.set("offer", {"remaining": 1, "sku": "BUR001"})
+    assert second.get("offer") == {"remaining": 1, "sku": "BUR001"}
+    assert second.take("offer") is True
+    assert first.take("offer") is False
+    assert first.get("offer")["remaining"] == 0
+
+
+def test_published_events_invalidate_every_worker(workers):
+    first, second = workers
+    calls = []
+    first.subscribe("kitchen_backlog:main", lambda value: calls.append("first"))
+    second.subscribe("kitchen_backlog:main", lambda value: calls.append("second"))
+    first.publish("kitchen_backlog:main")
+    # The publisher acts at once and again on its own NOTIFY; invalidation is idempotent
+    assert sorted(set(calls)) == ["first", "second"]
+
+
+def test_unsynced_reads_go_to_the_table(workers):
+    first, second = workers
+    first.set("company_load", True)
+    second._synced = False
+    second._values.clear()
+    assert second.get("company_load") is True
+
+
+def test_place_order_notify_reaches_other_workers(workers):
+    first, second = workers
+    calls = []
+    first.subscribe("kitchen_backlog:main", lambda value: calls.append("first"))
+    second.subscribe("kitchen_backlog:main", lambda value: calls.append("second"))
+    # The route's own worker acts locally; the NOTIFY place_order() sent reaches the rest
+    first.published("kitchen_backlog:main")
+    FakeStateDatabase.channel.notify({"key": "kitchen_backlog:main"})
+    assert "second" in calls and "first" in calls
@@ -43,17 +43,31 @@ export default function DashboardPage() {
   const [companyData, setCompanyData] = useState<CompanyData[]>([])
 
   useEffect(() => {
-    // Fetch settlement data
-    fetch("http://127.0.0.1:8000/api/settlement_master")
-      .then((response) => response.json())
-      .then((data) => setSettlementData(data))
-      .catch((error) => console.error("Error fetching settlement data:", error))
-
-    // Fetch company data
-    fetch("http://127.0.0.1:8000/api/company_data")
-      .then((response) => response.json())
-      .then((data) => setCompanyData(data))
-      .catch((error) => console.error("Error fetching company data:", error))
+    // Settlement totals and the sales series come from one precomputed snapshot.
+    // Right after a deploy it may not be built yet (503): try again shortly.
+    let retry: ReturnType<typeof setTimeout> | undefined
+    const load = () => {
+      fetch("http://127.0.0.1:8000/api/dashboard/snapshot")
+        .then((response) => {
+          if (response.status === 503) {
+            const seconds = Number(response.headers.get("Retry-After")) || 5
+            retry = setTimeout(load, seconds * 1000)
+            return null
+          }
+          if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`)
+          }
+          return response.json()
+        })
+        .then((data) => {
+          if (!data) return
+          setSettlementData(data.settlement ?? null)
+          setCompanyData(data.sales_series ?? [])
+        })
+        .catch((error) => console.error("Error fetching dashboard snapshot:", error))
+    }
+    load()
+    return () => clearTimeout(retry)
   }, [])
 
   // Transform company data for the chart